@@ -0,0 +1,44 @@
+from fastapi import Request
+from app.api.services.fred_service import FREDService
+from app.api.services.expression_service import ExpressionService
+from app.api.services.analytics_service import AnalyticsService
+from app.api.services.impact_service import ImpactService
+from app.api.services.regional_service import RegionalService
+from app.api.services.scraper_service import ScraperService
+from app.api.services.yield_curve_service import YieldCurveService
+from app.api.services.search_service import SearchService
+from app.api.services.stream_service import LatestValueStream
+from app.loop_monitor import LoopLagMonitor
+
+# The services are created once in the app's lifespan hook (see app/main.py)
+# and handed to the routes through these dependencies.
+
+def get_fred_service(request: Request) -> FREDService:
+    return request.app.state.fred_service
+
+def get_expression_service(request: Request) -> ExpressionService:
+    return request.app.state.expression_service
+
+def get_analytics_service(request: Request) -> AnalyticsService:
+    return request.app.state.analytics_service
+
+def get_impact_service(request: Request) -> ImpactService:
+    return request.app.state.impact_service
+
+def get_regional_service(request: Request) -> RegionalService:
+    return request.app.state.regional_service
+
+def get_scraper_service(request: Request) -> ScraperService:
+    return request.app.state.scraper_service
+
+def get_yield_curve_service(request: Request) -> YieldCurveService:
+    return request.app.state.yield_curve_service
+
+def get_search_service(request: Request) -> SearchService:
+    return request.app.state.search_service
+
+def get_latest_stream(request: Request) -> LatestValueStream:
+    return request.app.state.latest_stream
+
+def get_loop_monitor(request: Request) -> LoopLagMonitor:
+    return request.app.state.loop_monitor
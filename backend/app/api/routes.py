@@ -1,39 +1,114 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
+from app.api.dependencies import (
+    get_fred_service, get_expression_service, get_analytics_service, get_impact_service, get_regional_service,
+    get_scraper_service, get_yield_curve_service, get_search_service, get_latest_stream, get_loop_monitor
+)
 from app.api.services.fred_service import FREDService
-from app.api.services.regional_service import RegionalService  # Import for regional data
-from app.api.services.scraper_service import ScraperService  # Added for completeness
+from app.api.services.expression_service import ExpressionService
+from app.api.services.analytics_service import AnalyticsService
+from app.api.services.impact_service import ImpactService, DEFAULT_SIMULATIONS
+from app.api.services.regional_service import RegionalService
+from app.api.services.scraper_service import ScraperService
+from app.api.services.yield_curve_service import YieldCurveService
+from app.api.services.search_service import SearchService
+from app.api.services.stream_service import LatestValueStream
+from app.api.services.rate_limit import fred_keys
+from app import deadlines
+from app.loop_monitor import LoopLagMonitor
 import random
 
 router = APIRouter()
-fred_service = FREDService()
-regional_service = RegionalService()  # Initialize the regional service
-scraper_service = ScraperService()  # Added for completeness
+
+# every national indicator the API lists (also what `python -m app.warmup` preloads)
+AVAILABLE_INDICATORS = [
+    {"id": "FEDFUNDS", "name": "Federal Funds Effective Rate", "category": "Interest Rates"},
+    {"id": "DFF", "name": "Federal Funds Rate (Daily)", "category": "Interest Rates"},
+    {"id": "UNRATE", "name": "Unemployment Rate", "category": "Labor Market"},
+    {"id": "CPIAUCSL", "name": "Consumer Price Index for All Urban Consumers", "category": "Inflation"},
+    {"id": "GDPC1", "name": "Real Gross Domestic Product", "category": "National Accounts"},
+    {"id": "PAYEMS", "name": "All Employees, Total Nonfarm", "category": "Labor Market"},
+    {"id": "T10Y2Y", "name": "10-Year Treasury Constant Maturity Minus 2-Year Treasury", "category": "Interest Rates"},
+    {"id": "SP500", "name": "S&P 500", "category": "Financial Markets"},
+]
 
 @router.get("/indicators")
 async def get_available_indicators():
     """Get a list of available economic indicators."""
-    return {
-        "indicators": [
-            {"id": "FEDFUNDS", "name": "Federal Funds Effective Rate", "category": "Interest Rates"},
-            {"id": "DFF", "name": "Federal Funds Rate (Daily)", "category": "Interest Rates"},
-            {"id": "UNRATE", "name": "Unemployment Rate", "category": "Labor Market"},
-            {"id": "CPIAUCSL", "name": "Consumer Price Index for All Urban Consumers", "category": "Inflation"},
-            {"id": "GDPC1", "name": "Real Gross Domestic Product", "category": "National Accounts"},
-            {"id": "PAYEMS", "name": "All Employees, Total Nonfarm", "category": "Labor Market"},
-            {"id": "T10Y2Y", "name": "10-Year Treasury Constant Maturity Minus 2-Year Treasury", "category": "Interest Rates"},
-            {"id": "SP500", "name": "S&P 500", "category": "Financial Markets"},
-        ]
-    }
+    return {"indicators": AVAILABLE_INDICATORS}
+
+@router.get("/search")
+async def search_series(
+    q: str,
+    limit: int = 20,
+    search_service: SearchService = Depends(get_search_service)
+):
+    """
+    Search FRED series by their metadata (id, title, tags, units, frequency and notes).
+    
+    - q: Words to look for; the last word is matched as a prefix, so this works as autocomplete
+    - limit: Maximum number of results (1-100, default 20)
+    
+    Answered from a local index, so it's fast enough to call on every keystroke.
+    """
+    if not 1 <= limit <= 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+    
+    try:
+        return await search_service.search(q, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# declared before /indicator/{series_id} so "expr" isn't taken for a series ID
+@router.get("/indicator/expr")
+async def get_computed_indicator(
+    q: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    frequency: Optional[str] = None,
+    aggregation_method: Optional[str] = None,
+    expression_service: ExpressionService = Depends(get_expression_service)
+):
+    """
+    Get a series computed from other indicators.
+    
+    - q: Expression over FRED series IDs, e.g. "DGS10 - yoy(CPIAUCSL)". Supports
+      + - * / ^, parentheses, numbers and the functions yoy(x), lag(x, n),
+      diff(x, n) and rolling(x, n) (mean of the last n observations)
+    - start_date: Start date (YYYY-MM-DD)
+    - end_date: End date (YYYY-MM-DD)
+    - frequency: Fetch every series at this frequency so they line up (e.g., 'm' for monthly)
+    - aggregation_method: How to aggregate to a lower frequency: avg (default), sum or eop
+    
+    Series are matched on dates, so values only appear where every referenced series has one.
+    """
+    if not end_date:
+        end_date = datetime.now().strftime("%Y-%m-%d")
+    
+    if not start_date:
+        start = datetime.now() - relativedelta(years=5)
+        start_date = start.strftime("%Y-%m-%d")
+    
+    try:
+        return await expression_service.evaluate(q, start_date, end_date, frequency, aggregation_method)
+    except ValueError as e:
+        # malformed expressions are the client's fault
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/indicator/{series_id}")
 async def get_indicator(
     series_id: str,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    frequency: Optional[str] = None
+    frequency: Optional[str] = None,
+    aggregation_method: Optional[str] = None,
+    as_of: Optional[str] = None,
+    fred_service: FREDService = Depends(get_fred_service)
 ):
     """
     Get data for a specific economic indicator.
@@ -42,23 +117,59 @@ async def get_indicator(
     - start_date: Start date (YYYY-MM-DD)
     - end_date: End date (YYYY-MM-DD)
     - frequency: Data frequency (e.g., 'm' for monthly, 'd' for daily)
+    - aggregation_method: How to aggregate to a lower frequency: avg (default), sum or eop
+    - as_of: Return the data as it was published on this date (YYYY-MM-DD), from ALFRED's vintages
     """
-    # sets the default time period if it's not yet provided (for last 5 years)
+    # sets the default time period if it's not yet provided (for last 5 years,
+    # or the 5 years before as_of)
     if not end_date:
-        end_date = datetime.now().strftime("%Y-%m-%d")
+        end_date = as_of or datetime.now().strftime("%Y-%m-%d")
     
     if not start_date:
-        start = datetime.now() - relativedelta(years=5)
+        try:
+            start = datetime.strptime(end_date, "%Y-%m-%d") - relativedelta(years=5)
+        except ValueError:
+            start = datetime.now() - relativedelta(years=5)
         start_date = start.strftime("%Y-%m-%d")
     
     try:
-        data = await fred_service.get_series_data(series_id, start_date, end_date, frequency)
+        data = await fred_service.get_series_data(series_id, start_date, end_date, frequency, aggregation_method, as_of)
         return data
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/indicator/{series_id}/since")
+async def get_indicator_since(
+    series_id: str,
+    date: str,
+    version: Optional[str] = None,
+    start: Optional[str] = None,
+    fred_service: FREDService = Depends(get_fred_service)
+):
+    """
+    Get only what changed in an indicator since a client last synced it.
+    
+    - series_id: FRED series ID (e.g., UNRATE, CPIAUCSL)
+    - date: Date of the last observation the client holds (YYYY-MM-DD)
+    - version: Version token returned by the client's previous sync
+    - start: Date of the first observation the client holds (default: the start of the series)
+    
+    Returns observations after `date` in `data`, older observations revised since
+    `version` in `revised`, and a new `version` token for the next sync. When
+    `reset` is true the token couldn't be matched and `data` holds the series
+    from `start` on, which should replace the client's copy.
+    """
+    try:
+        return await fred_service.get_series_since(series_id, date, version, start)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/latest/{series_id}")
-async def get_latest_value(series_id: str):
+async def get_latest_value(series_id: str, fred_service: FREDService = Depends(get_fred_service)):
     """Get the latest value for a specific indicator."""
     try:
         latest = await fred_service.get_latest_value(series_id)
@@ -66,11 +177,13 @@ async def get_latest_value(series_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+DASHBOARD_INDICATORS = ["FEDFUNDS", "UNRATE", "CPIAUCSL", "GDPC1"]
+
 @router.get("/dashboard")
-async def get_dashboard_data():
+async def get_dashboard_data(fred_service: FREDService = Depends(get_fred_service)):
     """Get summary data for the main dashboard."""
     try:
-        indicators = ["FEDFUNDS", "UNRATE", "CPIAUCSL", "GDPC1"]
+        indicators = DASHBOARD_INDICATORS
         results = {}
         
         for indicator in indicators:
@@ -81,9 +194,167 @@ async def get_dashboard_data():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/analytics/correlation")
+async def get_correlation(
+    ids: str,
+    max_lag: int = 24,
+    target: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    frequency: str = "m",
+    aggregation_method: Optional[str] = None,
+    analytics_service: AnalyticsService = Depends(get_analytics_service)
+):
+    """
+    Correlations between indicators, including which ones lead or lag a target.
+    
+    - ids: Comma-separated FRED series IDs (e.g., UNRATE,ICSA,PERMIT,T10Y2Y)
+    - max_lag: Largest lead/lag to test, in periods of the frequency (default 24)
+    - target: Series the others are lagged against (default: the first ID)
+    - start_date: Start date (YYYY-MM-DD, default 20 years ago)
+    - end_date: End date (YYYY-MM-DD)
+    - frequency: Frequency the series are aligned on (default 'm' for monthly)
+    - aggregation_method: How to aggregate to a lower frequency: avg (default), sum or eop
+    
+    A positive lag in `cross_correlation` and `best_lag` means the series leads the target by that many periods.
+    """
+    if not end_date:
+        end_date = datetime.now().strftime("%Y-%m-%d")
+    
+    if not start_date:
+        start = datetime.now() - relativedelta(years=20)
+        start_date = start.strftime("%Y-%m-%d")
+    
+    series_ids = [series_id.strip() for series_id in ids.split(",") if series_id.strip()]
+    try:
+        return await analytics_service.get_correlation(
+            series_ids, start_date, end_date, max_lag, target, frequency, aggregation_method
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/tools/impact")
+async def get_personal_impact(
+    income: float,
+    expenses: float,
+    savings: float = 0,
+    mortgage: float = 0,
+    mortgage_term: int = 30,
+    mortgage_rate: Optional[float] = None,
+    variable_rate: bool = False,
+    years: int = 10,
+    simulations: int = DEFAULT_SIMULATIONS,
+    impact_service: ImpactService = Depends(get_impact_service)
+):
+    """
+    Simulated range of outcomes for the personal impact calculator.
+    
+    - income, expenses: Annual amounts (both assumed to grow with prices)
+    - savings: Savings balance (earning half the simulated fed funds rate)
+    - mortgage: Mortgage balance
+    - mortgage_term: Years left on the mortgage
+    - mortgage_rate: Mortgage rate in percent (default: today's 30-year average)
+    - variable_rate: Whether the mortgage rate resets every year with market rates
+    - years: Years to project (1-30, default 10)
+    - simulations: Number of simulated paths (100-20000, default 5000)
+    
+    Inflation and rate paths are resampled from their history since 1985. The
+    result has the 5th, 25th, 50th, 75th and 95th percentiles of each quantity
+    for every year; inputs are rounded to three significant figures.
+    """
+    try:
+        return await impact_service.get_impact(
+            income, expenses, savings, mortgage, mortgage_term, mortgage_rate, variable_rate, years, simulations
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stream/latest")
+async def stream_latest_values(
+    request: Request,
+    ids: Optional[str] = None,
+    latest_stream: LatestValueStream = Depends(get_latest_stream)
+):
+    """
+    Stream latest values as server-sent events ('latest' events).
+
+    - ids: Comma-separated FRED series IDs (defaults to the dashboard indicators)
+
+    The current value of each series is sent on connect, then a new event
+    whenever a new observation is published.
+    """
+    series_ids = [series_id.strip().upper() for series_id in ids.split(",") if series_id.strip()] if ids else DASHBOARD_INDICATORS
+    return StreamingResponse(
+        latest_stream.events(request, series_ids),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Endpoints for regional data
+# declared before /regional/{indicator} and /regional/{indicator}/{state_code}
+# so "geography" and "choropleth" aren't taken for an indicator or state code
+@router.get("/regional/geography")
+async def get_regional_geography(regional_service: RegionalService = Depends(get_regional_service)):
+    """
+    The state -> metro area -> county hierarchy of every region with data.
+    
+    Counties are only placed in their metro areas when a CBSA delineation file is configured.
+    """
+    try:
+        return await regional_service.get_geography()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/regional/{indicator}/choropleth")
+async def get_regional_choropleth(
+    indicator: str,
+    level: str = "county",
+    date: Optional[str] = None,
+    regional_service: RegionalService = Depends(get_regional_service)
+):
+    """
+    Every county, metro area or state's value for an indicator, in one response.
+    
+    - indicator: Indicator ID (UNRATE or PCPI)
+    - level: Geography level: county (default), msa or state
+    - date: Date (YYYY-MM-DD) to map; the latest date with data by default
+    
+    Served from locally stored data, with quantile breaks for five colour classes.
+    """
+    try:
+        return await regional_service.get_choropleth(indicator, level, date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/regional/{indicator}/regions/{code}")
+async def get_region_history(
+    indicator: str,
+    code: str,
+    level: str = "county",
+    regional_service: RegionalService = Depends(get_regional_service)
+):
+    """
+    The stored history of one region.
+    
+    - indicator: Indicator ID (UNRATE or PCPI)
+    - code: County FIPS code (e.g., 06037), metro area CBSA code (e.g., 31080) or state code (e.g., CA)
+    - level: Geography level of the code: county (default), msa or state
+    """
+    try:
+        return await regional_service.get_region_history(indicator, level, code)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/regional/{indicator}")
-async def get_regional_data(indicator: str):
+async def get_regional_data(indicator: str, regional_service: RegionalService = Depends(get_regional_service)):
     """
     Get regional economic data for all states for a specific indicator.
     
@@ -96,7 +367,11 @@ async def get_regional_data(indicator: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/regional/{indicator}/{state_code}")
-async def get_state_data(indicator: str, state_code: str):
+async def get_state_data(
+    indicator: str,
+    state_code: str,
+    regional_service: RegionalService = Depends(get_regional_service)
+):
     """
     Get detailed economic data for a specific state.
     
@@ -123,7 +398,7 @@ async def get_regional_indicators():
 
 # Treasury yield data from scraper service
 @router.get("/treasury-yields")
-async def get_treasury_yields():
+async def get_treasury_yields(scraper_service: ScraperService = Depends(get_scraper_service)):
     """Get current Treasury yield curve data."""
     try:
         data = await scraper_service.scrape_treasury_yields()
@@ -131,9 +406,86 @@ async def get_treasury_yields():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def default_date_range(start_date, end_date, years=5):
+    """Fill in a missing date range with the last few years up to today."""
+    if not end_date:
+        end_date = datetime.now().strftime("%Y-%m-%d")
+    if not start_date:
+        start_date = (datetime.now() - relativedelta(years=years)).strftime("%Y-%m-%d")
+    return start_date, end_date
+
+@router.get("/yield-curve/history")
+async def get_yield_curve_history(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    tenors: Optional[str] = None,
+    yield_curve_service: YieldCurveService = Depends(get_yield_curve_service)
+):
+    """
+    Get daily Treasury yield curves.
+    
+    - start_date: Start date (YYYY-MM-DD, default 5 years ago)
+    - end_date: End date (YYYY-MM-DD)
+    - tenors: Comma-separated maturities in years to interpolate each curve to
+      (natural cubic spline, e.g. 0.25,1,2,5,10,30); default: the published maturities
+    """
+    start_date, end_date = default_date_range(start_date, end_date)
+    try:
+        tenor_list = [float(tenor) for tenor in tenors.split(",")] if tenors else None
+        return await yield_curve_service.get_curves(start_date, end_date, tenor_list)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/yield-curve/spreads")
+async def get_yield_curve_spreads(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    yield_curve_service: YieldCurveService = Depends(get_yield_curve_service)
+):
+    """Get the 2s10s and 3m10y Treasury spreads (percentage points)."""
+    start_date, end_date = default_date_range(start_date, end_date)
+    try:
+        return await yield_curve_service.get_spreads(start_date, end_date)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/yield-curve/inversions")
+async def get_yield_curve_inversions(
+    spread: str = "2s10s",
+    min_days: int = 1,
+    yield_curve_service: YieldCurveService = Depends(get_yield_curve_service)
+):
+    """
+    Get every yield curve inversion since 1990.
+    
+    - spread: Spread that defines an inversion: 2s10s (default) or 3m10y
+    - min_days: Ignore inversions shorter than this many trading days
+    """
+    try:
+        return await yield_curve_service.get_inversions(spread, min_days)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/yield-curve/factors")
+async def get_yield_curve_factors(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    yield_curve_service: YieldCurveService = Depends(get_yield_curve_service)
+):
+    """Get the level, slope and curvature of the Treasury curve over time."""
+    start_date, end_date = default_date_range(start_date, end_date)
+    try:
+        return await yield_curve_service.get_factors(start_date, end_date)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 # FOMC statements from scraper service
 @router.get("/fomc-statements")
-async def get_fomc_statements():
+async def get_fomc_statements(scraper_service: ScraperService = Depends(get_scraper_service)):
     """Get recent FOMC statements."""
     try:
         data = await scraper_service.scrape_fomc_statements()
@@ -142,6 +494,24 @@ async def get_fomc_statements():
         raise HTTPException(status_code=500, detail=str(e))
     
 
+@router.get("/diagnostics/event-loop")
+async def get_event_loop_stats(loop_monitor: LoopLagMonitor = Depends(get_loop_monitor)):
+    """How often (and for how long) something blocked the event loop, with the stack of the last stall."""
+    return loop_monitor.stats()
+
+@router.get("/diagnostics/deadlines")
+async def get_deadline_stats(fred_service: FREDService = Depends(get_fred_service)):
+    """Requests cut off at their deadline or abandoned by the client, and how often latest-value calls were hedged."""
+    return {
+        "requests": deadlines.stats,
+        "hedging": fred_service.hedger.stats if fred_service.hedger else None
+    }
+
+@router.get("/diagnostics/fred-keys")
+async def get_fred_key_stats():
+    """Requests and rate-limit errors per FRED API key, and which keys are out of rotation."""
+    return {"keys": fred_keys.stats()}
+
 @router.get("/forecasts/{indicator}")
 async def get_economic_forecasts(indicator: str):
     """
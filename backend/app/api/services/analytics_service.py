@@ -0,0 +1,104 @@
+import asyncio
+import math
+from app.config import CACHE_TTL_SERIES
+from app.api.services.cache import MemoryCache
+from app.profiling import phase
+from app.executor import run_cpu
+
+# upper bound on series per correlation request (the matrix grows with the square)
+MAX_CORRELATION_SERIES = 100
+MAX_CORRELATION_LAG = 520  # two years of business days
+
+class AnalyticsService:
+    """
+    Statistics across several series, computed server-side from the range cache.
+
+    Results are cached under the data versions of their inputs, so they're
+    recomputed only once one of the inputs actually changes.
+    """
+
+    def __init__(self, fred_service, cache=None):
+        self.fred_service = fred_service
+        self.cache = cache or MemoryCache()
+
+    async def get_correlation(self, series_ids, start_date, end_date, max_lag=24, target=None,
+                              frequency="m", aggregation_method=None):
+        """
+        Correlation matrix of several series plus their lead/lag correlations with a target.
+
+        Args:
+            series_ids (list): FRED series IDs
+            start_date (str): Start date in YYYY-MM-DD format
+            end_date (str): End date in YYYY-MM-DD format
+            max_lag (int): Largest lead/lag to test, in periods of frequency
+            target (str, optional): Series the others are lagged against (default: the first)
+            frequency (str, optional): Common frequency the series are aligned on (default: monthly)
+            aggregation_method (str, optional): avg, sum or eop when aggregating to a lower frequency
+
+        Returns:
+            dict: Correlation matrix, cross-correlations by lag and each series' strongest lag
+        """
+        # the maths needs NumPy, so it's only imported once analytics are requested
+        from app.api.services import correlation
+
+        if not self.fred_service.api_key:
+            raise Exception("FRED API key not configured")
+
+        series_ids = list(dict.fromkeys(series_ids))  # drop duplicates, keep order
+        target = target or (series_ids[0] if series_ids else None)
+        if target and target not in series_ids:
+            series_ids.insert(0, target)
+        if len(series_ids) < 2:
+            raise ValueError("At least two series are needed for correlations")
+        if len(series_ids) > MAX_CORRELATION_SERIES:
+            raise ValueError(f"At most {MAX_CORRELATION_SERIES} series can be correlated at once")
+        if not 0 <= max_lag <= MAX_CORRELATION_LAG:
+            raise ValueError(f"max_lag must be between 0 and {MAX_CORRELATION_LAG}")
+
+        inputs = await asyncio.gather(
+            *[
+                self.fred_service.get_series(series_id, start_date, end_date, frequency, aggregation_method)
+                for series_id in series_ids
+            ]
+        )
+
+        versions = ",".join(series.version_token for series in inputs)
+        key = (
+            f"analytics:correlation:{','.join(series_ids)}:{target}:{max_lag}:{start_date}:{end_date}:"
+            f"{frequency or ''}:{aggregation_method or ''}:{versions}"
+        )
+
+        async def compute():
+            with phase("analytics"):
+                dates, matrix_result, lagged, strongest = await run_cpu(
+                    correlation.analyze, inputs, series_ids.index(target), max_lag
+                )
+
+            lags = list(range(-(lagged.shape[1] // 2), lagged.shape[1] // 2 + 1))
+            best_lags = {
+                series_id: {"lag": lags[best], "correlation": _rounded(row[best])}
+                for series_id, row, best in zip(series_ids, lagged, strongest)
+                if series_id != target and best >= 0
+            }
+
+            return {
+                "series_ids": series_ids,
+                "target": target,
+                "frequency": frequency,
+                "start_date": str(dates[0]) if len(dates) else None,
+                "end_date": str(dates[-1]) if len(dates) else None,
+                "observations": {series_id: len(series) for series_id, series in zip(series_ids, inputs)},
+                "correlation": [[_rounded(value) for value in row] for row in matrix_result],
+                "lags": lags,
+                "cross_correlation": {
+                    series_id: [_rounded(value) for value in row] for series_id, row in zip(series_ids, lagged)
+                },
+                "best_lag": best_lags,
+            }
+
+        return await self.cache.get_or_set(key, compute, CACHE_TTL_SERIES)
+
+
+def _rounded(value):
+    # JSON has no NaN, so correlations that couldn't be computed come out as null
+    return None if math.isnan(value) else round(float(value), 4)
@@ -0,0 +1,403 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+from app.config import CACHE_BACKEND, CACHE_PATH, CACHE_URL, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES
+
+# binary-encoded Series start with this; anything else is JSON
+_SERIES_MAGIC = b"FSR1"
+
+
+def encode_value(value):
+    """Serialize a cached value for backends that store bytes."""
+    if getattr(value, "cache_codec", None) == "series":
+        return value.to_bytes()
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def decode_value(data):
+    if bytes(data[:4]) == _SERIES_MAGIC:
+        # imported here so NumPy is only loaded once series are actually cached
+        from app.api.services.series import Series
+        return Series.from_bytes(data)
+    return json.loads(data)
+
+
+def value_size(value):
+    """Approximate memory taken by a cached value, in bytes."""
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return nbytes + 200  # arrays plus object overhead
+    return len(encode_value(value))
+
+
+class Cache:
+    """
+    Base class for cache backends.
+
+    Backends implement get/set/delete; values are JSON-compatible objects.
+    get_or_set adds single-flight loading, so concurrent misses for the same
+    key in one worker trigger only one upstream call.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+
+    async def get(self, key):
+        raise NotImplementedError
+
+    async def set(self, key, value, ttl):
+        raise NotImplementedError
+
+    async def delete(self, key):
+        raise NotImplementedError
+
+    async def add(self, key, value, ttl):
+        """Set key only if it isn't already set (atomically); returns whether it was set."""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+    async def get_or_set(self, key, loader, ttl, should_cache=None, refresh=False):
+        """
+        Return the cached value for key, or await loader() and cache its result.
+
+        Args:
+            key (str): Cache key
+            loader (callable): Coroutine function producing the value on a miss
+            ttl (float): Time to live in seconds
+            should_cache (callable, optional): Predicate deciding whether a loaded value is cached
+            refresh (bool): Skip the cached value and always load (the result is still cached)
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        if not refresh:
+            value = await self.try_get(key)
+            if value is not None:
+                return value
+
+        # if another request is already loading this key, wait for its result
+        load = self._inflight.get(key)
+        if load is None:
+            # the load runs as its own task (with the deadline of the request that started it),
+            # so one caller giving up doesn't fail the others waiting for the same key
+            load = {"task": None, "waiters": 0}
+            load["task"] = asyncio.create_task(self._load(key, load, loader, ttl, should_cache))
+            self._inflight[key] = load
+
+        load["waiters"] += 1
+        try:
+            return await asyncio.shield(load["task"])
+        finally:
+            load["waiters"] -= 1
+            if not load["waiters"] and not load["task"].done():
+                # everyone waiting gave up (deadline passed or client disconnected): stop the upstream work
+                load["task"].cancel()
+                if self._inflight.get(key) is load:
+                    del self._inflight[key]
+
+    async def _load(self, key, load, loader, ttl, should_cache):
+        try:
+            value = await loader()
+            if value is not None and (should_cache is None or should_cache(value)):
+                await self.try_set(key, value, ttl)
+            return value
+        finally:
+            if self._inflight.get(key) is load:
+                del self._inflight[key]
+
+    async def try_get(self, key):
+        """Like get, but a failing backend counts as a miss instead of raising."""
+        # a broken cache shouldn't take the API down with it
+        try:
+            return await self.get(key)
+        except Exception as e:
+            print(f"Cache get failed for {key}: {str(e)}")
+            return None
+
+    async def try_set(self, key, value, ttl):
+        """Like set, but failures are logged instead of raised."""
+        try:
+            await self.set(key, value, ttl)
+        except Exception as e:
+            print(f"Cache set failed for {key}: {str(e)}")
+
+    async def try_delete(self, key):
+        """Like delete, but failures are logged instead of raised."""
+        try:
+            await self.delete(key)
+        except Exception as e:
+            print(f"Cache delete failed for {key}: {str(e)}")
+
+
+class MemoryCache(Cache):
+    """
+    In-process LRU cache. Fastest, but every worker keeps its own copy.
+
+    Least recently used entries are evicted once either the entry count or
+    the total size of the cached values goes over its limit.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # key -> (expires, size, value)
+
+    async def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires, _, value = entry
+        if expires < time.time():
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key, value, ttl):
+        self._remove(key)
+        size = value_size(value)
+        self._entries[key] = (time.time() + ttl, size, value)
+        self.total_bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+
+    async def delete(self, key):
+        self._remove(key)
+
+    async def add(self, key, value, ttl):
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+
+class SQLiteCache(Cache):
+    """
+    Cache stored in a local SQLite file, shared by all workers on the host.
+
+    Point CACHE_PATH at /dev/shm to keep the file in shared memory.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        # WAL lets readers in other workers proceed while one worker writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+
+    def _get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+        return decode_value(row[0])
+
+    def _set(self, key, value, ttl):
+        now = time.time()
+        data = encode_value(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                (key, data, now + ttl, now),
+            )
+            self._writes += 1
+            # prune expired rows and trim to size every so often rather than on every write
+            if self._writes % 100 == 0:
+                self._conn.execute("DELETE FROM cache WHERE expires < ?", (now,))
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN ("
+                    "SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                # keep the most recently used values that fit in the byte budget
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM ("
+                    "SELECT key, SUM(length(value)) OVER (ORDER BY accessed DESC) AS running_total FROM cache"
+                    ") WHERE running_total > ?)",
+                    (self.max_bytes,),
+                )
+
+    def _delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def _add(self, key, value, ttl):
+        now = time.time()
+        with self._lock:
+            # inserts, or replaces an expired row; a live row is left alone
+            cursor = self._conn.execute(
+                "INSERT INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires = excluded.expires, "
+                "accessed = excluded.accessed WHERE cache.expires < ?",
+                (key, encode_value(value), now + ttl, now, now),
+            )
+            return cursor.rowcount > 0
+
+    async def get(self, key):
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key, value, ttl):
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+    async def delete(self, key):
+        await asyncio.to_thread(self._delete, key)
+
+    async def add(self, key, value, ttl):
+        return await asyncio.to_thread(self._add, key, value, ttl)
+
+    async def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisError(Exception):
+    """An error reply from the Redis server (the reply itself was read in full)."""
+
+
+class RedisCache(Cache):
+    """
+    Cache backed by any server speaking the Redis protocol (Redis, Valkey, KeyDB...).
+
+    Talks RESP directly over a single connection, so it needs no client library.
+    """
+
+    def __init__(self, url=CACHE_URL):
+        super().__init__()
+        parsed = urlparse(url or "redis://localhost:6379/0")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await self._command("AUTH", self.password)
+        if self.db:
+            await self._command("SELECT", self.db)
+
+    async def _command(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+        self._writer.write(b"".join(parts))
+        await self._writer.drain()
+        return await self._read_reply()
+
+    async def _read_reply(self):
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RedisError(f"Redis error: {payload.decode()}")
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(payload)
+            if count == -1:
+                return None
+            return [await self._read_reply() for _ in range(count)]
+        raise Exception(f"Unexpected Redis reply: {line!r}")
+
+    async def _execute(self, *args):
+        async with self._lock:
+            # reconnect once if the connection was dropped
+            for attempt in range(2):
+                try:
+                    if self._writer is None:
+                        await self._connect()
+                    return await self._command(*args)
+                except (ConnectionError, OSError, asyncio.IncompleteReadError):
+                    self._disconnect()
+                    if attempt:
+                        raise
+                except RedisError:
+                    raise
+                except BaseException:
+                    # cancelled (or failed) halfway through a command: its reply may still be
+                    # on the socket, where the next command would read it as its own
+                    self._disconnect()
+                    raise
+
+    def _disconnect(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def get(self, key):
+        data = await self._execute("GET", key)
+        return decode_value(data) if data is not None else None
+
+    async def set(self, key, value, ttl):
+        await self._execute("SET", key, encode_value(value), "PX", int(ttl * 1000))
+
+    async def delete(self, key):
+        await self._execute("DEL", key)
+
+    async def add(self, key, value, ttl):
+        return await self._execute("SET", key, encode_value(value), "PX", int(ttl * 1000), "NX") == "OK"
+
+    async def close(self):
+        self._disconnect()
+
+
+def create_cache(backend=CACHE_BACKEND):
+    """Create the cache backend selected by CACHE_BACKEND (memory, sqlite or redis)."""
+    if backend == "memory":
+        return MemoryCache()
+    if backend == "sqlite":
+        return SQLiteCache()
+    if backend == "redis":
+        return RedisCache()
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -0,0 +1,167 @@
+import numpy as np
+
+# cross-correlations switch from lag-by-lag sums to FFTs once the number of lags is more
+# than this many times log2 of the FFT size (where the FFTs became faster in benchmarks/correlation.py)
+FFT_LAGS_PER_LOG_SIZE = 8
+
+# correlations over fewer overlapping observations than this are reported as missing
+MIN_OVERLAP = 3
+
+
+def align(series_list):
+    """
+    Put several series on one date axis.
+
+    Args:
+        series_list (list): Series to align
+
+    Returns:
+        tuple: (dates, matrix) where matrix has one column per series and NaN
+            on dates a series has no observation for
+    """
+    dates = np.unique(np.concatenate([series.dates for series in series_list]))
+    matrix = np.full((len(dates), len(series_list)), np.nan)
+    for column, series in enumerate(series_list):
+        matrix[np.searchsorted(dates, series.dates), column] = series.values
+    return dates, matrix
+
+
+def analyze(series_list, target, max_lag):
+    """
+    Everything /analytics/correlation computes, in one call that can run in the CPU executor.
+
+    Returns:
+        tuple: (dates, correlation matrix, lagged correlations with the target column,
+            index of each column's strongest lag)
+    """
+    dates, matrix = align(series_list)
+    lagged = lagged_correlations(matrix, target, max_lag)
+    return dates, correlation_matrix(matrix), lagged, strongest_lags(lagged)
+
+
+def correlation_matrix(matrix):
+    """
+    Pearson correlation of every pair of columns, over the rows both have values for.
+
+    Each pair uses all of its overlapping observations (not only the rows where
+    every column has a value), yet the whole matrix comes out of a handful of
+    matrix products instead of a loop over pairs.
+    """
+    mask, values = _centre(matrix)
+    count = mask.T @ mask
+    sums = values.T @ mask           # [i, j]: sum of column i where j is present
+    squares = (values ** 2).T @ mask
+    products = values.T @ values
+    return _pearson(count, sums, sums.T, squares, squares.T, products)
+
+
+def lagged_correlations(matrix, target, max_lag):
+    """
+    Correlation of every column with the target column at each lag.
+
+    Lag k pairs the target at t with the other column at t - k, so a positive
+    lag with a strong correlation means the column leads the target by k periods.
+
+    Args:
+        matrix (ndarray): Aligned observations, one column per series
+        target (int): Index of the target column
+        max_lag (int): Largest lag (in periods) in either direction
+
+    Returns:
+        ndarray: (number of columns, 2 * max_lag + 1) correlations for lags -max_lag..max_lag
+    """
+    mask, values = _centre(matrix)
+    max_lag = max(min(max_lag, len(matrix) - 1), 0)
+
+    # lag by lag costs rows * lags, the FFTs roughly rows * log(rows) whatever the lags
+    use_fft = max_lag > FFT_LAGS_PER_LOG_SIZE * _fft_size(len(matrix)).bit_length()
+    sums = _lagged_sums_fft if use_fft else _lagged_sums_direct
+    count, target_sums, other_sums, target_squares, other_squares, products = sums(
+        mask[:, [target]], values[:, [target]], mask, values, max_lag
+    )
+    return _pearson(count, target_sums, other_sums, target_squares, other_squares, products).T
+
+
+def strongest_lags(lagged):
+    """Index of the largest absolute correlation in each row of lagged_correlations (-1 if all missing)."""
+    strength = np.where(np.isnan(lagged), -1.0, np.abs(lagged))
+    best = strength.argmax(axis=1)
+    best[strength.max(axis=1) < 0] = -1
+    return best
+
+
+def _centre(matrix):
+    """
+    Presence mask and mean-centred values (0 where missing) of each column.
+
+    Centring keeps the sums small, so the subtractions in _pearson don't lose precision.
+    """
+    present = ~np.isnan(matrix)
+    mask = present.astype(np.float64)
+    values = np.where(present, matrix, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = values.sum(axis=0) / mask.sum(axis=0)
+    return mask, np.where(present, values - means, 0.0)
+
+
+def _fft_size(rows):
+    # zero padded to at least 2 * rows - 1 so the correlation doesn't wrap around
+    return 1 << (2 * rows - 1).bit_length()
+
+
+def _lagged_sums_direct(mask_a, values_a, mask_b, values_b, max_lag):
+    """The six sums Pearson needs for each lag, shifting the columns one lag at a time."""
+    rows = len(mask_a)
+    lags = range(-max_lag, max_lag + 1)
+    sums = np.zeros((6, 2 * max_lag + 1, mask_b.shape[1]))
+    for index, lag in enumerate(lags):
+        # a[t] against b[t - lag]
+        a = slice(max(lag, 0), rows + min(lag, 0))
+        b = slice(max(-lag, 0), rows - max(lag, 0))
+        ma, va, mb, vb = mask_a[a], values_a[a], mask_b[b], values_b[b]
+        sums[0, index] = ma.T @ mb
+        sums[1, index] = va.T @ mb
+        sums[2, index] = ma.T @ vb
+        sums[3, index] = (va ** 2).T @ mb
+        sums[4, index] = ma.T @ (vb ** 2)
+        sums[5, index] = va.T @ vb
+    return sums
+
+
+def _lagged_sums_fft(mask_a, values_a, mask_b, values_b, max_lag):
+    """The same sums as _lagged_sums_direct, for every lag at once through FFT cross-correlation."""
+    size = _fft_size(len(mask_a))
+
+    def transform(array):
+        return np.fft.rfft(array, n=size, axis=0)
+
+    mask_a_f, values_a_f, squares_a_f = transform(mask_a), transform(values_a), transform(values_a ** 2)
+    mask_b_f, values_b_f, squares_b_f = transform(mask_b), transform(values_b), transform(values_b ** 2)
+
+    def correlate(a_f, b_f):
+        # sum over t of a[t] * b[t - lag], for lag = 0..size-1 (negative lags wrap to the end)
+        full = np.fft.irfft(a_f * np.conj(b_f), n=size, axis=0)
+        return np.concatenate([full[size - max_lag:], full[:max_lag + 1]])
+
+    count = np.rint(correlate(mask_a_f, mask_b_f))
+    return np.stack([
+        count,
+        correlate(values_a_f, mask_b_f),
+        correlate(mask_a_f, values_b_f),
+        correlate(squares_a_f, mask_b_f),
+        correlate(mask_a_f, squares_b_f),
+        correlate(values_a_f, values_b_f),
+    ])
+
+
+def _pearson(count, sums_a, sums_b, squares_a, squares_b, products):
+    """Pearson correlation from overlap counts and sums; NaN where there's too little overlap."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = count * products - sums_a * sums_b
+        variance_a = count * squares_a - sums_a ** 2
+        variance_b = count * squares_b - sums_b ** 2
+        correlation = covariance / np.sqrt(variance_a * variance_b)
+        # constant over the overlap (up to FFT rounding error) means there's nothing to correlate
+        flat = (variance_a <= 1e-10 * count * squares_a) | (variance_b <= 1e-10 * count * squares_b)
+    correlation[(count < MIN_OVERLAP) | flat] = np.nan
+    return np.clip(correlation, -1.0, 1.0)
@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime, timedelta
+from app.config import CACHE_TTL_SERIES
+from app.api.services.cache import MemoryCache
+from app.api.services.fred_service import EARLIEST_OBSERVATION_DATE
+from app.profiling import phase
+
+class ExpressionService:
+    """
+    Computed series: arithmetic over FRED series, e.g. "DGS10 - yoy(CPIAUCSL)".
+
+    The referenced series are fetched concurrently through FREDService (so
+    they come out of the range cache), aligned on their common dates and
+    evaluated with NumPy. Results are cached under the data versions of their
+    inputs, so they're reused until one of the inputs actually changes.
+    """
+
+    def __init__(self, fred_service, cache=None):
+        self.fred_service = fred_service
+        self.cache = cache or MemoryCache()
+
+    async def evaluate(self, expression, start_date, end_date, frequency=None, aggregation_method=None):
+        """
+        Evaluate an expression over a date range.
+
+        Args:
+            expression (str): Expression over series IDs, numbers and yoy/lag/diff/rolling
+            start_date (str): Start date in YYYY-MM-DD format
+            end_date (str): End date in YYYY-MM-DD format
+            frequency (str, optional): Fetch every input at this frequency, which
+                lines up series of different native frequencies (e.g. 'm')
+            aggregation_method (str, optional): avg, sum or eop when aggregating to a lower frequency
+
+        Returns:
+            dict: The expression, the series it references and the computed data
+        """
+        # the evaluator needs NumPy, so it's only imported once an expression is requested
+        from app.api.services.expressions import compile_expression
+        from app.api.services.series import FREQUENCY_RANK, frequency_group
+
+        if not self.fred_service.api_key:
+            raise Exception("FRED API key not configured")
+
+        # whitespace doesn't change the meaning, so "A-B" and "A - B" share one compiled form
+        text = "".join(expression.split())
+        compiled = compile_expression(text)
+
+        # functions like yoy() need history from before the requested window, and
+        # lag(x, n) n periods of it: with an annual series that's n years
+        native = await asyncio.gather(
+            *[self.fred_service.get_native_frequency(series_id) for series_id in compiled.series_ids]
+        )
+        # observations come at the requested frequency, or at the series' own when that's lower
+        frequencies = {
+            series_id: max(own, frequency, key=lambda code: FREQUENCY_RANK.get(frequency_group(code), -1))
+            for series_id, own in zip(compiled.series_ids, native)
+        }
+        fetch_start = max(
+            datetime.strptime(start_date, "%Y-%m-%d") - timedelta(days=compiled.lookback_days(frequencies)),
+            datetime.strptime(EARLIEST_OBSERVATION_DATE, "%Y-%m-%d")
+        ).strftime("%Y-%m-%d")
+        inputs = await asyncio.gather(
+            *[
+                self.fred_service.get_series(series_id, fetch_start, end_date, frequency, aggregation_method)
+                for series_id in compiled.series_ids
+            ]
+        )
+
+        versions = ",".join(series.version_token for series in inputs)
+        key = f"expr:{text}:{start_date}:{end_date}:{frequency or ''}:{aggregation_method or ''}:{versions}"
+
+        async def compute():
+            with phase("evaluate"):
+                return compiled.evaluate(dict(zip(compiled.series_ids, inputs))).slice(start_date, end_date)
+
+        result = await self.cache.get_or_set(key, compute, CACHE_TTL_SERIES)
+        return {
+            "expression": text,
+            "series_ids": compiled.series_ids,
+            "data": result.to_records()
+        }
@@ -0,0 +1,277 @@
+import re
+from functools import lru_cache
+import numpy as np
+from app.api.services.series import Series, frequency_group
+
+# series IDs are upper case (DGS10, T10Y2Y), function names lower case (yoy, lag)
+_TOKEN = re.compile(r"\s*(?:(\d+\.?\d*(?:[eE][-+]?\d+)?)|([A-Z][A-Z0-9_]*)|([a-z_]+)|(.))")
+
+# name -> (number of integer arguments after the series, observations of history each unit needs)
+FUNCTIONS = {
+    "yoy": (0, 0),      # percent change from a year earlier
+    "lag": (1, 1),      # value n observations earlier
+    "diff": (1, 1),     # change from n observations earlier
+    "rolling": (1, 1),  # mean of the last n observations
+}
+
+# most calendar days between two observations at each frequency (a daily gap can
+# span a long weekend); series of unknown frequency are assumed to be annual
+PERIOD_DAYS = {"d": 4, "w": 7, "bw": 14, "m": 31, "q": 92, "sa": 184, "a": 366}
+
+
+class ExpressionError(ValueError):
+    """Raised for expressions that can't be parsed or evaluated."""
+
+
+class Expression:
+    """
+    A parsed arithmetic expression over FRED series.
+
+    Supports + - * / ^, parentheses, numbers, series IDs and the functions
+    yoy(x), lag(x, n), diff(x, n) and rolling(x, n), e.g.
+    "DGS10 - yoy(CPIAUCSL)" or "rolling(PAYEMS / CNP16OV, 3)".
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self._tokens = _tokenize(text)
+        self._position = 0
+        self.tree = self._parse_sum()
+        if self._peek() is not None:
+            raise ExpressionError(f"Unexpected '{self._peek()[1]}' in expression")
+        del self._tokens
+
+        self.series_ids = sorted(_collect_series(self.tree))
+        if not self.series_ids:
+            raise ExpressionError("Expression doesn't reference any series")
+
+    def lookback_days(self, frequencies=None):
+        """
+        How much history (in days) before the requested start the expression needs.
+
+        Args:
+            frequencies (dict, optional): series_id -> frequency its observations come at,
+                since lag(x, n) needs n periods of x whatever their length
+
+        Returns:
+            int: Days of history
+        """
+        period_days = {
+            series_id: PERIOD_DAYS.get(frequency_group(frequency), PERIOD_DAYS["a"])
+            for series_id, frequency in (frequencies or {}).items()
+        }
+        return _lookback(self.tree, period_days)
+
+    def evaluate(self, inputs):
+        """
+        Evaluate against input series.
+
+        Args:
+            inputs (dict): series_id -> Series
+
+        Returns:
+            Series: The result on the dates where every operand has a value
+        """
+        result = _evaluate(self.tree, inputs)
+        if not isinstance(result, Series):
+            raise ExpressionError("Expression doesn't reference any series")
+        finite = np.isfinite(result.values)
+        return Series(result.dates[finite], result.values[finite])
+
+    # recursive descent parser: sum -> product -> unary -> power -> atom
+
+    def _peek(self):
+        return self._tokens[self._position] if self._position < len(self._tokens) else None
+
+    def _take(self, expected=None):
+        token = self._peek()
+        if token is None or (expected is not None and token[1] != expected):
+            raise ExpressionError(f"Expected '{expected}'" if expected else "Unexpected end of expression")
+        self._position += 1
+        return token
+
+    def _parse_sum(self):
+        node = self._parse_product()
+        while self._peek() is not None and self._peek()[1] in ("+", "-"):
+            operator = self._take()[1]
+            node = ("binop", operator, node, self._parse_product())
+        return node
+
+    def _parse_product(self):
+        node = self._parse_unary()
+        while self._peek() is not None and self._peek()[1] in ("*", "/"):
+            operator = self._take()[1]
+            node = ("binop", operator, node, self._parse_unary())
+        return node
+
+    def _parse_unary(self):
+        if self._peek() is not None and self._peek()[1] in ("-", "+"):
+            operator = self._take()[1]
+            operand = self._parse_unary()
+            return ("neg", operand) if operator == "-" else operand
+        return self._parse_power()
+
+    def _parse_power(self):
+        node = self._parse_atom()
+        if self._peek() is not None and self._peek()[1] == "^":
+            self._take()
+            # binds tighter than unary minus on its left (-2^2 = -4) and is right associative
+            node = ("binop", "^", node, self._parse_unary())
+        return node
+
+    def _parse_atom(self):
+        kind, value = self._take()
+        if kind == "number":
+            return ("number", float(value))
+        if kind == "series":
+            return ("series", value)
+        if kind == "function":
+            if value not in FUNCTIONS:
+                raise ExpressionError(f"Unknown function: {value}")
+            self._take("(")
+            args = [self._parse_sum()]
+            while self._peek() is not None and self._peek()[1] == ",":
+                self._take()
+                args.append(self._parse_sum())
+            self._take(")")
+            return self._function_node(value, args)
+        if value == "(":
+            node = self._parse_sum()
+            self._take(")")
+            return node
+        raise ExpressionError(f"Unexpected '{value}' in expression")
+
+    def _function_node(self, name, args):
+        int_args = FUNCTIONS[name][0]
+        if len(args) != 1 + int_args:
+            raise ExpressionError(f"{name}() takes {1 + int_args} argument(s)")
+        periods = []
+        for arg in args[1:]:
+            if arg[0] != "number" or arg[1] != int(arg[1]) or arg[1] < 1:
+                raise ExpressionError(f"{name}() needs a positive whole number of periods")
+            periods.append(int(arg[1]))
+        return ("call", name, args[0], *periods)
+
+
+@lru_cache(maxsize=256)
+def compile_expression(text):
+    """Parse an expression, reusing the compiled form for repeated queries."""
+    return Expression(text)
+
+
+def _tokenize(text):
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        number, series_id, function, other = match.groups()
+        position = match.end()
+        if number is not None:
+            tokens.append(("number", number))
+        elif series_id is not None:
+            tokens.append(("series", series_id))
+        elif function is not None:
+            tokens.append(("function", function))
+        elif other is not None and other in "+-*/^(),":
+            tokens.append(("operator", other))
+        elif other is not None and not other.isspace():
+            raise ExpressionError(f"Unexpected character '{other}' in expression")
+    if not tokens:
+        raise ExpressionError("Empty expression")
+    return tokens
+
+
+def _collect_series(node):
+    if node[0] == "series":
+        return {node[1]}
+    if node[0] == "number":
+        return set()
+    if node[0] == "binop":
+        return _collect_series(node[2]) | _collect_series(node[3])
+    return _collect_series(node[2] if node[0] == "call" else node[1])
+
+
+def _lookback(node, period_days):
+    if node[0] in ("series", "number"):
+        return 0
+    if node[0] == "binop":
+        return max(_lookback(node[2], period_days), _lookback(node[3], period_days))
+    if node[0] == "neg":
+        return _lookback(node[1], period_days)
+
+    name, operand = node[1], node[2]
+    if name == "yoy":
+        needed = 370
+    else:
+        # the operand's observations are on the dates all of its series have, so as far apart as the sparsest
+        period = max(period_days.get(series_id, PERIOD_DAYS["a"]) for series_id in _collect_series(operand))
+        needed = FUNCTIONS[name][1] * node[3] * period
+    return needed + _lookback(operand, period_days)
+
+
+def _evaluate(node, inputs):
+    kind = node[0]
+    if kind == "number":
+        return node[1]
+    if kind == "series":
+        return inputs[node[1]]
+    if kind == "neg":
+        operand = _evaluate(node[1], inputs)
+        return -operand if not isinstance(operand, Series) else Series(operand.dates, -operand.values)
+    if kind == "binop":
+        return _binary(node[1], _evaluate(node[2], inputs), _evaluate(node[3], inputs))
+
+    operand = _evaluate(node[2], inputs)
+    if not isinstance(operand, Series):
+        raise ExpressionError(f"{node[1]}() needs a series argument")
+    return _call(node[1], operand, *node[3:])
+
+
+_OPERATORS = {
+    "+": np.add,
+    "-": np.subtract,
+    "*": np.multiply,
+    "/": np.divide,
+    "^": np.power,
+}
+
+
+def _binary(operator, left, right):
+    function = _OPERATORS[operator]
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        if isinstance(left, Series) and isinstance(right, Series):
+            # align on the dates both series have
+            dates, left_index, right_index = np.intersect1d(
+                left.dates, right.dates, assume_unique=True, return_indices=True
+            )
+            return Series(dates, function(left.values[left_index], right.values[right_index]))
+        if isinstance(left, Series):
+            return Series(left.dates, function(left.values, right))
+        if isinstance(right, Series):
+            return Series(right.dates, function(left, right.values))
+        return float(function(left, right))
+
+
+def _call(name, series, periods=None):
+    dates, values = series.dates, series.values
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if name == "yoy":
+            # the same day a year earlier, or the last observation before it
+            months = dates.astype("datetime64[M]")
+            year_ago = (months - 12).astype("datetime64[D]") + (dates - months.astype("datetime64[D]"))
+            previous = np.searchsorted(dates, year_ago, side="right") - 1
+            valid = previous >= 0
+            result = (values[valid] / values[previous[valid]] - 1) * 100
+            return Series(dates[valid], result)
+
+        if periods >= len(values):
+            return Series.empty()
+        if name == "lag":
+            return Series(dates[periods:], values[:-periods])
+        if name == "diff":
+            return Series(dates[periods:], values[periods:] - values[:-periods])
+        if name == "rolling":
+            totals = np.cumsum(np.concatenate([[0.0], values]))
+            return Series(dates[periods - 1:], (totals[periods:] - totals[:-periods]) / periods)
+    raise ExpressionError(f"Unknown function: {name}")
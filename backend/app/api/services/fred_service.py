@@ -1,19 +1,51 @@
+import asyncio
 import httpx
 import json
-from datetime import datetime
-import pandas as pd
-from fredapi import Fred
-from app.config import FRED_API_KEY
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from app.config import (
+    FRED_API_KEY, FRED_BASE_URL, CACHE_TTL_SERIES, CACHE_TTL_LATEST, CACHE_TTL_METADATA, HEDGE_LATEST_REQUESTS,
+    VINTAGE_STORE_DIR, VINTAGE_STORE_MAX_AGE
+)
+from app.api.services.cache import MemoryCache
+from app.api.services.rate_limit import fred_keys
+from app.api.services.hedging import Hedger
+from app.executor import run_cpu
+from app.deadlines import detach
+
+# FRED's default observation_start, i.e. the beginning of any series
+EARLIEST_OBSERVATION_DATE = "1776-07-04"
+
+# ALFRED's realtime_end meaning "still current"
+LATEST_REALTIME_DATE = "9999-12-31"
+
+# most rows FRED returns per series/observations request
+MAX_OBSERVATIONS_PER_REQUEST = 100000
 
 class FREDService:
     """Service for interacting with the FRED API."""
     
-    def __init__(self):
+    def __init__(self, cache=None, series_ttl=CACHE_TTL_SERIES):
         self.api_key = FRED_API_KEY
-        self.base_url = "https://api.stlouisfed.org/fred"
-        self.fred = Fred(api_key=self.api_key) if self.api_key else None
+        self.base_url = FRED_BASE_URL
+        self.cache = cache or MemoryCache()
+        self.series_ttl = series_ttl
+        self._range_locks = {}
+        # series this worker has served: series_id -> {"last_updated", "frequency"}
+        # (used by the refresh scheduler to know what to keep fresh)
+        self.tracked_series = {}
+        self._range_keys = {}  # series_id -> cache keys of its cached ranges
+        # latest-value requests are small and latency-sensitive, so slow ones can be sent twice
+        self.hedger = Hedger() if HEDGE_LATEST_REQUESTS else None
+        # ALFRED vintage stores: series_id -> (version of the stored file, VintageStore)
+        self.vintage_dir = VINTAGE_STORE_DIR
+        self._vintage_stores = {}
+        self._vintage_locks = {}
+        self._vintage_updates = {}
         
-    async def get_series_data(self, series_id, start_date, end_date, frequency=None):
+    async def get_series_data(self, series_id, start_date, end_date, frequency=None, aggregation_method=None, as_of=None):
         """
         Get time series data for a specific indicator.
         
@@ -22,12 +54,316 @@ class FREDService:
             start_date (str): Start date in YYYY-MM-DD format
             end_date (str): End date in YYYY-MM-DD format
             frequency (str, optional): Data frequency (e.g., 'm' for monthly)
+            aggregation_method (str, optional): avg, sum or eop when aggregating to a lower frequency
+            as_of (str, optional): Return the data as it was published on this date (YYYY-MM-DD)
             
         Returns:
             dict: Series data with metadata
         """
         if not self.api_key:
             raise Exception("FRED API key not configured")
+
+        vintage = {}
+        if as_of:
+            vintage_date, series = await self.get_vintage(series_id, as_of, start_date, end_date, frequency, aggregation_method)
+            vintage = {"as_of": as_of, "vintage_date": vintage_date}
+        else:
+            series = await self.get_series(series_id, start_date, end_date, frequency, aggregation_method)
+        if not len(series):
+            return {
+                "series_id": series_id,
+                **vintage,
+                "data": []
+            }
+
+        try:
+            series_info = await self._get_series_info(series_id)
+        except Exception as e:
+            print(f"Error fetching FRED data: {str(e)}")
+            raise Exception(f"Error fetching data from FRED: {str(e)}")
+
+        return {
+            "series_id": series_id,
+            "title": series_info.get("seriess", [{}])[0].get("title", ""),
+            "units": series_info.get("seriess", [{}])[0].get("units", ""),
+            "frequency": series_info.get("seriess", [{}])[0].get("frequency_short", ""),
+            **vintage,
+            "data": await run_cpu(series.to_records)
+        }
+
+    async def get_series(self, series_id, start_date=None, end_date=None, frequency=None, aggregation_method=None):
+        """
+        Get the observations for a series as a compact, array-backed Series.
+
+        Lower frequencies than the series' own are aggregated locally from the
+        cached native-frequency data (FRED's avg/sum/eop methods), so switching
+        between daily, weekly and monthly views costs no extra downloads.
+
+        Args:
+            series_id (str): FRED series ID
+            start_date (str, optional): Start date in YYYY-MM-DD format (default: start of the series)
+            end_date (str, optional): End date in YYYY-MM-DD format (default: today)
+            frequency (str, optional): Data frequency (e.g., 'm' for monthly)
+            aggregation_method (str, optional): avg (default), sum or eop
+
+        Returns:
+            Series: Observations between start_date and end_date
+        """
+        from app.api.services.series import can_resample, frequency_group, FREQUENCY_RANK, PERIOD_LOOKBACK_DAYS
+
+        start_date = start_date or EARLIEST_OBSERVATION_DATE
+        end_date = end_date or datetime.now().strftime("%Y-%m-%d")
+
+        native_frequency = await self.get_native_frequency(series_id) if frequency else None
+        group, native_group = frequency_group(frequency), frequency_group(native_frequency)
+        if group is not None and group == native_group and group not in ("w", "bw"):
+            # asking for the series' own frequency is the native data: no separate download or cache entry
+            # (weekly codes are left alone, since the series' week may end on a different day)
+            frequency = aggregation_method = None
+        elif group is not None and native_group is not None and FREQUENCY_RANK[group] < FREQUENCY_RANK[native_group]:
+            # FRED only aggregates to lower frequencies, and would answer with a 400
+            raise ValueError(f"{series_id} is published at frequency {native_frequency}; it can only be returned at that frequency or a lower one, not {frequency}")
+
+        if frequency and can_resample(native_frequency, frequency):
+            # start from the beginning of the first period so it's aggregated in full
+            lookback = timedelta(days=PERIOD_LOOKBACK_DAYS.get(frequency_group(frequency), 0))
+            native_start = max(
+                datetime.strptime(start_date, "%Y-%m-%d") - lookback,
+                datetime.strptime(EARLIEST_OBSERVATION_DATE, "%Y-%m-%d")
+            ).strftime("%Y-%m-%d")
+
+            native = await self._get_range(series_id, native_start, end_date)
+            return native.resample(frequency, aggregation_method or "avg").slice(start_date, end_date)
+
+        return await self._get_range(series_id, start_date, end_date, frequency, aggregation_method)
+
+    async def _get_range(self, series_id, start_date, end_date, frequency=None, aggregation_method=None):
+        """
+        Get observations through the range-covering cache.
+
+        Each (series, frequency) pair is cached once together with the date range
+        it covers. Windows inside that range are answered by slicing the cached
+        arrays; otherwise only the missing ranges before/after it are fetched from
+        FRED and merged in, so overlapping windows (6m, 1y, 5y...) share one download.
+        """
+        from app.api.services.series import Series
+
+        # nothing after today is published yet, so a cached range never claims to cover the future
+        end_date = min(end_date, datetime.now().strftime("%Y-%m-%d"))
+        if start_date > end_date:
+            return Series.empty()
+
+        key = f"fred:range:{series_id}:{frequency or ''}:{aggregation_method or ''}"
+        self._range_keys.setdefault(series_id, set()).add(key)
+
+        # one merge at a time per series, so concurrent requests don't fetch the same gap
+        lock = self._range_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            cached = await self.cache.try_get(key)
+            if cached is not None and cached.covers(start_date, end_date):
+                return cached.slice(start_date, end_date)
+
+            if cached is None:
+                # an empty cached series still records the range it covers, so only a real miss starts over
+                cached = Series.empty()
+            gaps = cached.missing_ranges(start_date, end_date)
+            parts = await asyncio.gather(
+                *[
+                    self._fetch_series(series_id, gap_start, gap_end, frequency, aggregation_method)
+                    for gap_start, gap_end in gaps
+                ]
+            )
+            for part in parts:
+                cached = cached.merge(part)
+
+            await self.cache.try_set(key, cached, self.series_ttl)
+            return cached.slice(start_date, end_date)
+
+    async def get_series_since(self, series_id, since_date, version_token=None, start_date=None):
+        """
+        Get what changed in a series for a client that already holds it up to since_date.
+
+        Args:
+            series_id (str): FRED series ID
+            since_date (str): Date of the client's last observation (YYYY-MM-DD)
+            version_token (str, optional): Version token from the client's previous sync
+            start_date (str, optional): Date of the client's first observation; when the
+                client has to replace its copy, that copy starts here (default: the
+                start of the series)
+
+        Returns:
+            dict: New observations, revised older observations and the new version token
+        """
+        if not self.api_key:
+            raise Exception("FRED API key not configured")
+
+        for name, value in (("date", since_date), ("start", start_date)):
+            if value is not None:
+                try:
+                    datetime.strptime(value, "%Y-%m-%d")
+                except ValueError:
+                    raise ValueError(f"Invalid {name}: {value} (expected YYYY-MM-DD)")
+        # tokens are "<epoch in hex>.<version>", as handed out by earlier syncs
+        if version_token is not None and not re.fullmatch(r"[0-9a-f]+\.\d+", version_token):
+            raise ValueError(f"Invalid version token: {version_token}")
+
+        # makes sure the cached native series covers since_date up to today
+        today = datetime.now().strftime("%Y-%m-%d")
+        recent = await self._get_range(series_id, since_date, today)
+        cached = await self.cache.try_get(f"fred:range:{series_id}::")
+        if cached is None or cached.epoch != recent.epoch:
+            cached = recent
+
+        newer, revised, reset = cached.changes_since(since_date, version_token)
+        if reset:
+            # the client replaces its whole copy, so it gets everything it held, not just what's cached
+            start_date = start_date or EARLIEST_OBSERVATION_DATE
+            cached = await self._get_range(series_id, start_date, today)
+            newer = cached.slice(start_date, None)
+        return {
+            "series_id": series_id,
+            "since": since_date,
+            "version": cached.version_token,
+            "reset": reset,
+            "data": newer.to_records(),
+            "revised": revised.to_records()
+        }
+
+    async def get_vintage(self, series_id, as_of, start_date=None, end_date=None, frequency=None, aggregation_method=None):
+        """
+        Get a series as it was published on a past date, from the local ALFRED vintage store.
+
+        Args:
+            series_id (str): FRED series ID
+            as_of (str): Date of the vintage (YYYY-MM-DD); the latest vintage published by then is used
+            start_date (str, optional): Start date in YYYY-MM-DD format
+            end_date (str, optional): End date in YYYY-MM-DD format
+            frequency (str, optional): A frequency lower than the series' own, aggregated locally
+            aggregation_method (str, optional): avg (default), sum or eop
+
+        Returns:
+            tuple: (date of the vintage used, Series)
+        """
+        from app.api.services.series import can_resample, frequency_group
+
+        try:
+            as_of = datetime.strptime(as_of, "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError:
+            raise ValueError(f"Invalid as_of date: {as_of} (expected YYYY-MM-DD)")
+
+        native = await self.get_native_frequency(series_id) if frequency else None
+        if frequency and frequency_group(frequency) != frequency_group(native) and not can_resample(native, frequency):
+            # vintages are stored at the series' own frequency
+            raise ValueError(f"as_of queries of {series_id} support its own frequency or lower ones, not {frequency}")
+
+        store = await self.get_vintage_store(series_id, as_of)
+        vintage_date, series = store.as_of(as_of)
+        if series is None:
+            raise ValueError(f"{series_id} has no vintage as of {as_of} (the first is {store.first_vintage})")
+
+        if frequency and can_resample(native, frequency):
+            series = series.resample(frequency, aggregation_method or "avg")
+        return vintage_date, series.slice(start_date, end_date)
+
+    async def get_vintage_store(self, series_id, as_of=None):
+        """
+        The stored vintages of a series, downloaded first if needed.
+
+        The store lives in a file shared by all workers. It's only brought up to
+        date when it's older than VINTAGE_STORE_MAX_AGE and the query could be
+        affected: vintages published after the file was written can't change
+        what a series looked like before that.
+
+        Args:
+            series_id (str): FRED series ID
+            as_of (str, optional): The date the caller needs vintages up to (default: today)
+
+        Returns:
+            VintageStore: Every vintage of the series
+        """
+        from app.api.services.vintages import VintageStore
+
+        # the ID names a file, so it's kept to FRED's characters
+        if not re.fullmatch(r"[A-Za-z0-9_]+", series_id):
+            raise ValueError(f"Invalid series ID: {series_id}")
+
+        path = os.path.join(self.vintage_dir, f"{series_id}.npz")
+        lock = self._vintage_locks.setdefault(series_id, asyncio.Lock())
+        async with lock:
+            version, store = self._vintage_stores.get(series_id, (0.0, None))
+            if os.path.exists(path) and os.path.getmtime(path) > version:
+                store = await asyncio.to_thread(VintageStore.load, path)
+                version = os.path.getmtime(path)
+                self._vintage_stores[series_id] = (version, store)
+
+            stored_through = datetime.fromtimestamp(version).strftime("%Y-%m-%d")
+            needs_newer = as_of is None or as_of >= stored_through
+            if store is None or (needs_newer and time.time() - version > VINTAGE_STORE_MAX_AGE):
+                update = self._vintage_updates.get(series_id)
+                if update is None or update.done():
+                    # a series' first download can be large, so it outlives the request that started it
+                    update = self._vintage_updates[series_id] = detach(self._update_vintages(series_id, store, path))
+                try:
+                    store = await asyncio.shield(update)
+                except Exception as e:
+                    print(f"Error updating vintages of {series_id}: {str(e)}")
+                    if store is None:
+                        raise Exception(f"Error fetching vintages of {series_id} from ALFRED: {str(e)}")
+        return store
+
+    async def _update_vintages(self, series_id, store, path):
+        """Download the vintages missing from a stored series (all of them the first time) and save it."""
+        if store is not None and len(store):
+            since = store.last_vintage
+            store = store.merge(await self._fetch_vintages(series_id, since), since)
+        else:
+            store = await self._fetch_vintages(series_id, EARLIEST_OBSERVATION_DATE)
+
+        os.makedirs(self.vintage_dir, exist_ok=True)
+        # write to a temporary file first so other workers never load a half-written one
+        temporary = f"{path}.{os.getpid()}.tmp.npz"
+        await asyncio.to_thread(store.save, temporary)
+        os.replace(temporary, path)
+        self._vintage_stores[series_id] = (os.path.getmtime(path), store)
+        return store
+
+    async def _fetch_vintages(self, series_id, realtime_start):
+        """
+        Fetch every observation value valid at any time since realtime_start from ALFRED.
+
+        Each row comes with the realtime period it was valid for, i.e. only
+        the values each vintage changed. Series with more rows than FRED returns
+        at once are fetched in pages.
+        """
+        from app.api.services.vintages import VintageStore, parse_vintages
+
+        pages = []
+        try:
+            async with httpx.AsyncClient(timeout=60) as client:
+                while True:
+                    params = {
+                        "series_id": series_id,
+                        "file_type": "json",
+                        "realtime_start": realtime_start,
+                        "realtime_end": LATEST_REALTIME_DATE,
+                        "limit": MAX_OBSERVATIONS_PER_REQUEST,
+                        "offset": len(pages) * MAX_OBSERVATIONS_PER_REQUEST,
+                    }
+                    response = await fred_keys.get(client, f"{self.base_url}/series/observations", params=params)
+                    response.raise_for_status()
+                    pages.append(await run_cpu(parse_vintages, response.content))
+                    if len(pages[-1]) < MAX_OBSERVATIONS_PER_REQUEST:
+                        break
+        except Exception as e:
+            print(f"Error fetching ALFRED data: {str(e)}")
+            raise Exception(f"Error fetching data from ALFRED: {str(e)}")
+
+        return pages[0] if len(pages) == 1 else VintageStore.concat(pages)
+
+    async def _fetch_series(self, series_id, start_date, end_date, frequency=None, aggregation_method=None):
+        """Fetch observations from FRED and decode them into a Series."""
+        # NumPy is only needed here, so the series module is imported lazily to keep startup fast
+        from app.api.services.series import parse_observations
             
         try:
             # Use async HTTP client for API requests
@@ -35,7 +371,6 @@ class FREDService:
                 url = f"{self.base_url}/series/observations"
                 params = {
                     "series_id": series_id,
-                    "api_key": self.api_key,
                     "file_type": "json",
                     "observation_start": start_date,
                     "observation_end": end_date,
@@ -43,89 +378,218 @@ class FREDService:
                 
                 if frequency:
                     params["frequency"] = frequency
+                if aggregation_method:
+                    params["aggregation_method"] = aggregation_method
                 
-                response = await client.get(url, params=params)
+                response = await fred_keys.get(client, url, params=params)
                 response.raise_for_status()
-                data = response.json()
                 
-                series_info_url = f"{self.base_url}/series"
-                series_params = {
-                    "series_id": series_id,
-                    "api_key": self.api_key,
-                    "file_type": "json"
-                }
-                
-                series_response = await client.get(series_info_url, params=series_params)
-                series_response.raise_for_status()
-                series_info = series_response.json()
-                
-                # processing and formatting the data
-                observations = data.get("observations", [])
-                
-                #  using pandas DataFrame
-                df = pd.DataFrame(observations)
-                if not df.empty and "date" in df.columns and "value" in df.columns:
-                    df["date"] = pd.to_datetime(df["date"])
-                    df["value"] = pd.to_numeric(df["value"], errors="coerce")
-                    
-                    df = df.sort_values("date")
-                    
-                    formatted_data = []
-                    for _, row in df.iterrows():
-                        if not pd.isna(row["value"]):
-                            formatted_data.append({
-                                "date": row["date"].strftime("%Y-%m-%d"),
-                                "value": float(row["value"])
-                            })
-                    
-                    return {
-                        "series_id": series_id,
-                        "title": series_info.get("seriess", [{}])[0].get("title", ""),
-                        "units": series_info.get("seriess", [{}])[0].get("units", ""),
-                        "frequency": series_info.get("seriess", [{}])[0].get("frequency_short", ""),
-                        "data": formatted_data
-                    }
-                
-                return {
-                    "series_id": series_id,
-                    "data": []
-                }
+                # decoding decades of daily observations takes a while, so it's kept off the event loop
+                return await run_cpu(parse_observations, response.content, (start_date, end_date))
                 
         except Exception as e:
             print(f"Error fetching FRED data: {str(e)}")
             raise Exception(f"Error fetching data from FRED: {str(e)}")
     
-    async def get_latest_value(self, series_id):
-        """Get the latest value for a specific indicator."""
+    async def _get_series_info(self, series_id, refresh=False):
+        """Get series metadata (title, units, frequency), cached since it rarely changes."""
+        async def fetch():
+            series_info_url = f"{self.base_url}/series"
+            series_params = {
+                "series_id": series_id,
+                "file_type": "json"
+            }
+            
+            async with httpx.AsyncClient() as client:
+                series_response = await fred_keys.get(client, series_info_url, params=series_params)
+                series_response.raise_for_status()
+                return series_response.json()
+
+        series_info = await self.cache.get_or_set(f"fred:info:{series_id}", fetch, CACHE_TTL_METADATA, refresh=refresh)
+        info = series_info.get("seriess", [{}])[0]
+        self.tracked_series.setdefault(series_id, {}).update(
+            last_updated=info.get("last_updated"),
+            frequency=info.get("frequency_short")
+        )
+        return series_info
+
+    async def get_last_updated(self, series_id):
+        """Ask FRED when a series was last updated (bypasses and refreshes the cached metadata)."""
+        series_info = await self._get_series_info(series_id, refresh=True)
+        return series_info.get("seriess", [{}])[0].get("last_updated")
+
+    async def get_series_updates(self, start_time, end_time, page_size=1000):
+        """
+        Get every series FRED updated between two times (series/updates feed).
+
+        Args:
+            start_time (datetime): Start of the window (FRED only keeps the last two weeks)
+            end_time (datetime): End of the window
+
+        Returns:
+            list: Series metadata dicts with at least 'id' and 'last_updated'
+        """
         if not self.api_key:
             raise Exception("FRED API key not configured")
-            
+
+        updates = []
+        async with httpx.AsyncClient() as client:
+            while True:
+                params = {
+                    "file_type": "json",
+                    "filter_value": "all",
+                    "start_time": start_time.strftime("%Y%m%d%H%M"),
+                    "end_time": end_time.strftime("%Y%m%d%H%M"),
+                    "limit": page_size,
+                    "offset": len(updates)
+                }
+                response = await fred_keys.get(client, f"{self.base_url}/series/updates", params=params)
+                response.raise_for_status()
+                data = response.json()
+
+                page = data.get("seriess", [])
+                updates.extend(page)
+                if len(page) < page_size or len(updates) >= data.get("count", 0):
+                    return updates
+
+    async def get_popular_tags(self, limit=50):
+        """Names of FRED's most popular tags (tags endpoint, by popularity)."""
+        if not self.api_key:
+            raise Exception("FRED API key not configured")
+
+        params = {
+            "file_type": "json",
+            "order_by": "popularity",
+            "sort_order": "desc",
+            "limit": limit
+        }
+        async with httpx.AsyncClient() as client:
+            response = await fred_keys.get(client, f"{self.base_url}/tags", params=params)
+            response.raise_for_status()
+        return [tag["name"] for tag in response.json().get("tags", [])]
+
+    async def get_tagged_series(self, tag_name, limit=1000):
+        """
+        Get the most popular series carrying a tag (tags/series endpoint).
+
+        Args:
+            tag_name (str): FRED tag, e.g. "inflation"
+            limit (int): Number of series to return (FRED allows up to 1000)
+
+        Returns:
+            list: Series metadata dicts (id, title, units, frequency, popularity, notes, ...)
+        """
+        if not self.api_key:
+            raise Exception("FRED API key not configured")
+
+        params = {
+            "file_type": "json",
+            "tag_names": tag_name,
+            "order_by": "popularity",
+            "sort_order": "desc",
+            "limit": limit
+        }
+        async with httpx.AsyncClient(timeout=30) as client:
+            response = await fred_keys.get(client, f"{self.base_url}/tags/series", params=params)
+            response.raise_for_status()
+        return response.json().get("seriess", [])
+
+    def tracked_state(self):
+        """What this worker has cached per series: {series_id: {"last_updated", "frequency", "range_keys"}}."""
+        return {
+            series_id: {**info, "range_keys": sorted(self._range_keys.get(series_id, ()))}
+            for series_id, info in self.tracked_series.items()
+        }
+
+    def add_tracked(self, state):
+        """
+        Also keep fresh the series other workers cached (see tracked_state).
+
+        What this worker already knows about a series is kept, since its own
+        last_updated is the one it refreshed to.
+        """
+        for series_id, info in state.items():
+            if series_id not in self.tracked_series:
+                self.tracked_series[series_id] = {
+                    "last_updated": info.get("last_updated"), "frequency": info.get("frequency")
+                }
+            self._range_keys.setdefault(series_id, set()).update(info.get("range_keys", ()))
+
+    async def refresh_series(self, series_id):
+        """
+        Bring everything cached for a series up to date after FRED updated it.
+
+        The cached native-frequency range is re-downloaded over the dates it
+        covers (so revisions are picked up too) and the latest value is
+        refetched. Ranges fetched at other frequencies are dropped.
+
+        Returns:
+            dict: The new latest value
+        """
+        await self._get_series_info(series_id, refresh=True)
+
+        native_key = f"fred:range:{series_id}::"
+        for key in self._range_keys.get(series_id, set()) - {native_key}:
+            await self.cache.try_delete(key)
+
+        lock = self._range_locks.setdefault(native_key, asyncio.Lock())
+        async with lock:
+            cached = await self.cache.try_get(native_key)
+            if cached is not None and cached.covered is not None:
+                start_date = str(cached.covered[0])
+                end_date = max(str(cached.covered[1]), datetime.now().strftime("%Y-%m-%d"))
+                fresh = await self._fetch_series(series_id, start_date, end_date)
+                await self.cache.try_set(native_key, cached.merge(fresh), self.series_ttl)
+
+        return await self.get_latest_value(series_id, refresh=True)
+    
+    async def get_native_frequency(self, series_id):
+        """The series' own frequency (frequency_short from its metadata), or None if unknown."""
+        try:
+            series_info = await self._get_series_info(series_id)
+            return series_info.get("seriess", [{}])[0].get("frequency_short")
+        except Exception as e:
+            print(f"Error fetching FRED series info: {str(e)}")
+            return None
+
+    async def get_latest_value(self, series_id, refresh=False):
+        """
+        Get the latest value for a specific indicator.
+
+        Pass refresh=True to bypass the cache and ask FRED directly
+        (the fresh value replaces the cached one).
+        """
+        if not self.api_key:
+            raise Exception("FRED API key not configured")
+
+        return await self.cache.get_or_set(
+            f"fred:latest:{series_id}",
+            lambda: self._fetch_latest_value(series_id),
+            CACHE_TTL_LATEST,
+            refresh=refresh
+        )
+
+    async def _fetch_latest_value(self, series_id):
+        """Fetch the latest observation from FRED (see get_latest_value)."""
         try:
             # use async HTTP client for API requests
             async with httpx.AsyncClient() as client:
                 url = f"{self.base_url}/series/observations"
                 params = {
                     "series_id": series_id,
-                    "api_key": self.api_key,
                     "file_type": "json",
                     "sort_order": "desc",
                     "limit": 1
                 }
                 
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                series_info_url = f"{self.base_url}/series"
-                series_params = {
-                    "series_id": series_id,
-                    "api_key": self.api_key,
-                    "file_type": "json"
-                }
+                async def fetch_observation():
+                    response = await fred_keys.get(client, url, params=params)
+                    response.raise_for_status()
+                    return response.json()
+
+                data = await (self.hedger.run(fetch_observation) if self.hedger else fetch_observation())
                 
-                series_response = await client.get(series_info_url, params=series_params)
-                series_response.raise_for_status()
-                series_info = series_response.json()
+                series_info = await self._get_series_info(series_id)
                 
                 observations = data.get("observations", [])
                 if observations:
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from collections import deque
+from app.config import HEDGE_PERCENTILE
+
+class Hedger:
+    """
+    Cuts tail latency by sending a slow request a second time.
+
+    If a call hasn't finished within the given percentile of recent call
+    latencies, an identical call is started next to it and whichever succeeds
+    first is used. At the 95th percentile this costs about 5% extra upstream
+    requests.
+
+    Only first calls are timed: when a hedge wins, the slow first call is left
+    to finish in the background so its latency still counts. Timing winners
+    instead would drop exactly the slow tail and drag the percentile, and so
+    the hedging delay, ever lower.
+    """
+
+    def __init__(self, percentile=HEDGE_PERCENTILE, window=200, min_samples=20, initial_delay=1.0):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.latencies = deque(maxlen=window)
+        self.stats = {"calls": 0, "hedged": 0, "hedge_won": 0}
+        # first calls outrun by their hedge, kept referenced until they finish
+        self.stragglers = set()
+
+    def delay(self):
+        """How long to wait for the first call before hedging it."""
+        if len(self.latencies) < self.min_samples:
+            return self.initial_delay
+        ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * self.percentile / 100), len(ordered) - 1)]
+
+    async def run(self, call):
+        """
+        Await call(), hedging it with a second call() if it's slow.
+
+        Args:
+            call (callable): Coroutine function making the request; it may run twice at once
+
+        Returns:
+            The result of whichever call succeeded first
+        """
+        self.stats["calls"] += 1
+        primary = asyncio.create_task(call())
+        started = time.perf_counter()
+        tasks = [primary]
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.delay())
+            if not done:
+                self.stats["hedged"] += 1
+                hedge = asyncio.create_task(call())
+                tasks.append(hedge)
+                pending.add(hedge)
+
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        if task is primary:
+                            self.latencies.append(time.perf_counter() - started)
+                        else:
+                            self.stats["hedge_won"] += 1
+                            if primary in pending:
+                                pending.discard(primary)
+                                self._time_straggler(primary, started)
+                        return task.result()
+                if not pending:
+                    # every call failed: report the first one's error
+                    return primary.result()
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+            for task in tasks:
+                # a loser that failed at the same moment: its error doesn't matter
+                if task.done() and not task.cancelled():
+                    task.exception()
+
+    def _time_straggler(self, task, started):
+        """Record a first call's latency once it finishes, after its hedge already won."""
+        def finished(task):
+            self.stragglers.discard(task)
+            if not task.cancelled() and task.exception() is None:
+                self.latencies.append(time.perf_counter() - started)
+
+        self.stragglers.add(task)
+        task.add_done_callback(finished)
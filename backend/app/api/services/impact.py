@@ -0,0 +1,233 @@
+import numpy as np
+from app.api.services.correlation import align
+
+# percentiles reported for every simulated quantity
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# months of history resampled together, so a simulated year keeps the way
+# inflation and rates moved together (and persisted) in the data
+BLOCK_MONTHS = 12
+
+# savings accounts are assumed to pay this share of the federal funds rate
+SAVINGS_RATE_SHARE = 0.5
+
+# floor for simulated mortgage rates (percent)
+MIN_MORTGAGE_RATE = 1.0
+
+# paths simulated together (see simulate)
+CHUNK_PATHS = 1000
+
+
+class ImpactHistory:
+    """
+    The monthly history the simulations resample: CPI inflation and changes in the fed funds and mortgage rates.
+
+    inflation holds monthly log changes of CPI; fed_changes and
+    mortgage_changes monthly changes in percentage points, all on the months
+    every input has data for. fed_funds and mortgage_rate are the latest levels.
+    """
+
+    __slots__ = ("inflation", "fed_changes", "mortgage_changes", "fed_funds", "mortgage_rate")
+
+    def __init__(self, inflation, fed_changes, mortgage_changes, fed_funds, mortgage_rate):
+        self.inflation = np.asarray(inflation, dtype=np.float64)
+        self.fed_changes = np.asarray(fed_changes, dtype=np.float64)
+        self.mortgage_changes = np.asarray(mortgage_changes, dtype=np.float64)
+        self.fed_funds = float(fed_funds)
+        self.mortgage_rate = float(mortgage_rate)
+
+    def __len__(self):
+        return len(self.inflation)
+
+    @classmethod
+    def from_series(cls, cpi, fed_funds, mortgage_rate):
+        """Build the history from monthly CPI, fed funds and 30-year mortgage rate Series."""
+        _, matrix = align([cpi, fed_funds, mortgage_rate])
+        # month-over-month changes, only where a month and the one before have every input
+        changes = np.diff(np.column_stack([np.log(matrix[:, 0]), matrix[:, 1:]]), axis=0)
+        changes = changes[~np.isnan(changes).any(axis=1)]
+        if len(changes) < BLOCK_MONTHS:
+            raise ValueError("Not enough overlapping CPI and rate history to simulate from")
+        return cls(changes[:, 0], changes[:, 1], changes[:, 2], fed_funds.values[-1], mortgage_rate.values[-1])
+
+
+def bucket_inputs(income, expenses, savings, mortgage, mortgage_term, mortgage_rate, variable_rate, years):
+    """
+    Round the calculator's inputs to the grid results are memoized on.
+
+    Amounts keep three significant figures and rates are rounded to 0.05
+    points: differences below that are smaller than the simulations' own
+    sampling noise, and nearby inputs share one cached result.
+    """
+    def amount(value):
+        return float(f"{float(value):.3g}") if value else 0.0
+
+    return {
+        "income": amount(income),
+        "expenses": amount(expenses),
+        "savings": amount(savings),
+        "mortgage": amount(mortgage),
+        "mortgage_term": int(mortgage_term),
+        "mortgage_rate": round(round(float(mortgage_rate) * 20) / 20, 2),
+        "variable_rate": bool(variable_rate),
+        "years": int(years),
+    }
+
+
+def payment(principal, annual_rate, months):
+    """Monthly payment of a loan paid off in equal instalments (vectorised over arrays of any shape)."""
+    monthly_rate = np.asarray(annual_rate, dtype=np.float64) / 100 / 12
+    months = np.maximum(months, 1)
+    growth = (1 + monthly_rate) ** months
+    with np.errstate(divide="ignore", invalid="ignore"):
+        amortised = principal * monthly_rate * growth / (growth - 1)
+    return np.where(monthly_rate > 0, amortised, principal / months)
+
+
+def sample_paths(history, simulations, months, rng):
+    """
+    Resample the history into simulated months.
+
+    Each path is a chain of BLOCK_MONTHS-long stretches of history starting
+    at random months, the same stretches for inflation and both rates.
+
+    Returns:
+        tuple: (inflation, fed_changes, mortgage_changes), each simulations x months
+    """
+    blocks = -(-months // BLOCK_MONTHS)
+    starts = rng.integers(0, len(history) - BLOCK_MONTHS + 1, size=(simulations, blocks))
+    index = (starts[:, :, None] + np.arange(BLOCK_MONTHS)).reshape(simulations, -1)[:, :months]
+    return history.inflation[index], history.fed_changes[index], history.mortgage_changes[index]
+
+
+def simulate(history, inputs, simulations, seed=0):
+    """
+    Monte Carlo paths of prices, savings and mortgage payments.
+
+    Income and expenses grow with prices, so the monthly surplus (or
+    shortfall) added to savings keeps its purchasing power. Savings earn
+    SAVINGS_RATE_SHARE of the simulated fed funds rate. A variable-rate
+    mortgage resets once a year to the simulated market rate plus the
+    borrower's current margin over today's market rate.
+
+    Args:
+        history (ImpactHistory): The history to resample
+        inputs (dict): Bucketed inputs (see bucket_inputs)
+        simulations (int): Number of paths
+        seed (int): Random seed, so a given set of inputs always gives the same result
+
+    Returns:
+        dict: Arrays of simulations x years, one per quantity, valued at the end of each year
+    """
+    rng = np.random.default_rng(seed)
+    # paths are simulated CHUNK_PATHS at a time, so the monthly arrays (a few MB per
+    # chunk) don't grow with the number of simulations; only the yearly results do
+    chunks = [
+        _simulate_chunk(history, inputs, min(CHUNK_PATHS, simulations - start), rng)
+        for start in range(0, simulations, CHUNK_PATHS)
+    ]
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+
+def _simulate_chunk(history, inputs, count, rng):
+    years = inputs["years"]
+    months = years * 12
+    year_end = np.arange(1, years + 1) * 12 - 1
+    # the monthly arrays are large, so each is transformed in place
+    prices, fed_funds, market_rate = sample_paths(history, count, months, rng)
+
+    np.exp(np.cumsum(prices, axis=1, out=prices), out=prices)
+    np.cumsum(fed_funds, axis=1, out=fed_funds)
+    fed_funds += history.fed_funds
+    np.maximum(fed_funds, 0, out=fed_funds)
+    fed_funds_at_year_end = fed_funds[:, year_end]
+    market_rate = np.maximum(history.mortgage_rate + np.cumsum(market_rate, axis=1)[:, year_end], MIN_MORTGAGE_RATE)
+
+    # savings: b[t] = b[t-1] * (1 + r[t]) + c[t], solved with cumulative products instead of a loop
+    growth = fed_funds
+    growth *= SAVINGS_RATE_SHARE / 100 / 12
+    growth += 1
+    np.cumprod(growth, axis=1, out=growth)
+    monthly_surplus = (inputs["income"] - inputs["expenses"]) / 12
+    balance = prices * monthly_surplus
+    balance /= growth
+    np.cumsum(balance, axis=1, out=balance)
+    balance += inputs["savings"]
+    balance *= growth
+    balance = balance[:, year_end]
+
+    # mortgage: monthly payment in each year of the horizon
+    term = inputs["mortgage_term"] * 12
+    initial_payment = float(payment(inputs["mortgage"], inputs["mortgage_rate"], term))
+    payments = np.zeros((count, years))
+    payments[:, :min(years, inputs["mortgage_term"])] = initial_payment
+    fixed_payments = payments.copy()
+    if inputs["variable_rate"] and inputs["mortgage"] > 0:
+        margin = inputs["mortgage_rate"] - history.mortgage_rate
+        principal = np.full(count, float(inputs["mortgage"]))
+        rate = np.full(count, float(inputs["mortgage_rate"]))
+        monthly = np.full(count, initial_payment)
+        for year in range(1, min(years, inputs["mortgage_term"])):
+            # twelve payments at this year's rate, then a reset for the months that are left
+            monthly_rate = rate / 100 / 12
+            factor = (1 + monthly_rate) ** 12
+            with np.errstate(divide="ignore", invalid="ignore"):
+                paid_down = np.where(monthly_rate > 0, monthly * (factor - 1) / monthly_rate, monthly * 12)
+            principal = np.maximum(principal * factor - paid_down, 0)
+            rate = np.maximum(market_rate[:, year - 1] + margin, MIN_MORTGAGE_RATE)
+            monthly = payment(principal, rate, term - year * 12)
+            payments[:, year] = monthly
+
+    yearly_prices = prices.reshape(count, years, 12).sum(axis=2)
+    inflation_cost = inputs["expenses"] / 12 * yearly_prices - inputs["expenses"]
+    start_balance = np.column_stack([np.full(count, float(inputs["savings"])), balance[:, :-1]])
+    interest = balance - start_balance - monthly_surplus * yearly_prices
+    # what rate resets add to the payments of the same loan at a fixed rate
+    payment_increase = (payments - fixed_payments) * 12
+
+    return {
+        "price_level": prices[:, year_end],
+        "inflation_cost": inflation_cost,
+        "savings": balance,
+        "savings_real": balance / prices[:, year_end],
+        "savings_interest": interest,
+        "mortgage_payment": payments,
+        "fed_funds": fed_funds_at_year_end,
+        "net_impact": interest - inflation_cost - payment_increase,
+    }
+
+
+def percentile_bands(paths, percentiles=PERCENTILES):
+    """
+    Percentiles across simulations for every year: {quantity: {"p5": [...], ...}}.
+
+    Interpolated like np.percentile's default, from one sort per quantity
+    rather than a selection per percentile.
+    """
+    bands = {}
+    for name, values in paths.items():
+        # one contiguous row per year, sorted across simulations
+        ordered = np.sort(values.T, axis=1)
+        position = np.asarray(percentiles, dtype=np.float64) / 100 * (ordered.shape[1] - 1)
+        below = np.floor(position).astype(int)
+        above = np.minimum(below + 1, ordered.shape[1] - 1)
+        weight = position - below
+        levels = ordered[:, below] * (1 - weight) + ordered[:, above] * weight
+        digits = 4 if name in ("price_level", "fed_funds") else 2
+        # + 0.0 turns the -0.0 rounding can produce into 0.0
+        bands[name] = {f"p{p}": [round(float(value), digits) + 0.0 for value in levels[:, i]] for i, p in enumerate(percentiles)}
+    return bands
+
+
+def run(history, inputs, simulations, seed=0):
+    """
+    Everything /tools/impact computes, in one call that can run in the CPU executor.
+
+    Returns:
+        dict: Percentile bands per year plus the first-year payment
+    """
+    paths = simulate(history, inputs, simulations, seed)
+    return {
+        "initial_mortgage_payment": round(float(paths["mortgage_payment"][0, 0]), 2),
+        "bands": percentile_bands(paths),
+    }
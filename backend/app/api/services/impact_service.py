@@ -0,0 +1,113 @@
+import asyncio
+import json
+import zlib
+from datetime import datetime
+from app.config import CACHE_TTL_SERIES
+from app.api.services.cache import MemoryCache
+from app.profiling import phase
+from app.executor import run_cpu
+
+# the history the simulations resample: CPI, the fed funds rate and 30-year mortgage rates
+IMPACT_SERIES = ("CPIAUCSL", "FEDFUNDS", "MORTGAGE30US")
+HISTORY_START = "1985-01-01"
+
+DEFAULT_SIMULATIONS = 5000
+MAX_SIMULATIONS = 20000
+MAX_YEARS = 30
+
+class ImpactService:
+    """
+    Monte Carlo projections for the personal impact calculator.
+
+    Thousands of paths of inflation and interest rates are resampled from
+    the cached FRED history and run through the user's finances at once.
+    Results are cached per bucket of inputs (see impact.bucket_inputs) and
+    under the data versions of the history, so repeated and nearby requests
+    don't simulate again until FRED publishes new data.
+    """
+
+    def __init__(self, fred_service, cache=None):
+        self.fred_service = fred_service
+        self.cache = cache or MemoryCache()
+
+    async def get_impact(self, income, expenses, savings, mortgage=0, mortgage_term=30, mortgage_rate=None,
+                         variable_rate=False, years=10, simulations=DEFAULT_SIMULATIONS):
+        """
+        Percentile bands of how inflation and rates could affect someone's finances, year by year.
+
+        Args:
+            income (float): Annual income
+            expenses (float): Annual expenses
+            savings (float): Savings balance
+            mortgage (float): Mortgage balance
+            mortgage_term (int): Years left on the mortgage
+            mortgage_rate (float, optional): Mortgage rate in percent (default: today's 30-year average)
+            variable_rate (bool): Whether the mortgage rate resets every year
+            years (int): Years to project
+            simulations (int): Number of simulated paths
+
+        Returns:
+            dict: The (bucketed) inputs used, the current rates and percentile bands per year
+        """
+        # the simulations need NumPy, so the engine is only imported once the calculator is used
+        from app.api.services import impact
+        from app.api.services.impact import ImpactHistory
+
+        if not self.fred_service.api_key:
+            raise Exception("FRED API key not configured")
+
+        if min(income, expenses, savings, mortgage) < 0:
+            raise ValueError("Amounts can't be negative")
+        if not 1 <= years <= MAX_YEARS:
+            raise ValueError(f"years must be between 1 and {MAX_YEARS}")
+        if not 1 <= mortgage_term <= MAX_YEARS:
+            raise ValueError(f"mortgage_term must be between 1 and {MAX_YEARS}")
+        if not 100 <= simulations <= MAX_SIMULATIONS:
+            raise ValueError(f"simulations must be between 100 and {MAX_SIMULATIONS}")
+        if mortgage_rate is not None and not 0 <= mortgage_rate <= 25:
+            raise ValueError("mortgage_rate must be between 0 and 25 (percent)")
+
+        today = datetime.now().strftime("%Y-%m-%d")
+        inputs = await asyncio.gather(
+            *[self.fred_service.get_series(series_id, HISTORY_START, today, "m") for series_id in IMPACT_SERIES]
+        )
+        if any(not len(series) for series in inputs):
+            raise Exception("No CPI or rate history available")
+
+        market_rate = float(inputs[2].values[-1])
+        bucket = impact.bucket_inputs(
+            income, expenses, savings, mortgage, mortgage_term,
+            market_rate if mortgage_rate is None else mortgage_rate, variable_rate, years
+        )
+        versions = ",".join(series.version_token for series in inputs)
+        inputs_key = json.dumps(bucket, sort_keys=True)
+        key = f"impact:{inputs_key}:{simulations}:{versions}"
+
+        async def compute():
+            history = ImpactHistory.from_series(*inputs)
+            # seeded from the inputs, so every worker gives the same answer for the same bucket
+            seed = zlib.crc32(f"{inputs_key}:{simulations}".encode())
+            with phase("simulation"):
+                result = await run_cpu(impact.run, history, bucket, simulations, seed)
+            return {
+                "inputs": bucket,
+                "simulations": simulations,
+                "history": {"start": HISTORY_START, "months": len(history)},
+                "current": {
+                    "inflation": _annual_inflation(inputs[0]),
+                    "fed_funds": float(inputs[1].values[-1]),
+                    "mortgage_rate": market_rate,
+                },
+                "percentiles": list(impact.PERCENTILES),
+                "years": list(range(1, years + 1)),
+                **result,
+            }
+
+        return await self.cache.get_or_set(key, compute, CACHE_TTL_SERIES)
+
+
+def _annual_inflation(cpi):
+    # year-over-year change of the last observation, in percent
+    if len(cpi) < 13:
+        return None
+    return round(float(cpi.values[-1] / cpi.values[-13] - 1) * 100, 2)
@@ -0,0 +1,156 @@
+import asyncio
+import time
+from app.config import FRED_API_KEYS, FRED_RATE_LIMIT, FRED_KEY_MAX_429S, FRED_KEY_COOLDOWN
+from app.profiling import phase
+from app.deadlines import remaining, cap, wait_or_expire
+
+class RateLimiter:
+    """
+    Token bucket spacing out upstream requests.
+
+    Each acquire() reserves the next free slot and sleeps until it comes up,
+    so concurrent callers queue in order without needing a lock (and the
+    limiter works from any event loop).
+    """
+
+    def __init__(self, per_minute, burst=10):
+        self.per_minute = per_minute
+        self.burst = burst
+        self.acquired = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def set_rate(self, per_minute):
+        self.per_minute = per_minute
+
+    def available(self):
+        """Tokens in the bucket right now (negative when callers are already queued)."""
+        if self.per_minute <= 0:
+            return float(self.burst)
+        elapsed = time.monotonic() - self._updated
+        return min(self.burst, self._tokens + elapsed * self.per_minute / 60)
+
+    async def acquire(self):
+        """Wait until the next request is allowed; a rate of 0 means no limit."""
+        self.acquired += 1
+        if self.per_minute <= 0:
+            return
+
+        rate = self.per_minute / 60
+        now = time.monotonic()
+        tokens = min(self.burst, self._tokens + (now - self._updated) * rate) - 1
+        left = remaining()
+        if tokens < 0 and left is not None and -tokens / rate > left:
+            # our slot would come up after the request's deadline: don't take it
+            self.acquired -= 1
+            await wait_or_expire(-tokens / rate)
+        self._tokens = tokens
+        self._updated = now
+        if self._tokens < 0:
+            # the bucket is in debt: wait until our token has been refilled
+            await asyncio.sleep(-self._tokens / rate)
+
+
+class KeyPool:
+    """
+    FRED API keys, each with its own rate budget, shared by every upstream request.
+
+    A request goes out on the healthy key with the most budget left, so the
+    pool's throughput grows with the number of keys. A key answered with
+    max_429s rate-limit errors in a row is taken out of rotation for a
+    cooldown (doubling each time it happens again) and the request is retried
+    on another key.
+    """
+
+    def __init__(self, keys, per_minute, max_429s=FRED_KEY_MAX_429S, cooldown=FRED_KEY_COOLDOWN):
+        self.max_429s = max_429s
+        self.cooldown = cooldown
+        self.keys = [
+            {"key": key, "limiter": RateLimiter(per_minute), "errors": 0, "ejections": 0, "until": 0.0, "rate_limited": 0}
+            for key in keys
+        ]
+
+    @property
+    def acquired(self):
+        """Requests sent through the pool so far."""
+        return sum(entry["limiter"].acquired for entry in self.keys)
+
+    def set_rate(self, per_minute):
+        for entry in self.keys:
+            entry["limiter"].set_rate(per_minute)
+
+    async def get(self, client, url, params=None):
+        """
+        Send a GET request to FRED with a key from the pool, within that key's budget.
+
+        Args:
+            client (httpx.AsyncClient): Client to send the request with
+            url (str): FRED or GeoFRED endpoint
+            params (dict, optional): Query parameters, without the API key
+
+        Returns:
+            httpx.Response: The response (still a 429 if every key was rate limited)
+        """
+        if not self.keys:
+            raise Exception("FRED API key not configured")
+
+        params = dict(params or {})
+        tried = []
+        for _ in range(len(self.keys) + 1):
+            entry = await self._acquire(tried)
+            tried.append(entry)
+            params["api_key"] = entry["key"]
+            # an upstream call never outlives the request it's made for
+            timeout = {} if remaining() is None else {"timeout": cap(client.timeout.read or remaining())}
+            with phase("upstream"):
+                response = await client.get(url, params=params, **timeout)
+            if response.status_code != 429:
+                entry["errors"] = entry["ejections"] = 0
+                return response
+            self._rate_limited(entry, response.headers.get("Retry-After"))
+        return response
+
+    def stats(self):
+        now = time.monotonic()
+        return [
+            {
+                "key": f"...{entry['key'][-4:]}",
+                "healthy": entry["until"] <= now,
+                "requests": entry["limiter"].acquired,
+                "rate_limited": entry["rate_limited"],
+                "cooldown_s": round(max(0.0, entry["until"] - now), 1),
+            }
+            for entry in self.keys
+        ]
+
+    async def _acquire(self, tried=()):
+        now = time.monotonic()
+        healthy = [entry for entry in self.keys if entry["until"] <= now]
+        # a retry after a 429 goes to a key this request hasn't used yet, if there's one left
+        untried = [entry for entry in healthy if entry not in tried]
+        healthy = untried or healthy
+        if not healthy:
+            # every key is cooling down: wait for the first to come back
+            entry = min(self.keys, key=lambda entry: entry["until"])
+            await wait_or_expire(entry["until"] - now)
+        else:
+            entry = max(healthy, key=lambda entry: entry["limiter"].available())
+        await entry["limiter"].acquire()
+        return entry
+
+    def _rate_limited(self, entry, retry_after=None):
+        entry["rate_limited"] += 1
+        entry["errors"] += 1
+        if retry_after and retry_after.isdigit():
+            # FRED said how long to back off
+            entry["until"] = time.monotonic() + int(retry_after)
+        elif entry["errors"] >= self.max_429s:
+            entry["ejections"] += 1
+            entry["errors"] = 0
+            entry["until"] = time.monotonic() + min(self.cooldown * 2 ** min(entry["ejections"] - 1, 10), 3600)
+            print(f"FRED key ...{entry['key'][-4:]} rate limited {self.max_429s} times in a row, "
+                  f"out of rotation for {entry['until'] - time.monotonic():.0f}s")
+
+
+# shared by everything that calls the FRED API, which allows FRED_RATE_LIMIT requests a minute per key
+fred_keys = KeyPool(FRED_API_KEYS, FRED_RATE_LIMIT)
@@ -0,0 +1,236 @@
+import asyncio
+import os
+import secrets
+import socket
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from app.config import UPDATES_POLL_INTERVAL
+
+# FRED's series/updates feed takes its start/end times in US Central time
+FRED_TIMEZONE = ZoneInfo("America/Chicago")
+
+# how often a tracked series' own metadata is checked, by native frequency (seconds);
+# the updates feed normally catches changes first, this is the fallback
+METADATA_CHECK_INTERVALS = {
+    "D": 3600,
+    "W": 6 * 3600,
+    "BW": 12 * 3600,
+    "M": 12 * 3600,
+    "Q": 24 * 3600,
+    "SA": 48 * 3600,
+    "A": 48 * 3600,
+}
+DEFAULT_CHECK_INTERVAL = 12 * 3600
+
+# shared cache keys the workers coordinate through: which worker holds the
+# lease (and polls FRED), the series every worker has cached, and when the
+# updates feed was last read
+LEASE_KEY = "refresh:lease"
+TRACKED_KEY = "refresh:tracked"
+LAST_POLL_KEY = "refresh:last_poll"
+
+# the lease lasts this many ticks without renewal, so another worker takes over
+# a few minutes after the holder dies
+LEASE_TICKS = 3
+
+# FRED only keeps two weeks of the updates feed
+MAX_UPDATES_WINDOW = timedelta(days=13)
+
+class RefreshScheduler:
+    """
+    Keeps cached FRED series fresh based on what FRED actually updated.
+
+    Every poll_interval the scheduler reads FRED's series/updates feed (one
+    call covers every recently updated series) and refreshes only the tracked
+    series whose last_updated changed. Each tracked series' own metadata is
+    also checked at an interval matching its native frequency, so daily series
+    are checked hourly while quarterly ones are left alone for a day.
+
+    Every worker runs a scheduler, but only the one holding a lease in the
+    shared cache polls FRED. The others share the series they have cached,
+    so the lease holder keeps those fresh too. With the in-process cache each
+    worker has its own cache, and so its own lease.
+    """
+
+    def __init__(self, fred_service, poll_interval=UPDATES_POLL_INTERVAL, tick=60, cache=None):
+        self.fred_service = fred_service
+        self.cache = cache or fred_service.cache
+        self.poll_interval = poll_interval
+        self.tick = tick
+        self.lease_ttl = LEASE_TICKS * tick
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+        self.listeners = []  # callbacks receiving the new latest value of each refreshed series
+        self.stats = {"feed_polls": 0, "metadata_checks": 0, "refreshed": 0, "errors": 0, "lease_held": False}
+        self._last_poll = None
+        self._last_feed_poll = None  # time.monotonic() of this worker's last feed poll
+        self._next_check = {}  # series_id -> time.monotonic() of its next metadata check
+        self._task = None
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.stats["lease_held"]:
+            # let another worker take over right away instead of after the lease runs out
+            await self.cache.try_delete(LEASE_KEY)
+            self.stats["lease_held"] = False
+
+    async def run_once(self):
+        """
+        One round of the scheduler: share the series this worker has cached, then,
+        if this worker holds the lease, poll the updates feed (when due) and check
+        the series whose metadata check is due.
+
+        Returns:
+            list: IDs of the series that were refreshed
+        """
+        await self._share_tracked()
+        if not await self._hold_lease():
+            return []
+
+        refreshed = []
+        if self._last_feed_poll is None or time.monotonic() - self._last_feed_poll >= self.poll_interval:
+            self._last_feed_poll = time.monotonic()
+            try:
+                refreshed += await self.poll_updates()
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Error polling FRED series updates: {str(e)}")
+
+        refreshed += await self.check_due_series()
+        return refreshed
+
+    async def poll_updates(self, now=None):
+        """
+        Read the updates feed since the last poll and refresh the tracked series that changed.
+
+        Returns:
+            list: IDs of the series that were refreshed
+        """
+        now = now or datetime.now(FRED_TIMEZONE)
+        tracked = self.fred_service.tracked_series
+        if not tracked:
+            # nothing cached yet, so nothing can be stale
+            self._last_poll = now
+            return []
+
+        # whichever worker polled last, continue from there
+        shared = await self.cache.try_get(LAST_POLL_KEY)
+        last_poll = datetime.fromisoformat(shared) if shared else self._last_poll
+        # overlap the previous window a little so nothing falls between two polls
+        start_time = (last_poll or now - timedelta(seconds=self.poll_interval)) - timedelta(minutes=5)
+        start_time = max(start_time, now - MAX_UPDATES_WINDOW)
+        updates = await self.fred_service.get_series_updates(start_time, now)
+        self._last_poll = now
+        await self.cache.try_set(LAST_POLL_KEY, now.isoformat(), MAX_UPDATES_WINDOW.total_seconds())
+        self.stats["feed_polls"] += 1
+
+        changed = {
+            update["id"] for update in updates
+            if update.get("id") in tracked and update.get("last_updated") != tracked[update["id"]].get("last_updated")
+        }
+        for series_id in changed:
+            await self._refresh(series_id)
+        return sorted(changed)
+
+    async def check_due_series(self, now=None):
+        """
+        Check the metadata of tracked series whose check interval has passed.
+
+        Returns:
+            list: IDs of the series that were refreshed
+        """
+        now = now if now is not None else time.monotonic()
+        refreshed = []
+        for series_id, info in list(self.fred_service.tracked_series.items()):
+            interval = METADATA_CHECK_INTERVALS.get((info.get("frequency") or "").upper(), DEFAULT_CHECK_INTERVAL)
+            if series_id not in self._next_check:
+                # just started tracking it, so the cached metadata is fresh
+                self._next_check[series_id] = now + interval
+                continue
+            if self._next_check[series_id] > now:
+                continue
+
+            self._next_check[series_id] = now + interval
+            previous = info.get("last_updated")
+            try:
+                last_updated = await self.fred_service.get_last_updated(series_id)
+                self.stats["metadata_checks"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Error checking {series_id} for updates: {str(e)}")
+                continue
+
+            if last_updated != previous:
+                await self._refresh(series_id)
+                refreshed.append(series_id)
+        return refreshed
+
+    async def _hold_lease(self):
+        """Take or renew the lease; whether this worker holds it."""
+        holder = await self.cache.try_get(LEASE_KEY)
+        if holder == self.worker_id:
+            await self.cache.try_set(LEASE_KEY, self.worker_id, self.lease_ttl)
+            held = True
+        elif holder is None:
+            try:
+                held = await self.cache.add(LEASE_KEY, self.worker_id, self.lease_ttl)
+            except Exception as e:
+                print(f"Error taking the refresh lease: {str(e)}")
+                held = False
+        else:
+            held = False
+
+        if held != self.stats["lease_held"]:
+            print(f"Refresh scheduler {'now polls FRED from' if held else 'stopped polling FRED in'} worker {os.getpid()}")
+        self.stats["lease_held"] = held
+        return held
+
+    async def _share_tracked(self):
+        """Publish the series this worker has cached and pick up those of the other workers."""
+        shared = await self.cache.try_get(TRACKED_KEY) or {}
+        self.fred_service.add_tracked(shared)
+        mine = self.fred_service.tracked_state()
+        if self.stats["lease_held"]:
+            # the lease holder's last_updated values are the ones it refreshed to
+            merged = {**shared, **mine}
+        else:
+            merged = {**mine, **shared}
+            for series_id, info in mine.items():
+                keys = set(merged[series_id].get("range_keys", ())) | set(info["range_keys"])
+                merged[series_id] = {**merged[series_id], "range_keys": sorted(keys)}
+        if merged != shared:
+            await self.cache.try_set(TRACKED_KEY, merged, self.fred_service.series_ttl)
+
+    async def _refresh(self, series_id):
+        try:
+            latest = await self.fred_service.refresh_series(series_id)
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"Error refreshing {series_id}: {str(e)}")
+            return
+
+        self.stats["refreshed"] += 1
+        for listener in self.listeners:
+            listener(latest)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Error in the refresh scheduler: {str(e)}")
+            await asyncio.sleep(self.tick)
@@ -0,0 +1,277 @@
+import csv
+import json
+import re
+import numpy as np
+
+# geography levels, from the top of the hierarchy down
+REGION_LEVELS = ("state", "msa", "county")
+
+# state FIPS code -> postal code (county FIPS codes start with their state's)
+STATE_FIPS = {
+    "01": "AL", "02": "AK", "04": "AZ", "05": "AR", "06": "CA", "08": "CO", "09": "CT", "10": "DE",
+    "11": "DC", "12": "FL", "13": "GA", "15": "HI", "16": "ID", "17": "IL", "18": "IN", "19": "IA",
+    "20": "KS", "21": "KY", "22": "LA", "23": "ME", "24": "MD", "25": "MA", "26": "MI", "27": "MN",
+    "28": "MS", "29": "MO", "30": "MT", "31": "NE", "32": "NV", "33": "NH", "34": "NJ", "35": "NM",
+    "36": "NY", "37": "NC", "38": "ND", "39": "OH", "40": "OK", "41": "OR", "42": "PA", "44": "RI",
+    "45": "SC", "46": "SD", "47": "TN", "48": "TX", "49": "UT", "50": "VT", "51": "VA", "53": "WA",
+    "54": "WV", "55": "WI", "56": "WY",
+}
+
+# months between observations, by GeoFRED frequency code
+FREQUENCY_MONTHS = {"m": 1, "q": 3, "sa": 6, "a": 12}
+
+# "Dallas-Fort Worth-Arlington, TX" -> "TX"; "Kansas City, MO-KS" -> "MO-KS"
+MSA_STATES = re.compile(r",\s*([A-Z]{2}(?:-[A-Z]{2})*)\b")
+
+# quantiles splitting a choropleth into five colour classes
+CLASS_QUANTILES = (0.2, 0.4, 0.6, 0.8)
+
+
+class RegionalPanel:
+    """
+    One indicator for every region of one geography level: a row per date, a column per region.
+
+    Regions that didn't report on a date are NaN.
+    """
+
+    __slots__ = ("dates", "codes", "names", "series_ids", "values")
+
+    def __init__(self, dates, codes, names, series_ids, values):
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.codes = np.asarray(codes, dtype=str)
+        self.names = np.asarray(names, dtype=str)
+        self.series_ids = np.asarray(series_ids, dtype=str)
+        self.values = np.asarray(values, dtype=np.float64).reshape(len(self.dates), len(self.codes))
+
+    def __len__(self):
+        return len(self.dates)
+
+    def merge(self, other):
+        """Combine two panels; other's values (and region names) replace ours where both have them."""
+        codes, first = np.unique(np.concatenate([other.codes, self.codes]), return_index=True)
+        names = np.concatenate([other.names, self.names])[first]
+        series_ids = np.concatenate([other.series_ids, self.series_ids])[first]
+
+        dates = np.concatenate([other.dates, self.dates])
+        values = np.full((len(dates), len(codes)), np.nan)
+        values[:len(other.dates), np.searchsorted(codes, other.codes)] = other.values
+        values[len(other.dates):, np.searchsorted(codes, self.codes)] = self.values
+        # np.unique keeps the first occurrence of each date, which is other's
+        dates, rows = np.unique(dates, return_index=True)
+        return RegionalPanel(dates, codes, names, series_ids, values[rows])
+
+    def cross_section(self, date=None):
+        """
+        Every region's value on a date: the last date at or before it that has data (default: the latest).
+
+        Returns:
+            tuple: (date as YYYY-MM-DD or None, values aligned with self.codes)
+        """
+        reported = ~np.isnan(self.values).all(axis=1)
+        if date is not None:
+            reported &= self.dates <= np.datetime64(date, "D")
+        rows = np.flatnonzero(reported)
+        if not rows.size:
+            return None, np.full(len(self.codes), np.nan)
+        return str(self.dates[rows[-1]]), self.values[rows[-1]]
+
+    def history(self, code):
+        """One region's observations as [{date, value}] records."""
+        column = np.flatnonzero(self.codes == code)
+        if not column.size:
+            return None
+        values = self.values[:, column[0]]
+        keep = ~np.isnan(values)
+        return [{"date": str(date), "value": float(value)} for date, value in zip(self.dates[keep], values[keep])]
+
+    def save(self, path):
+        np.savez(
+            path, dates=self.dates.astype(np.int64), codes=self.codes, names=self.names,
+            series_ids=self.series_ids, values=self.values
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(
+                data["dates"].astype("datetime64[D]"), data["codes"], data["names"], data["series_ids"], data["values"]
+            )
+
+
+def region_code(code, level):
+    """GeoFRED's code for a region in the form the API uses: postal codes for states, FIPS/CBSA codes otherwise."""
+    code = str(code).strip()
+    if level == "state":
+        return STATE_FIPS.get(code.zfill(2), code)
+    if level == "county":
+        return code.zfill(5)
+    return code
+
+
+def parse_regional_data(text, level):
+    """
+    Parse a GeoFRED regional/data response (every region of a series group, for one or more dates).
+
+    Returns:
+        RegionalPanel: The regions and dates in the response
+    """
+    data = json.loads(text).get("meta", {}).get("data") or {}
+    regions = {}
+    for rows in data.values():
+        for row in rows or []:
+            regions.setdefault(region_code(row["code"], level), (row.get("region", ""), row.get("series_id", "")))
+
+    codes = sorted(regions)
+    column = {code: index for index, code in enumerate(codes)}
+    dates = sorted(data)
+    values = np.full((len(dates), len(codes)), np.nan)
+    for row_index, date in enumerate(dates):
+        for row in data[date] or []:
+            value = row.get("value")
+            try:
+                values[row_index, column[region_code(row["code"], level)]] = float(value)
+            except (TypeError, ValueError):
+                pass  # "." or null: no observation
+
+    return RegionalPanel(
+        np.array(dates, dtype="datetime64[D]"), codes,
+        [regions[code][0] for code in codes], [regions[code][1] for code in codes], values
+    )
+
+
+def period_dates(start, end, frequency):
+    """Observation dates of a monthly/quarterly/semiannual/annual series between two dates, as YYYY-MM-DD."""
+    step = FREQUENCY_MONTHS.get(frequency.lower())
+    if step is None:
+        # daily or weekly groups aren't stored as panels: just the latest date
+        return [end]
+    last = np.datetime64(end, "M")
+    first = np.datetime64(start, "M")
+    months = np.arange(last, first - 1, -step)[::-1]
+    return [str(month.astype("datetime64[D]")) for month in months]
+
+
+def load_delineation(path):
+    """
+    County FIPS code -> CBSA (metro area) code, from Census' CBSA delineation file saved as CSV.
+
+    The file has one row per county, with "CBSA Code", "FIPS State Code" and
+    "FIPS County Code" columns (title rows above the header are skipped).
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        lines = f.read().splitlines()
+    header = next((index for index, line in enumerate(lines) if "CBSA Code" in line), None)
+    if header is None:
+        raise ValueError(f"No 'CBSA Code' header in {path}")
+
+    counties = {}
+    for row in csv.DictReader(lines[header:]):
+        cbsa, state, county = row.get("CBSA Code"), row.get("FIPS State Code"), row.get("FIPS County Code")
+        if cbsa and state and county:
+            counties[state.strip().zfill(2) + county.strip().zfill(3)] = cbsa.strip()
+    return counties
+
+
+def parents(codes, names, level, delineation=None):
+    """
+    Where each region sits in the hierarchy.
+
+    Counties belong to the state in their FIPS code (and to a metro area if
+    the delineation lists them); metro areas to every state in their name.
+
+    Returns:
+        list: One dict per region, e.g. {"state": "CA", "msa": "31080"}
+    """
+    result = []
+    for code, name in zip(codes, names):
+        if level == "county":
+            entry = {"state": STATE_FIPS.get(str(code)[:2])}
+            if delineation and code in delineation:
+                entry["msa"] = delineation[code]
+        elif level == "msa":
+            match = MSA_STATES.search(str(name))
+            entry = {"states": match.group(1).split("-") if match else []}
+        else:
+            entry = {}
+        result.append(entry)
+    return result
+
+
+def build_choropleth(panel, level, date=None, delineation=None):
+    """
+    A map-ready response: every region's value on one date, plus colour class breaks.
+
+    Args:
+        panel (RegionalPanel): The indicator at one geography level
+        level (str): state, msa or county
+        date (str, optional): YYYY-MM-DD (default: the latest date with data)
+        delineation (dict, optional): County FIPS -> CBSA code
+
+    Returns:
+        dict: The date, the regions and summary statistics
+    """
+    date, values = panel.cross_section(date)
+    reported = values[~np.isnan(values)]
+
+    regions = []
+    for code, name, series_id, value, parent in zip(
+        panel.codes, panel.names, panel.series_ids, values, parents(panel.codes, panel.names, level, delineation)
+    ):
+        regions.append({
+            "code": str(code),
+            "name": str(name),
+            "series_id": str(series_id),
+            "value": None if np.isnan(value) else float(value),
+            **parent
+        })
+
+    summary = None
+    if reported.size:
+        summary = {
+            "count": int(reported.size),
+            "min": float(reported.min()),
+            "median": float(np.median(reported)),
+            "max": float(reported.max()),
+            "breaks": [round(float(value), 4) for value in np.quantile(reported, CLASS_QUANTILES)],
+        }
+    return {"level": level, "date": date, "regions": regions, "summary": summary}
+
+
+def build_geography(state_codes, msa_panel=None, county_panel=None, delineation=None):
+    """
+    The state -> metro area -> county hierarchy of the regions there's data for.
+
+    Counties the delineation doesn't place in a metro area (or all of them,
+    without a delineation) are listed directly under their state. Metro areas
+    spanning several states appear under each of them.
+    """
+    states = {
+        code: {"code": code, "name": name, "msas": [], "counties": []}
+        for code, name in state_codes.items()
+    }
+    msas = {}
+    if msa_panel is not None:
+        for code, name, parent in zip(msa_panel.codes, msa_panel.names, parents(msa_panel.codes, msa_panel.names, "msa")):
+            msas[str(code)] = {"code": str(code), "name": str(name), "counties": []}
+            for state in parent["states"]:
+                if state in states:
+                    states[state]["msas"].append(msas[str(code)])
+
+    county_count = 0
+    if county_panel is not None:
+        for code, name, parent in zip(
+            county_panel.codes, county_panel.names, parents(county_panel.codes, county_panel.names, "county", delineation)
+        ):
+            county = {"code": str(code), "name": str(name)}
+            if parent.get("msa") in msas:
+                msas[parent["msa"]]["counties"].append(county)
+            elif parent["state"] in states:
+                states[parent["state"]]["counties"].append(county)
+            else:
+                continue
+            county_count += 1
+
+    return {
+        "counts": {"state": len(states), "msa": len(msas), "county": county_count},
+        "states": list(states.values())
+    }
@@ -1,18 +1,28 @@
+import asyncio
 import httpx
-import pandas as pd
-from fredapi import Fred
 import json
+import os
 import random
+import time
+from collections import deque
 from datetime import datetime, timedelta
-from app.config import FRED_API_KEY
+from app.config import (
+    FRED_API_KEY, FRED_BASE_URL, GEOFRED_BASE_URL, CACHE_TTL_LATEST, CACHE_TTL_METADATA, REGIONAL_PANEL_DIR,
+    REGIONAL_PANEL_YEARS, REGIONAL_PANEL_MAX_AGE, REGIONAL_FETCH_CONCURRENCY, REGIONAL_BATCH_DATES, CBSA_DELINEATION_PATH
+)
+from app.api.services.cache import MemoryCache
+from app.profiling import phase
+from app.api.services.rate_limit import fred_keys
+from app.executor import run_cpu
+from app.deadlines import detach
 
 class RegionalService:
     """Service for handling regional economic data from FRED."""
     
-    def __init__(self):
+    def __init__(self, cache=None):
         self.api_key = FRED_API_KEY
-        self.fred = Fred(api_key=self.api_key) if self.api_key else None
-        self.base_url = "https://api.stlouisfed.org/fred"
+        self.cache = cache or MemoryCache()
+        self.base_url = FRED_BASE_URL
         
         # State code to name mapping
         self.state_codes = {
@@ -49,6 +59,44 @@ class RegionalService:
                 'units': 'dollars'
             }
         }
+
+        # Additional metrics to show when a state is selected
+        # Each would have its own FRED series ID pattern
+        self.additional_indicators = [
+            {
+                'id': 'GDP',
+                'name': 'Gross State Product',
+                'pattern': 'RGSP{state_code}',
+                'formatter': 'currency'
+            },
+            {
+                'id': 'POPGROWTH',
+                'name': 'Population Growth',
+                'pattern': 'SPPOP{state_code}',
+                'formatter': 'percent'
+            }
+        ]
+
+        # Indicators available below the state level, as a state -> metro area (MSA) -> county
+        # hierarchy. Any one series of a GeoFRED series group identifies the group, and the
+        # group's regional data covers every region of that level in a single request
+        self.panel_indicators = {
+            'UNRATE': {
+                'name': 'Unemployment Rate',
+                'units': 'percent',
+                'series': {'state': 'CAUR', 'msa': 'LOSA106URN', 'county': 'CALOSA7URN'}
+            },
+            'PCPI': {
+                'name': 'Per Capita Personal Income',
+                'units': 'dollars',
+                'series': {'state': 'CAPCPI', 'msa': 'PCPI31080', 'county': 'PCPI06037'}
+            }
+        }
+        self.panel_dir = REGIONAL_PANEL_DIR
+        self._panels = {}  # (indicator, level) -> (file modification time, RegionalPanel)
+        self._panel_locks = {}
+        self._panel_updates = {}  # (indicator, level) -> task updating the panel
+        self._delineation = None
     
     async def get_regional_data(self, indicator):
         """Get data for all states for a given indicator."""
@@ -57,7 +105,16 @@ class RegionalService:
         
         if indicator not in self.regional_indicators:
             raise Exception(f"Indicator {indicator} not supported for regional data")
-            
+
+        # one cached copy serves every worker instead of 51 upstream calls per request
+        return await self.cache.get_or_set(
+            f"regional:{indicator}",
+            lambda: self._fetch_regional_data(indicator),
+            CACHE_TTL_LATEST
+        )
+
+    async def _fetch_regional_data(self, indicator):
+        """Fetch the latest value for every state from FRED (see get_regional_data)."""
         indicator_info = self.regional_indicators[indicator]
         states_data = []
         
@@ -76,13 +133,12 @@ class RegionalService:
                     url = f"{self.base_url}/series/observations"
                     params = {
                         "series_id": "MSPUS",  # Median Sales Price of Houses Sold for US
-                        "api_key": self.api_key,
                         "file_type": "json",
                         "sort_order": "desc",
                         "limit": 1
                     }
                     
-                    response = await client.get(url, params=params)
+                    response = await fred_keys.get(client, url, params=params)
                     response.raise_for_status()
                     data = response.json()
                     
@@ -137,13 +193,12 @@ class RegionalService:
                         url = f"{self.base_url}/series/observations"
                         params = {
                             "series_id": series_id,
-                            "api_key": self.api_key,
                             "file_type": "json",
                             "sort_order": "desc",
                             "limit": 1
                         }
                         
-                        response = await client.get(url, params=params)
+                        response = await fred_keys.get(client, url, params=params)
                         
                         # Some state-level series might not exist, so handle 404s gracefully
                         if response.status_code == 404:
@@ -152,7 +207,7 @@ class RegionalService:
                             alternative_series_id = f"{state_code}{alternative_series_id}"
                             
                             params["series_id"] = alternative_series_id
-                            response = await client.get(url, params=params)
+                            response = await fred_keys.get(client, url, params=params)
                             
                             if response.status_code == 404:
                                 # If still not found, add empty data for this state
@@ -217,7 +272,15 @@ class RegionalService:
             
         if state_code not in self.state_codes:
             raise Exception(f"Invalid state code: {state_code}")
-            
+
+        return await self.cache.get_or_set(
+            f"regional:{indicator}:{state_code}",
+            lambda: self._fetch_state_data(indicator, state_code),
+            CACHE_TTL_LATEST
+        )
+
+    async def _fetch_state_data(self, indicator, state_code):
+        """Fetch detailed state data from FRED (see get_state_data)."""
         indicator_info = self.regional_indicators[indicator]
         series_id = indicator_info['pattern'].format(state_code=state_code)
         
@@ -228,13 +291,12 @@ class RegionalService:
                 url = f"{self.base_url}/series/observations"
                 params = {
                     "series_id": series_id,
-                    "api_key": self.api_key,
                     "file_type": "json",
                     "sort_order": "desc",
                     "limit": 1
                 }
                 
-                response = await client.get(url, params=params)
+                response = await fred_keys.get(client, url, params=params)
                 
                 # If not found with this pattern, try alternative pattern
                 if response.status_code == 404:
@@ -242,7 +304,7 @@ class RegionalService:
                     alternative_series_id = f"{state_code}{alternative_series_id}"
                     
                     params["series_id"] = alternative_series_id
-                    response = await client.get(url, params=params)
+                    response = await fred_keys.get(client, url, params=params)
                 
                 # If it's still 404 and we're looking for house prices, use simulated data
                 if response.status_code == 404 and indicator == 'MSPUS':
@@ -307,25 +369,7 @@ class RegionalService:
         """Get additional economic metrics for a state."""
         metrics = []
         
-        # Define which additional metrics to get for each state
-        additional_indicators = [
-            # Additional metrics to show when a state is selected
-            # Each would have its own FRED series ID pattern
-            {
-                'id': 'GDP',
-                'name': 'Gross State Product',
-                'pattern': 'RGSP{state_code}',
-                'formatter': 'currency'
-            },
-            {
-                'id': 'POPGROWTH',
-                'name': 'Population Growth',
-                'pattern': 'SPPOP{state_code}',
-                'formatter': 'percent'
-            }
-        ]
-        
-        for indicator in additional_indicators:
+        for indicator in self.additional_indicators:
             series_id = indicator['pattern'].format(state_code=state_code)
             
             try:
@@ -333,13 +377,12 @@ class RegionalService:
                     url = f"{self.base_url}/series/observations"
                     params = {
                         "series_id": series_id,
-                        "api_key": self.api_key,
                         "file_type": "json",
                         "sort_order": "desc",
                         "limit": 1
                     }
                     
-                    response = await client.get(url, params=params)
+                    response = await fred_keys.get(client, url, params=params)
                     
                     # Skip if series doesn't exist
                     if response.status_code == 404:
@@ -432,6 +475,213 @@ class RegionalService:
         
         return f"Economic overview for {state_name} is not available for the selected indicator."
     
+    async def get_choropleth(self, indicator, level="county", date=None):
+        """
+        Every region's value for an indicator on one date, ready to draw as a map.
+
+        Args:
+            indicator (str): A key of panel_indicators (e.g., UNRATE)
+            level (str): state, msa or county
+            date (str, optional): YYYY-MM-DD (default: the latest date with data)
+
+        Returns:
+            dict: The regions (code, name, value, parent state/metro area) and colour class breaks
+        """
+        panel, version = await self.get_panel(indicator, level)
+        return await self.cache.get_or_set(
+            f"choropleth:{indicator}:{level}:{date or 'latest'}:{version}",
+            lambda: self._build_choropleth(indicator, level, panel, date),
+            CACHE_TTL_METADATA
+        )
+
+    async def get_region_history(self, indicator, level, code):
+        """The stored history of one region (state postal code, CBSA code or county FIPS code)."""
+        panel, _ = await self.get_panel(indicator, level)
+        with phase("analytics"):
+            history = panel.history(code)
+        if history is None:
+            raise ValueError(f"No {level} with code {code} for {indicator}")
+        return {"indicator": indicator, "level": level, "code": code, "data": history}
+
+    async def get_geography(self):
+        """The state -> metro area -> county hierarchy of every region with unemployment data."""
+        from app.api.services.regional_panel import build_geography
+
+        msa_panel, msa_version = await self.get_panel("UNRATE", "msa")
+        county_panel, county_version = await self.get_panel("UNRATE", "county")
+        return await self.cache.get_or_set(
+            f"geography:{msa_version}:{county_version}",
+            lambda: run_cpu(build_geography, self.state_codes, msa_panel, county_panel, self._get_delineation()),
+            CACHE_TTL_METADATA
+        )
+
+    async def get_panel(self, indicator, level):
+        """
+        The stored panel for an indicator and geography level, fetched or updated first if needed.
+
+        The panel lives in a file shared by all workers; one that another worker
+        updated is reloaded instead of fetched again.
+
+        Returns:
+            tuple: (RegionalPanel, version of the stored file)
+        """
+        from app.api.services.regional_panel import RegionalPanel, REGION_LEVELS
+
+        if indicator not in self.panel_indicators:
+            raise ValueError(f"Indicator {indicator} not supported below the state level")
+        if level not in REGION_LEVELS:
+            raise ValueError(f"Invalid geography level: {level} (expected one of {', '.join(REGION_LEVELS)})")
+
+        key = (indicator, level)
+        path = os.path.join(self.panel_dir, f"{indicator}_{level}.npz")
+        lock = self._panel_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            version, panel = self._panels.get(key, (0.0, None))
+            if os.path.exists(path) and os.path.getmtime(path) > version:
+                panel = await asyncio.to_thread(RegionalPanel.load, path)
+                version = os.path.getmtime(path)
+                self._panels[key] = (version, panel)
+
+            if panel is None or time.time() - version > REGIONAL_PANEL_MAX_AGE:
+                update = self._panel_updates.get(key)
+                if update is None or update.done():
+                    # the download outlives the request that started it (its deadline or
+                    # disconnect), so a slow first fetch still completes for everyone after
+                    update = self._panel_updates[key] = detach(self._update_panel(indicator, level, panel, path))
+                try:
+                    panel, version = await asyncio.shield(update)
+                except Exception as e:
+                    print(f"Error updating {level} data for {indicator}: {str(e)}")
+                    if panel is None:
+                        raise Exception(f"Error fetching {level} data for {indicator}: {str(e)}")
+        return panel, version
+
+    async def _update_panel(self, indicator, level, panel, path):
+        """Fetch the dates missing from a stored panel (REGIONAL_PANEL_YEARS of them the first time) and save it."""
+        from app.api.services.regional_panel import period_dates
+
+        if not self.api_key:
+            raise Exception("FRED API key not configured")
+
+        group = await self._get_series_group(self.panel_indicators[indicator]['series'][level])
+        end = group["max_date"]
+        if panel is not None and len(panel):
+            # the last stored date is fetched again, it may have been revised or incomplete
+            start = str(panel.dates[-1])
+        else:
+            start = max(group["min_date"], f"{int(end[:4]) - REGIONAL_PANEL_YEARS}{end[4:]}")
+
+        fresh = await self._fetch_panel(group, level, period_dates(start, end, group["frequency"]))
+        panel = fresh if panel is None else panel.merge(fresh)
+
+        os.makedirs(self.panel_dir, exist_ok=True)
+        # write to a temporary file first so other workers never load a half-written one
+        temporary = f"{path}.{os.getpid()}.tmp.npz"
+        await asyncio.to_thread(panel.save, temporary)
+        os.replace(temporary, path)
+        version = os.path.getmtime(path)
+        self._panels[(indicator, level)] = (version, panel)
+
+        # precompute the latest map, so no request has to build it
+        await self.cache.try_set(
+            f"choropleth:{indicator}:{level}:latest:{version}",
+            await self._build_choropleth(indicator, level, panel),
+            CACHE_TTL_METADATA
+        )
+        return panel, version
+
+    async def _fetch_panel(self, group, level, dates):
+        """
+        Fetch a series group's data for every region on the given dates.
+
+        Dates are requested in batches of REGIONAL_BATCH_DATES by
+        REGIONAL_FETCH_CONCURRENCY workers, all through the shared FRED rate
+        limiter. Dates a batch didn't return are retried one at a time. If a
+        batch fails, the other workers are cancelled and its error is raised.
+        """
+        queue = deque(dates[i:i + REGIONAL_BATCH_DATES] for i in range(0, len(dates), REGIONAL_BATCH_DATES))
+        parts = []
+
+        async with httpx.AsyncClient(timeout=60) as client:
+            async def worker():
+                while queue:
+                    batch = queue.popleft()
+                    part = await self._fetch_regional_data_batch(client, group, level, batch)
+                    parts.append(part)
+                    if len(batch) > 1:
+                        returned = {str(date) for date in part.dates}
+                        queue.extend([date] for date in batch if date not in returned)
+
+            workers = [asyncio.create_task(worker()) for _ in range(REGIONAL_FETCH_CONCURRENCY)]
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                # once one batch fails the panel is lost anyway: stop the others
+                # spending rate-limit tokens on it before the client closes
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            raise Exception(f"No {level} data returned for series group {group['series_group']}")
+        panel = parts[0]
+        for part in parts[1:]:
+            panel = panel.merge(part)
+        return panel
+
+    async def _fetch_regional_data_batch(self, client, group, level, dates):
+        from app.api.services.regional_panel import parse_regional_data
+
+        params = {
+            "file_type": "json",
+            "series_group": group["series_group"],
+            "region_type": level,
+            "season": group["season"],
+            "units": group["units"],
+            "frequency": group["frequency"],
+            "date": dates[-1]
+        }
+        if len(dates) > 1:
+            params["start_date"] = dates[0]
+
+        response = await fred_keys.get(client, f"{GEOFRED_BASE_URL}/regional/data", params=params)
+        response.raise_for_status()
+        return await run_cpu(parse_regional_data, response.text, level)
+
+    async def _get_series_group(self, series_id):
+        """GeoFRED's series group of a series: its id, region type, units, frequency, season and date range."""
+        async def fetch():
+            params = {"series_id": series_id, "file_type": "json"}
+            async with httpx.AsyncClient() as client:
+                response = await fred_keys.get(client, f"{GEOFRED_BASE_URL}/series/group", params=params)
+                response.raise_for_status()
+            group = response.json().get("series_group")
+            return group[0] if isinstance(group, list) else group
+
+        return await self.cache.get_or_set(f"geofred:group:{series_id}", fetch, CACHE_TTL_METADATA)
+
+    async def _build_choropleth(self, indicator, level, panel, date=None):
+        from app.api.services.regional_panel import build_choropleth
+
+        info = self.panel_indicators[indicator]
+        with phase("analytics"):
+            choropleth = await run_cpu(build_choropleth, panel, level, date, self._get_delineation())
+        return {"indicator": indicator, "name": info['name'], "units": info['units'], **choropleth}
+
+    def _get_delineation(self):
+        """County -> metro area assignments from CBSA_DELINEATION_PATH ({} without one)."""
+        from app.api.services.regional_panel import load_delineation
+
+        if self._delineation is None:
+            self._delineation = {}
+            if CBSA_DELINEATION_PATH:
+                try:
+                    self._delineation = load_delineation(CBSA_DELINEATION_PATH)
+                except Exception as e:
+                    print(f"Error loading the CBSA delineation file: {str(e)}")
+        return self._delineation
+
     async def get_available_indicators(self):
         """Get list of available regional indicators."""
         indicators = []
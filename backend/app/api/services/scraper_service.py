@@ -1,38 +1,41 @@
 import httpx
-from bs4 import BeautifulSoup
-import pandas as pd
+import io
 import json
 from datetime import datetime
+from app.config import CACHE_TTL_SCRAPER
+from app.api.services.cache import MemoryCache
+from app.profiling import phase
+from app.executor import run_cpu
+from app.deadlines import cap
 
 class ScraperService:
     """Service for scraping economic data from various government websites."""
+
+    def __init__(self, cache=None):
+        self.cache = cache or MemoryCache()
+
+    async def _cached(self, key, scrape):
+        """Return a cached scrape result, scraping on a miss. Errors are not cached."""
+        return await self.cache.get_or_set(key, scrape, CACHE_TTL_SCRAPER, should_cache=lambda result: "error" not in result)
     
     async def scrape_treasury_yields(self):
         """
         Scrape current Treasury yield curve data from the U.S. Treasury website.
         Returns daily Treasury yield curve rates.
         """
+        return await self._cached("scraper:treasury_yields", self._scrape_treasury_yields)
+
+    async def _scrape_treasury_yields(self):
         try:
             url = "https://home.treasury.gov/resource-center/data-chart-center/interest-rates/daily-treasury-rates.csv/all/all?type=daily_treasury_yield_curve&field_tdr_date_value=all&page&_format=csv"
             
             async with httpx.AsyncClient() as client:
-                response = await client.get(url)
+                with phase("upstream"):
+                    response = await client.get(url, timeout=cap(client.timeout.read))
                 response.raise_for_status()
             
-                df = pd.read_csv(pd.StringIO(response.text))
-                
-                latest_date = df['Date'].max()
-                latest_data = df[df['Date'] == latest_date]
-                
-                yield_data = {}
-                for column in latest_data.columns:
-                    if column != 'Date':
-                        yield_data[column] = float(latest_data[column].iloc[0]) if not pd.isna(latest_data[column].iloc[0]) else None
-                
-                return {
-                    "date": latest_date,
-                    "yields": yield_data
-                }
+            # parsing the whole history is CPU-bound, so it runs in the executor
+            return await run_cpu(_parse_latest_treasury_yields, response.text)
                 
         except Exception as e:
             print(f"Error scraping Treasury yields: {str(e)}")
@@ -43,47 +46,82 @@ class ScraperService:
         Scrape recent FOMC statements from the Federal Reserve website.
         Returns links to the most recent FOMC statements.
         """
+        return await self._cached("scraper:fomc_statements", self._scrape_fomc_statements)
+
+    async def _scrape_fomc_statements(self):
         try:
             url = "https://www.federalreserve.gov/monetarypolicy/fomccalendars.htm"
             
             async with httpx.AsyncClient() as client:
-                response = await client.get(url)
+                with phase("upstream"):
+                    response = await client.get(url, timeout=cap(client.timeout.read))
                 response.raise_for_status()
-                
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                statements = []
-                
-                # looking for links containing "statement"
-                statement_links = soup.find_all('a', href=lambda href: href and 'statement' in href.lower())
-                
-                for link in statement_links[:5]:  # Get the 5 most recent statements
-                    statement_url = link['href']
-                    if not statement_url.startswith('http'):
-                        if statement_url.startswith('/'):
-                            statement_url = f"https://www.federalreserve.gov{statement_url}"
-                        else:
-                            statement_url = f"https://www.federalreserve.gov/{statement_url}"
-                    
-                    date_text = None
-                    parent = link.parent
-                    for _ in range(3):
-                        if parent and parent.text:
-                            text = parent.text.strip()
-                            if text and len(text) > 5:
-                                date_text = text[:50]  # limit the length
-                                break
-                        if parent:
-                            parent = parent.parent
-                    
-                    statements.append({
-                        "title": link.text.strip() or "FOMC Statement",
-                        "url": statement_url,
-                        "date_context": date_text
-                    })
-                
-                return {"statements": statements}
+            
+            return await run_cpu(_parse_fomc_statements, response.text)
                 
         except Exception as e:
             print(f"Error scraping FOMC statements: {str(e)}")
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
+
+
+# the parsers are module-level functions so they can run in the CPU executor's worker processes
+
+def _parse_latest_treasury_yields(text):
+    """Pick the most recent curve out of Treasury's daily yield curve CSV."""
+    # heavy parsing libraries are imported on first use to keep startup fast
+    import pandas as pd
+
+    df = pd.read_csv(io.StringIO(text))
+    
+    # dates are MM/DD/YYYY, so they have to be compared as dates rather than strings
+    latest_date = df['Date'].iloc[pd.to_datetime(df['Date'], format="%m/%d/%Y").argmax()]
+    latest_data = df[df['Date'] == latest_date]
+    
+    yield_data = {}
+    for column in latest_data.columns:
+        if column != 'Date':
+            yield_data[column] = float(latest_data[column].iloc[0]) if not pd.isna(latest_data[column].iloc[0]) else None
+    
+    return {
+        "date": latest_date,
+        "yields": yield_data
+    }
+
+
+def _parse_fomc_statements(html):
+    """Extract links to the most recent FOMC statements from the FOMC calendar page."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    statements = []
+    
+    # looking for links containing "statement"
+    statement_links = soup.find_all('a', href=lambda href: href and 'statement' in href.lower())
+    
+    for link in statement_links[:5]:  # Get the 5 most recent statements
+        statement_url = link['href']
+        if not statement_url.startswith('http'):
+            if statement_url.startswith('/'):
+                statement_url = f"https://www.federalreserve.gov{statement_url}"
+            else:
+                statement_url = f"https://www.federalreserve.gov/{statement_url}"
+        
+        date_text = None
+        parent = link.parent
+        for _ in range(3):
+            if parent and parent.text:
+                text = parent.text.strip()
+                if text and len(text) > 5:
+                    date_text = text[:50]  # limit the length
+                    break
+            if parent:
+                parent = parent.parent
+        
+        statements.append({
+            "title": link.text.strip() or "FOMC Statement",
+            "url": statement_url,
+            "date_context": date_text
+        })
+    
+    return {"statements": statements}
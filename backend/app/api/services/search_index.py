@@ -0,0 +1,193 @@
+import bisect
+import gzip
+import json
+import os
+import re
+
+# how much a query term matching each field counts towards a series' score
+FIELD_WEIGHTS = {
+    "id": 8.0,
+    "title": 4.0,
+    "tags": 2.0,
+    "units": 1.0,
+    "frequency": 1.0,
+    "notes": 0.5,
+}
+# a term that only starts with what's been typed so far counts for less than a whole word
+PREFIX_DISCOUNT = 0.6
+# notes are long; only their beginning is indexed (and kept in the snapshot)
+MAX_NOTES_LENGTH = 500
+# searches remembered per index, so repeated keystrokes are dictionary lookups
+MAX_CACHED_QUERIES = 2048
+
+STOPWORDS = frozenset("a an and are as at be by for from in is it of on or the this to with".split())
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+class SearchIndex:
+    """
+    Inverted index over FRED series metadata.
+
+    Every term of a series' id, title, tags, units, frequency and notes maps
+    to the series it appears in, with a weight for the fields it appears in.
+    The postings are stored in flat arrays in sorted term order, so all the
+    terms starting with the word still being typed form one contiguous slice
+    found with a binary search, and scoring a query is a handful of array
+    operations however many series match.
+    """
+
+    def __init__(self, series):
+        import numpy as np
+
+        self.series = list(series)
+        postings = {}
+        for doc, entry in enumerate(self.series):
+            weights = {}
+            for field, weight in FIELD_WEIGHTS.items():
+                value = entry.get(field)
+                if field == "tags":
+                    value = " ".join(value or [])
+                elif field == "notes":
+                    value = (value or "")[:MAX_NOTES_LENGTH]
+                for term in set(tokenize(value)):
+                    if field == "notes" and term in STOPWORDS:
+                        continue
+                    weights[term] = weights.get(term, 0.0) + weight
+            for term, weight in weights.items():
+                postings.setdefault(term, []).append((doc, weight))
+
+        self.terms = sorted(postings)
+        # the postings of terms[i] are docs[offsets[i]:offsets[i + 1]] (and the same slice of weights)
+        sizes = np.array([len(postings[term]) for term in self.terms], dtype=np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)])
+        pairs = [pair for term in self.terms for pair in postings[term]]
+        self.docs = np.array([doc for doc, _ in pairs], dtype=np.int32)
+        self.weights = np.array([weight for _, weight in pairs], dtype=np.float32)
+        self.popularity = np.array([entry.get("popularity") or 0 for entry in self.series], dtype=np.float64)
+        self._results = {}
+
+    def __len__(self):
+        return len(self.series)
+
+    def search(self, query, limit=20):
+        """
+        Series matching every word of a query, best matches first.
+
+        The last word counts as a prefix unless the query ends with a space,
+        so "consumer pri" already finds the consumer price indexes.
+
+        Returns:
+            list: Metadata of the matching series, with their scores
+        """
+        key = (query.lower().lstrip(), limit)
+        results = self._results.get(key)
+        if results is None:
+            if len(self._results) >= MAX_CACHED_QUERIES:
+                self._results.clear()
+            results = self._results[key] = self._search(*key)
+        return results
+
+    def _search(self, query, limit):
+        import numpy as np
+
+        tokens = tokenize(query)
+        if not tokens or not self.series:
+            return []
+        complete = not query[-1].isalnum()
+        prefix = None if complete else tokens[-1]
+        words = set(tokens if complete else tokens[:-1])
+        words.discard(prefix)
+
+        scores = np.zeros(len(self.series), dtype=np.float32)
+        matches = np.zeros(len(self.series), dtype=np.int16)  # how many of the query's words each series has
+        for term in words:
+            start, end = self._term_range(term, exact=True)
+            if start == end:
+                return []
+            docs = self.docs[self.offsets[start]:self.offsets[end]]
+            scores[docs] += self.weights[self.offsets[start]:self.offsets[end]]
+            matches[docs] += 1
+
+        required = len(words)
+        if prefix is not None:
+            start, end = self._term_range(prefix)
+            if start == end:
+                return []
+            docs = self.docs[self.offsets[start]:self.offsets[end]]
+            weights = self.weights[self.offsets[start]:self.offsets[end]].copy()
+            # the prefix itself sorts first in its range; longer words count for less
+            whole = self.offsets[start + 1] - self.offsets[start] if self.terms[start] == prefix else 0
+            weights[whole:] *= PREFIX_DISCOUNT
+            # a series gets the weight of its best matching term, not the sum over e.g. every "s..." word
+            best = np.zeros(len(self.series), dtype=np.float32)
+            np.maximum.at(best, docs, weights)
+            scores += best
+            matches += best > 0
+            required += 1
+
+        found = np.flatnonzero(matches == required)
+        if not found.size:
+            return []
+        # popularity only breaks ties between equal scores
+        rank = scores[found] + self.popularity[found] * 1e-6
+        if found.size > limit:
+            keep = np.argpartition(-rank, limit)[:limit]
+            found, rank = found[keep], rank[keep]
+        order = np.argsort(-rank, kind="stable")
+        return [self._result(int(doc), float(scores[doc])) for doc in found[order]]
+
+    def _term_range(self, term, exact=False):
+        """Positions in self.terms of the term itself (exact) or of every term starting with it."""
+        start = bisect.bisect_left(self.terms, term)
+        if exact:
+            return (start, start + 1) if start < len(self.terms) and self.terms[start] == term else (start, start)
+        # "{" sorts right after "z", and terms only contain [a-z0-9]
+        return start, bisect.bisect_left(self.terms, term + "{", start)
+
+    def _result(self, doc, score):
+        entry = self.series[doc]
+        return {
+            "id": entry["id"],
+            "title": entry.get("title"),
+            "units": entry.get("units"),
+            "frequency": entry.get("frequency"),
+            "popularity": entry.get("popularity"),
+            "score": round(score, 2),
+        }
+
+
+def series_entry(info, tags=()):
+    """The part of a FRED series object kept in the snapshot."""
+    return {
+        "id": info["id"],
+        "title": info.get("title"),
+        "units": info.get("units"),
+        "frequency": info.get("frequency"),
+        "popularity": info.get("popularity"),
+        "tags": list(tags),
+        "notes": (info.get("notes") or "")[:MAX_NOTES_LENGTH],
+    }
+
+
+def build_index(series):
+    return SearchIndex(series)
+
+
+def load_snapshot(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_snapshot(path, snapshot):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # write to a temporary file first so other workers never load a half-written one
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(temporary, "wt", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    os.replace(temporary, path)
@@ -0,0 +1,135 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+from app.config import SEARCH_INDEX_PATH, SEARCH_INDEX_MAX_AGE, SEARCH_INDEX_TAGS, SEARCH_INDEX_REFRESH_ENABLED
+from app.profiling import phase
+from app.executor import run_cpu
+
+class SearchService:
+    """
+    Full-text and autocomplete search over FRED series metadata, answered locally.
+
+    The index is built from a snapshot file (SEARCH_INDEX_PATH) holding the
+    metadata of the series behind FRED's most popular tags. A background task
+    loads the snapshot when it changes and, once it's older than
+    SEARCH_INDEX_MAX_AGE, downloads a new one; searches never wait on FRED.
+    Until a snapshot exists only the app's own catalog is searchable.
+    The index is NumPy-backed, so its module is only imported on first use.
+    """
+
+    def __init__(self, fred_service, catalog=(), path=SEARCH_INDEX_PATH, max_age=SEARCH_INDEX_MAX_AGE,
+                 tag_count=SEARCH_INDEX_TAGS, refresh_enabled=SEARCH_INDEX_REFRESH_ENABLED, check_interval=3600):
+        self.fred_service = fred_service
+        self.path = path
+        self.max_age = max_age
+        self.tag_count = tag_count
+        self.refresh_enabled = refresh_enabled
+        self.check_interval = check_interval
+        # the indicators the app lists, searchable even before the first snapshot
+        self.catalog = [
+            {"id": indicator["id"], "title": indicator["name"], "tags": [indicator["category"].lower()]}
+            for indicator in catalog
+        ]
+        self.index = None
+        self.built_at = None
+        self._loaded_at = 0.0
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def search(self, query, limit=20):
+        """
+        Series whose metadata matches a query, best matches first.
+
+        Args:
+            query (str): Words to look for; the last one may be incomplete
+            limit (int): Maximum number of results
+
+        Returns:
+            dict: The results plus the size and age of the index
+        """
+        from app.api.services.search_index import build_index
+
+        if self.index is None:
+            self.index = build_index(self.catalog)
+        # a lookup takes a millisecond or two, so it isn't worth a trip to the executor
+        with phase("search"):
+            results = self.index.search(query, limit)
+        return {
+            "query": query,
+            "results": results,
+            "indexed": len(self.index),
+            "built_at": self.built_at
+        }
+
+    async def load(self):
+        """Load the snapshot file if it changed since it was last loaded (another worker may have rebuilt it)."""
+        from app.api.services.search_index import load_snapshot
+
+        if not os.path.exists(self.path) or os.path.getmtime(self.path) <= self._loaded_at:
+            return
+        modified = os.path.getmtime(self.path)
+        snapshot = await run_cpu(load_snapshot, self.path)
+        await self._use(snapshot, modified)
+
+    async def refresh(self):
+        """Download the metadata of the popular tags' series, save it as the new snapshot and switch to it."""
+        from app.api.services.search_index import series_entry, save_snapshot
+
+        tags = await self.fred_service.get_popular_tags(self.tag_count)
+        entries = {}
+        for tag in tags:
+            try:
+                tagged = await self.fred_service.get_tagged_series(tag)
+            except Exception as e:
+                print(f"Error fetching series tagged {tag}: {str(e)}")
+                continue
+            for info in tagged:
+                if info["id"] not in entries:
+                    entries[info["id"]] = series_entry(info)
+                entries[info["id"]]["tags"].append(tag)
+
+        if not entries:
+            raise Exception("No series metadata received from FRED")
+
+        snapshot = {
+            "built_at": datetime.now().isoformat(timespec="seconds"),
+            "tags": tags,
+            "series": list(entries.values())
+        }
+        await asyncio.to_thread(save_snapshot, self.path, snapshot)
+        await self._use(snapshot, os.path.getmtime(self.path))
+
+    async def _use(self, snapshot, modified):
+        from app.api.services.search_index import build_index
+
+        known = {entry["id"] for entry in snapshot["series"]}
+        series = snapshot["series"] + [entry for entry in self.catalog if entry["id"] not in known]
+        self.index = await run_cpu(build_index, series)
+        self.built_at = snapshot.get("built_at")
+        self._loaded_at = modified
+
+    def _is_stale(self):
+        return not os.path.exists(self.path) or time.time() - os.path.getmtime(self.path) > self.max_age
+
+    async def _run(self):
+        while True:
+            try:
+                await self.load()
+                if self.refresh_enabled and self._is_stale():
+                    await self.refresh()
+            except Exception as e:
+                print(f"Error updating the series search index: {str(e)}")
+            await asyncio.sleep(self.check_interval)
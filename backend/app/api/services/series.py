@@ -0,0 +1,336 @@
+import json
+import secrets
+import struct
+import numpy as np
+
+# header for the binary encoding: magic, format version, number of observations,
+# followed (from format 2) by the covered date range as day numbers and
+# (from format 3) by the data version and whether revisions are included
+_HEADER = struct.Struct("<4sBI")
+_COVERAGE = struct.Struct("<qq")
+_DATA_VERSION = struct.Struct("<IqB")
+_MAGIC = b"FSR1"
+_FORMAT = 3
+_NO_COVERAGE = -2 ** 63
+
+# FRED frequency codes, from highest to lowest frequency
+FREQUENCY_RANK = {"d": 0, "w": 1, "bw": 2, "m": 3, "q": 4, "sa": 5, "a": 6}
+
+# weekly frequencies and the weekday (Monday = 0) their periods end on
+WEEK_ENDINGS = {"wef": 4, "weth": 3, "wew": 2, "wetu": 1, "wem": 0, "wesu": 6, "wesa": 5}
+
+# how far before its label a period can begin: weekly periods are labelled by
+# their last day, monthly and longer ones by their first
+PERIOD_LOOKBACK_DAYS = {"w": 6}
+
+
+def frequency_group(frequency):
+    """Map a FRED frequency code (or frequency_short from series metadata) to d/w/bw/m/q/sa/a."""
+    frequency = (frequency or "").lower()
+    if frequency in WEEK_ENDINGS:
+        return "w"
+    if frequency.startswith("bw"):
+        return "bw"
+    return frequency if frequency in FREQUENCY_RANK else None
+
+
+def can_resample(native_frequency, frequency):
+    """
+    Whether a series at native_frequency can be aggregated to frequency locally.
+
+    Biweekly periods are left to FRED, since their alignment isn't derivable
+    from the data alone.
+    """
+    native, target = frequency_group(native_frequency), frequency_group(frequency)
+    if native is None or target is None or target == "bw":
+        return False
+    return FREQUENCY_RANK[target] > FREQUENCY_RANK[native]
+
+
+class Series:
+    """
+    Observations of one series held as parallel NumPy arrays.
+
+    dates is datetime64[D] and values float64, sorted by date. This takes
+    16 bytes per observation, versus several hundred for a list of
+    {"date": ..., "value": ...} dicts, and slices without copying.
+
+    covered is the (start, end) date range that was requested from FRED to
+    build the series, which can extend past the first and last observation.
+
+    Cached series also carry a data version: version goes up every time
+    merging in fresh data adds or changes observations, and revisions holds
+    the version in which each observation last changed. epoch identifies one
+    cached copy, since versions from different copies can't be compared.
+    """
+
+    __slots__ = ("dates", "values", "covered", "revisions", "version", "epoch")
+
+    # lets the cache recognise series without importing NumPy itself
+    cache_codec = "series"
+
+    def __init__(self, dates, values, covered=None, revisions=None, version=0, epoch=None):
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.values = np.asarray(values, dtype=np.float64)
+        self.covered = None
+        if covered is not None:
+            self.covered = (np.datetime64(covered[0], "D"), np.datetime64(covered[1], "D"))
+        self.revisions = None if revisions is None else np.asarray(revisions, dtype=np.int32)
+        self.version = version
+        self.epoch = epoch
+
+    @classmethod
+    def empty(cls, covered=None):
+        return cls(np.empty(0, dtype="datetime64[D]"), np.empty(0, dtype=np.float64), covered)
+
+    @classmethod
+    def from_observations(cls, observations, covered=None):
+        """
+        Decode FRED observations into a Series.
+
+        Missing values (FRED sends ".") are dropped and the result is sorted by date.
+        """
+        if not observations:
+            return cls.empty(covered)
+
+        dates = np.array([obs["date"] for obs in observations], dtype="datetime64[D]")
+        raw = [obs.get("value", ".") for obs in observations]
+        values = np.array([value if value not in (".", "") else "nan" for value in raw], dtype=np.float64)
+
+        keep = ~np.isnan(values)
+        dates, values = dates[keep], values[keep]
+        if len(dates) > 1 and (np.diff(dates.astype(np.int64)) < 0).any():
+            order = np.argsort(dates, kind="stable")
+            dates, values = dates[order], values[order]
+        return cls(dates, values, covered)
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def nbytes(self):
+        revisions = self.revisions.nbytes if self.revisions is not None else 0
+        return self.dates.nbytes + self.values.nbytes + revisions
+
+    @property
+    def version_token(self):
+        """Opaque token identifying this data version, handed to delta-sync clients."""
+        return f"{self.epoch or 0:08x}.{self.version}"
+
+    def slice(self, start=None, end=None):
+        """Observations between start and end (inclusive, YYYY-MM-DD), found by binary search."""
+        lo = 0 if start is None else np.searchsorted(self.dates, np.datetime64(start, "D"), side="left")
+        hi = len(self.dates) if end is None else np.searchsorted(self.dates, np.datetime64(end, "D"), side="right")
+        revisions = self.revisions[lo:hi] if self.revisions is not None else None
+        return Series(self.dates[lo:hi], self.values[lo:hi], revisions=revisions, version=self.version, epoch=self.epoch)
+
+    def changes_since(self, date, version_token=None):
+        """
+        What a client holding this series up to date (and at version_token) is missing.
+
+        Without a token only the newer observations can be worked out. A token
+        from another cached copy can't be compared at all, so the whole series
+        is returned and the client should replace what it holds.
+
+        Returns:
+            tuple: (newer, revised, reset) - observations after date, observations
+            on or before date that changed since the client's version, and
+            whether newer is the whole series
+        """
+        split = np.searchsorted(self.dates, np.datetime64(date, "D"), side="right")
+        newer = Series(self.dates[split:], self.values[split:])
+        if version_token is None:
+            return newer, Series.empty(), False
+
+        epoch, version = _parse_version_token(version_token)
+        if self.revisions is None or epoch != (self.epoch or 0):
+            return Series(self.dates, self.values), Series.empty(), True
+
+        changed = self.revisions[:split] > version
+        revised = Series(self.dates[:split][changed], self.values[:split][changed])
+        return newer, revised, False
+
+    def covers(self, start, end):
+        """Whether the covered range includes all of start..end."""
+        return (
+            self.covered is not None
+            and self.covered[0] <= np.datetime64(start, "D")
+            and np.datetime64(end, "D") <= self.covered[1]
+        )
+
+    def missing_ranges(self, start, end):
+        """
+        The parts of start..end (YYYY-MM-DD) outside the covered range, as (start, end) strings.
+
+        A gap between the request and the covered range is included, so merging
+        the fetched ranges keeps the covered range contiguous.
+        """
+        start, end = np.datetime64(start, "D"), np.datetime64(end, "D")
+        if self.covered is None:
+            return [(str(start), str(end))]
+
+        one_day = np.timedelta64(1, "D")
+        covered_start, covered_end = self.covered
+        ranges = []
+        if start < covered_start:
+            ranges.append((str(start), str(covered_start - one_day)))
+        if end > covered_end:
+            ranges.append((str(covered_end + one_day), str(end)))
+        return ranges
+
+    def merge(self, other):
+        """
+        Combine two series; where both have an observation for a date, other's value wins.
+
+        The covered range of the result spans both inputs, so callers should only
+        merge series whose covered ranges overlap or touch. If other adds or
+        changes any observation the result gets the next data version. Those at
+        dates this series already covered are marked as revised in it; those
+        that only extend the covered range aren't, since no copy of this series
+        held them before.
+        """
+        # which of other's observations are already here with the same value
+        unchanged = np.zeros(len(other.dates), dtype=bool)
+        positions = np.zeros(len(other.dates), dtype=np.intp)
+        if len(self.dates):
+            positions = np.minimum(np.searchsorted(self.dates, other.dates), len(self.dates) - 1)
+            unchanged = (self.dates[positions] == other.dates) & (self.values[positions] == other.values)
+
+        version = self.version if unchanged.all() else self.version + 1
+        own_revisions = self.revisions if self.revisions is not None else np.zeros(len(self.dates), dtype=np.int32)
+        other_revisions = np.full(len(other.dates), version, dtype=np.int32)
+        if len(self.dates):
+            other_revisions[unchanged] = own_revisions[positions[unchanged]]
+        if self.covered is None:
+            other_revisions[:] = 0
+        else:
+            other_revisions[(other.dates < self.covered[0]) | (other.dates > self.covered[1])] = 0
+
+        dates = np.concatenate([other.dates, self.dates])
+        values = np.concatenate([other.values, self.values])
+        revisions = np.concatenate([other_revisions, own_revisions])
+        # np.unique keeps the first occurrence of each date, which is other's
+        dates, first = np.unique(dates, return_index=True)
+
+        covered = None
+        ranges = [series.covered for series in (self, other) if series.covered is not None]
+        if ranges:
+            covered = (min(start for start, _ in ranges), max(end for _, end in ranges))
+
+        epoch = self.epoch or secrets.randbits(32)
+        return Series(dates, values[first], covered, revisions[first], version, epoch)
+
+    def resample(self, frequency, aggregation_method="avg"):
+        """
+        Aggregate to a lower frequency the way FRED does.
+
+        Periods are labelled like FRED labels them: by their first day for
+        monthly and longer periods, and by their last day for weekly periods
+        (weekly ending Friday by default). Missing observations are already
+        dropped, so averages and sums only use the values that exist.
+
+        Args:
+            frequency (str): FRED frequency code (w, wef...wesa, m, q, sa, a)
+            aggregation_method (str): avg, sum or eop (end of period)
+
+        Returns:
+            Series: One observation per period
+        """
+        if aggregation_method not in ("avg", "sum", "eop"):
+            raise ValueError(f"Unsupported aggregation method: {aggregation_method}")
+        if not len(self.dates):
+            return Series.empty(self.covered)
+
+        labels = _period_labels(self.dates, frequency.lower())
+        # dates are sorted, so each period is a contiguous run of the labels
+        periods, starts, inverse = np.unique(labels, return_index=True, return_inverse=True)
+        if aggregation_method == "eop":
+            ends = np.append(starts[1:], len(labels)) - 1
+            values = self.values[ends]
+        else:
+            values = np.bincount(inverse, weights=self.values, minlength=len(periods))
+            if aggregation_method == "avg":
+                values = values / np.bincount(inverse, minlength=len(periods))
+        # derived from this data, so it keeps its version
+        return Series(periods, values, self.covered, version=self.version, epoch=self.epoch)
+
+    def to_records(self):
+        """Convert to the API's list of {"date": "YYYY-MM-DD", "value": float} dicts."""
+        dates = np.datetime_as_string(self.dates, unit="D").tolist()
+        return [{"date": date, "value": value} for date, value in zip(dates, self.values.tolist())]
+
+    def to_bytes(self):
+        if self.covered is None:
+            coverage = _COVERAGE.pack(_NO_COVERAGE, _NO_COVERAGE)
+        else:
+            coverage = _COVERAGE.pack(*(int(day.astype(np.int64)) for day in self.covered))
+        has_revisions = self.revisions is not None
+        data_version = _DATA_VERSION.pack(self.epoch or 0, self.version, has_revisions)
+        return (
+            _HEADER.pack(_MAGIC, _FORMAT, len(self.dates))
+            + coverage
+            + data_version
+            + self.dates.astype("<i8").tobytes()
+            + self.values.astype("<f8").tobytes()
+            + (self.revisions.astype("<i4").tobytes() if has_revisions else b"")
+        )
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, count = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not an encoded series")
+        offset = _HEADER.size
+
+        covered = None
+        if version >= 2:
+            start, end = _COVERAGE.unpack_from(data, offset)
+            offset += _COVERAGE.size
+            if start != _NO_COVERAGE:
+                covered = (np.datetime64(start, "D"), np.datetime64(end, "D"))
+
+        epoch, data_version, has_revisions = None, 0, False
+        if version >= 3:
+            epoch, data_version, has_revisions = _DATA_VERSION.unpack_from(data, offset)
+            offset += _DATA_VERSION.size
+
+        dates = np.frombuffer(data, dtype="<i8", count=count, offset=offset).astype("datetime64[D]")
+        values = np.frombuffer(data, dtype="<f8", count=count, offset=offset + 8 * count)
+        revisions = None
+        if has_revisions:
+            revisions = np.frombuffer(data, dtype="<i4", count=count, offset=offset + 16 * count).copy()
+        return cls(dates, values.copy(), covered, revisions, data_version, epoch or None)
+
+
+def parse_observations(content, covered=None):
+    """
+    Decode a FRED series/observations JSON response into a Series.
+
+    A module-level function, so it can run in the CPU executor's worker processes.
+    """
+    return Series.from_observations(json.loads(content).get("observations", []), covered)
+
+
+def _parse_version_token(token):
+    """Split a version token into (epoch, version); malformed tokens never match a copy."""
+    try:
+        epoch, version = token.split(".")
+        return int(epoch, 16), int(version)
+    except (AttributeError, ValueError):
+        return -1, 0
+
+
+def _period_labels(dates, frequency):
+    """The FRED observation date of the period each date falls in."""
+    group = frequency_group(frequency)
+    if group == "w":
+        # days since the epoch (a Thursday) -> weekday with Monday = 0
+        weekday = (dates.astype(np.int64) + 3) % 7
+        ending = WEEK_ENDINGS.get(frequency, WEEK_ENDINGS["wef"])
+        return dates + ((ending - weekday) % 7).astype("timedelta64[D]")
+
+    months = dates.astype("datetime64[M]").astype(np.int64)
+    months_per_period = {"m": 1, "q": 3, "sa": 6, "a": 12}.get(group)
+    if months_per_period is None:
+        raise ValueError(f"Can't resample to frequency: {frequency}")
+    return (months - months % months_per_period).astype("datetime64[M]").astype("datetime64[D]")
@@ -0,0 +1,124 @@
+import asyncio
+import json
+from app.config import STREAM_POLL_INTERVAL, STREAM_HEARTBEAT_INTERVAL
+
+class LatestValueStream:
+    """
+    Pushes new observations to connected clients (server-sent events).
+
+    A single background refresher polls FRED for the union of all subscribed
+    series and fans any change out to every subscriber, so the number of
+    connected clients doesn't change the number of upstream calls.
+
+    With poll_upstream off (when the refresh scheduler runs), the refresher
+    only reads the cached latest values, which the scheduler replaces as FRED
+    updates them; FRED is only asked for values that aren't cached.
+    """
+
+    def __init__(self, fred_service, poll_interval=STREAM_POLL_INTERVAL, poll_upstream=True):
+        self.fred_service = fred_service
+        self.poll_interval = poll_interval
+        self.poll_upstream = poll_upstream
+        self.latest = {}  # series_id -> last value we've seen
+        self._subscribers = {}  # queue -> set of series ids
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def subscribe(self, series_ids):
+        """Register a client for a set of series; returns the queue its updates arrive on."""
+        queue = asyncio.Queue()
+        self._subscribers[queue] = set(series_ids)
+        # make the refresher pick up series nobody was subscribed to yet
+        if any(series_id not in self.latest for series_id in series_ids):
+            self._wakeup.set()
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.pop(queue, None)
+
+    def subscribed_series(self):
+        series = set()
+        for series_ids in self._subscribers.values():
+            series |= series_ids
+        return series
+
+    def publish(self, latest):
+        """Record a latest value and send it to every client subscribed to that series."""
+        series_id = latest["series_id"]
+        previous = self.latest.get(series_id)
+        self.latest[series_id] = latest
+
+        if previous and previous.get("date") == latest.get("date") and previous.get("value") == latest.get("value"):
+            return
+
+        for queue, series_ids in self._subscribers.items():
+            if series_id in series_ids:
+                queue.put_nowait(latest)
+
+    async def refresh(self, series_ids=None):
+        """Poll FRED (or the cache) once for the given (default: all subscribed) series and publish what changed."""
+        series_ids = list(self.subscribed_series() if series_ids is None else series_ids)
+        results = await asyncio.gather(
+            *[self.fred_service.get_latest_value(series_id, refresh=self.poll_upstream) for series_id in series_ids],
+            return_exceptions=True
+        )
+        for series_id, result in zip(series_ids, results):
+            if isinstance(result, Exception):
+                print(f"Error refreshing latest value for {series_id}: {str(result)}")
+                continue
+            self.publish(result)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if self._subscribers:
+                await self.refresh()
+
+            # until the next poll, only fetch series that new clients subscribed to
+            deadline = loop.time() + self.poll_interval
+            while deadline > loop.time():
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                await self.refresh([s for s in self.subscribed_series() if s not in self.latest])
+
+    async def events(self, request, series_ids):
+        """
+        Generate the SSE stream for one client.
+
+        Sends the current value of each series straight away, then every new
+        observation as it is detected, with periodic comments as heartbeats.
+        """
+        queue = self.subscribe(series_ids)
+        try:
+            for series_id in series_ids:
+                if series_id in self.latest:
+                    yield _format_event(self.latest[series_id])
+
+            while not await request.is_disconnected():
+                try:
+                    latest = await asyncio.wait_for(queue.get(), timeout=STREAM_HEARTBEAT_INTERVAL)
+                    yield _format_event(latest)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+        finally:
+            self.unsubscribe(queue)
+
+
+def _format_event(latest):
+    return f"event: latest\nid: {latest['series_id']}:{latest.get('date')}\ndata: {json.dumps(latest)}\n\n"
@@ -0,0 +1,174 @@
+import json
+import numpy as np
+from app.api.services.series import Series
+
+# ALFRED's realtime_end for values that are still current
+OPEN_ENDED = np.datetime64("9999-12-31", "D")
+
+# vintages whose observations are kept materialised per store
+_CACHED_VINTAGES = 64
+
+
+def _days(dates):
+    """YYYY-MM-DD strings (or datetime64) -> int32 day numbers."""
+    return np.asarray(dates, dtype="datetime64[D]").astype(np.int64).astype(np.int32)
+
+
+class VintageStore:
+    """
+    Every vintage of one series, stored as the changes between vintages.
+
+    ALFRED reports a series' history as values valid over a realtime period:
+    a value is only listed again when a vintage revises it. Each of those
+    rows is kept as (date, value, valid_from, valid_to) in 20 bytes (valid_to
+    is the last day the value was current, like ALFRED's realtime_end), so a
+    vintage that revises twelve observations adds twelve rows instead of a
+    copy of the whole series.
+
+    Rows are sorted by observation date and then by valid_from, so the
+    observations in effect on a day come out of a single vectorised mask,
+    already in date order. vintages holds the days the series changed and
+    maps any as-of date to the vintage in effect; lookups that land on the
+    same vintage share one materialised Series.
+    """
+
+    __slots__ = ("dates", "values", "valid_from", "valid_to", "vintages", "_cache")
+
+    def __init__(self, dates, values, valid_from, valid_to):
+        dates, valid_from, valid_to = _days(dates), _days(valid_from), _days(valid_to)
+        values = np.asarray(values, dtype=np.float64)
+        order = np.lexsort((valid_from, dates))
+        self.dates = dates[order]
+        self.values = values[order]
+        self.valid_from = valid_from[order]
+        self.valid_to = valid_to[order]
+        # a vintage is any day the set of values in effect changes
+        closed = self.valid_to[self.valid_to != _days(OPEN_ENDED)]
+        self.vintages = np.union1d(self.valid_from, closed + 1)
+        self._cache = {}
+
+    @classmethod
+    def empty(cls):
+        no_dates = np.empty(0, dtype="datetime64[D]")
+        return cls(no_dates, np.empty(0, dtype=np.float64), no_dates, no_dates)
+
+    @classmethod
+    def concat(cls, stores):
+        """One store from several (e.g. the pages of an ALFRED response)."""
+        return cls(
+            np.concatenate([store.dates for store in stores]).astype("datetime64[D]"),
+            np.concatenate([store.values for store in stores]),
+            np.concatenate([store.valid_from for store in stores]).astype("datetime64[D]"),
+            np.concatenate([store.valid_to for store in stores]).astype("datetime64[D]")
+        )
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def nbytes(self):
+        return self.dates.nbytes + self.values.nbytes + self.valid_from.nbytes + self.valid_to.nbytes
+
+    @property
+    def first_vintage(self):
+        return str(self.vintages[0].astype("datetime64[D]")) if len(self.vintages) else None
+
+    @property
+    def last_vintage(self):
+        return str(self.vintages[-1].astype("datetime64[D]")) if len(self.vintages) else None
+
+    def vintage_of(self, as_of):
+        """The vintage in effect on a date (YYYY-MM-DD), or None before the first one."""
+        index = np.searchsorted(self.vintages, _days(as_of), side="right") - 1
+        if index < 0:
+            return None
+        return str(self.vintages[index].astype("datetime64[D]"))
+
+    def as_of(self, as_of):
+        """
+        The series as it was published on a date.
+
+        Returns:
+            tuple: (date of the vintage in effect, Series), or (None, None) before the first vintage
+        """
+        vintage = self.vintage_of(as_of)
+        if vintage is None:
+            return None, None
+
+        series = self._cache.get(vintage)
+        if series is None:
+            day = _days(vintage)
+            in_effect = (self.valid_from <= day) & (self.valid_to >= day)
+            # a vintage can withdraw a value (ALFRED sends "."): it's in effect but missing
+            in_effect &= ~np.isnan(self.values)
+            series = Series(self.dates[in_effect].astype("datetime64[D]"), self.values[in_effect])
+            if len(self._cache) >= _CACHED_VINTAGES:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[vintage] = series
+        return vintage, series
+
+    def merge(self, update, since):
+        """
+        Add the vintages fetched since a date.
+
+        ALFRED clamps realtime_start to the requested one, so the update lists
+        the rows still in effect on since as starting that day. Those close
+        the matching stored rows (one per observation date is in effect at a
+        time); everything starting later is new.
+
+        Args:
+            update (VintageStore): ALFRED's rows for realtime_start=since
+            since (str): The realtime_start the update was requested with (YYYY-MM-DD)
+
+        Returns:
+            VintageStore: The combined store
+        """
+        day = _days(since)
+        in_effect = np.flatnonzero((self.valid_from <= day) & (self.valid_to >= day))
+        carried = np.flatnonzero(update.valid_from <= day)
+
+        valid_to = self.valid_to.copy()
+        # rows are sorted by date, so the rows in effect on a day are too
+        position = np.searchsorted(self.dates[in_effect], update.dates[carried])
+        position = np.minimum(position, max(len(in_effect) - 1, 0))
+        found = np.zeros(len(carried), dtype=bool)
+        if len(in_effect):
+            found = self.dates[in_effect][position] == update.dates[carried]
+        valid_to[in_effect[position[found]]] = update.valid_to[carried[found]]
+
+        new = np.ones(len(update), dtype=bool)
+        new[carried[found]] = False
+        return VintageStore(
+            np.concatenate([self.dates, update.dates[new]]).astype("datetime64[D]"),
+            np.concatenate([self.values, update.values[new]]),
+            np.concatenate([self.valid_from, update.valid_from[new]]).astype("datetime64[D]"),
+            np.concatenate([valid_to, update.valid_to[new]]).astype("datetime64[D]")
+        )
+
+    def save(self, path):
+        np.savez(path, dates=self.dates, values=self.values, valid_from=self.valid_from, valid_to=self.valid_to)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(*[
+                data[name].astype("datetime64[D]") if name != "values" else data[name]
+                for name in ("dates", "values", "valid_from", "valid_to")
+            ])
+
+
+def parse_vintages(content):
+    """
+    Decode an ALFRED series/observations response (realtime_start/realtime_end per row) into a VintageStore.
+
+    A module-level function, so it can run in the CPU executor's worker processes.
+    """
+    observations = json.loads(content).get("observations", [])
+    if not observations:
+        return VintageStore.empty()
+    return VintageStore(
+        [obs["date"] for obs in observations],
+        [obs["value"] if obs.get("value", ".") not in (".", "") else "nan" for obs in observations],
+        [obs["realtime_start"] for obs in observations],
+        [obs["realtime_end"] for obs in observations]
+    )
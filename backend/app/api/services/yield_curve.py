@@ -0,0 +1,237 @@
+import csv
+import io
+from functools import lru_cache
+import numpy as np
+from app.api.services.series import Series
+
+# Treasury CSV column -> maturity in years
+TENORS = {
+    "1 Mo": 1 / 12, "1.5 Month": 1.5 / 12, "2 Mo": 2 / 12, "3 Mo": 0.25, "4 Mo": 4 / 12, "6 Mo": 0.5,
+    "1 Yr": 1.0, "2 Yr": 2.0, "3 Yr": 3.0, "5 Yr": 5.0, "7 Yr": 7.0, "10 Yr": 10.0, "20 Yr": 20.0, "30 Yr": 30.0,
+}
+
+# spread name -> (short tenor, long tenor) in years
+SPREADS = {"2s10s": (2.0, 10.0), "3m10y": (0.25, 10.0)}
+
+
+class YieldHistory:
+    """
+    Daily Treasury par yield curves: one row per date, one column per tenor.
+
+    Tenors that weren't published on a date (the 1-month bill before 2001,
+    the 30-year bond in 2002-2006...) are NaN.
+    """
+
+    __slots__ = ("dates", "tenors", "yields")
+
+    def __init__(self, dates, tenors, yields):
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.tenors = np.asarray(tenors, dtype=np.float64)
+        self.yields = np.asarray(yields, dtype=np.float64).reshape(len(self.dates), len(self.tenors))
+
+    def __len__(self):
+        return len(self.dates)
+
+    def slice(self, start=None, end=None):
+        """Curves between start and end (inclusive, YYYY-MM-DD)."""
+        lo = 0 if start is None else np.searchsorted(self.dates, np.datetime64(start, "D"), side="left")
+        hi = len(self.dates) if end is None else np.searchsorted(self.dates, np.datetime64(end, "D"), side="right")
+        return YieldHistory(self.dates[lo:hi], self.tenors, self.yields[lo:hi])
+
+    def merge(self, other):
+        """Combine two histories; other's curves replace ours on dates both have."""
+        tenors = np.union1d(self.tenors, other.tenors)
+        dates = np.concatenate([other.dates, self.dates])
+        yields = np.full((len(dates), len(tenors)), np.nan)
+        yields[:len(other.dates), np.searchsorted(tenors, other.tenors)] = other.yields
+        yields[len(other.dates):, np.searchsorted(tenors, self.tenors)] = self.yields
+        # np.unique keeps the first occurrence of each date, which is other's
+        dates, first = np.unique(dates, return_index=True)
+        return YieldHistory(dates, tenors, yields[first])
+
+    def interpolate(self, tenors):
+        """
+        Constant-maturity yields at arbitrary tenors, by natural cubic spline through each curve.
+
+        Tenors outside the maturities published on a date come out as NaN
+        rather than being extrapolated.
+
+        Args:
+            tenors (list): Maturities in years
+
+        Returns:
+            ndarray: (number of dates, number of tenors) yields
+        """
+        targets = np.asarray(tenors, dtype=np.float64)
+        result = np.full((len(self.dates), len(targets)), np.nan)
+        available = ~np.isnan(self.yields)
+
+        # the spline is linear in the yields, so every curve with the same published
+        # tenors is interpolated by one weight matrix: a single product per pattern
+        patterns, inverse = np.unique(available, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        for index, pattern in enumerate(patterns):
+            if pattern.sum() < 2:
+                continue
+            rows = inverse == index
+            weights = _spline_weights(tuple(self.tenors[pattern]), tuple(targets))
+            result[rows] = self.yields[rows][:, pattern] @ weights.T
+        return result
+
+    def spread(self, name):
+        """A standard spread (2s10s, 3m10y) in percentage points, on the dates it can be computed."""
+        if name not in SPREADS:
+            raise ValueError(f"Unknown spread: {name} (available: {', '.join(SPREADS)})")
+        short, long = self.interpolate(SPREADS[name]).T
+        values = long - short
+        keep = ~np.isnan(values)
+        return Series(self.dates[keep], values[keep])
+
+    def factors(self):
+        """
+        Level, slope and curvature of every curve.
+
+        Uses the usual empirical proxies from the 3-month, 2-year and 10-year
+        yields: level is their average, slope 10y - 3m and curvature 2 * 2y - 3m - 10y.
+        """
+        short, middle, long = self.interpolate([0.25, 2.0, 10.0]).T
+        keep = ~(np.isnan(short) | np.isnan(middle) | np.isnan(long))
+        dates, short, middle, long = self.dates[keep], short[keep], middle[keep], long[keep]
+        return {
+            "level": Series(dates, (short + middle + long) / 3),
+            "slope": Series(dates, long - short),
+            "curvature": Series(dates, 2 * middle - short - long),
+        }
+
+    def to_records(self, tenors=None):
+        """Convert to [{"date": "YYYY-MM-DD", "yields": [...]}], interpolating if tenors are given."""
+        yields = self.yields if tenors is None else self.interpolate(tenors)
+        yields = np.round(yields, 4).astype(object)
+        yields[np.isnan(yields.astype(np.float64))] = None
+        return [
+            {"date": date, "yields": row}
+            for date, row in zip(np.datetime_as_string(self.dates).tolist(), yields.tolist())
+        ]
+
+    def save(self, path):
+        np.savez(path, dates=self.dates.astype(np.int64), tenors=self.tenors, yields=self.yields)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["dates"].astype("datetime64[D]"), data["tenors"], data["yields"])
+
+
+def parse_treasury_csv(text):
+    """
+    Parse Treasury's daily par yield curve CSV into a YieldHistory.
+
+    Columns Treasury has added over the years are placed by their maturity, and
+    columns we don't know are ignored.
+    """
+    reader = csv.reader(io.StringIO(text))
+    header = next(reader, None)
+    if not header:
+        return YieldHistory([], [], np.empty((0, 0)))
+
+    columns = [(index, TENORS[name.strip()]) for index, name in enumerate(header) if name.strip() in TENORS]
+    columns.sort(key=lambda column: column[1])
+    date_column = [name.strip() for name in header].index("Date")
+
+    dates, rows = [], []
+    for row in reader:
+        if not row:
+            continue
+        month, day, year = row[date_column].split("/")
+        dates.append(f"{year}-{month}-{day}")
+        rows.append([row[index] if index < len(row) and row[index] != "" else "nan" for index, _ in columns])
+
+    history = YieldHistory(
+        np.array(dates, dtype="datetime64[D]"),
+        [tenor for _, tenor in columns],
+        np.array(rows, dtype=np.float64).reshape(len(rows), len(columns)),
+    )
+    # Treasury lists the newest date first
+    order = np.argsort(history.dates, kind="stable")
+    return YieldHistory(history.dates[order], history.tenors, history.yields[order])
+
+
+def inversion_episodes(spread, min_days=1):
+    """
+    Stretches where a spread stayed below zero.
+
+    Args:
+        spread (Series): Spread observations
+        min_days (int): Ignore episodes shorter than this many observations
+
+    Returns:
+        list: Episodes with start/end dates, length, the deepest point and
+            whether the spread is still inverted at the end of the data
+    """
+    inverted = spread.values < 0
+    # +1 where an inverted run starts, -1 just after one ends
+    edges = np.diff(np.concatenate([[0], inverted.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+
+    episodes = []
+    for start, end in zip(starts, ends):
+        if end - start + 1 < min_days:
+            continue
+        deepest = start + int(np.argmin(spread.values[start:end + 1]))
+        episodes.append({
+            "start": str(spread.dates[start]),
+            "end": str(spread.dates[end]),
+            "observations": int(end - start + 1),
+            "calendar_days": int((spread.dates[end] - spread.dates[start]).astype(np.int64)) + 1,
+            "deepest": round(float(spread.values[deepest]), 4),
+            "deepest_date": str(spread.dates[deepest]),
+            "ongoing": bool(end == len(inverted) - 1),
+        })
+    return episodes
+
+
+@lru_cache(maxsize=128)
+def _spline_weights(knots, targets):
+    """
+    Weight matrix W so that W @ y is the natural cubic spline through (knots, y) at targets.
+
+    The second derivatives of a natural spline solve a tridiagonal system that
+    depends only on the knots, so the whole interpolation is a fixed linear map.
+    """
+    x = np.asarray(knots)
+    t = np.asarray(targets)
+    count = len(x)
+    h = np.diff(x)
+
+    # second derivatives: M = solve(A, B @ y), with M = 0 at both ends
+    second = np.zeros((count, count))
+    if count > 2:
+        a = np.zeros((count - 2, count - 2))
+        b = np.zeros((count - 2, count))
+        for i in range(1, count - 1):
+            a[i - 1, i - 1] = (h[i - 1] + h[i]) / 3
+            if i > 1:
+                a[i - 1, i - 2] = h[i - 1] / 6
+            if i < count - 2:
+                a[i - 1, i] = h[i] / 6
+            b[i - 1, i - 1] = 1 / h[i - 1]
+            b[i - 1, i] = -1 / h[i - 1] - 1 / h[i]
+            b[i - 1, i + 1] = 1 / h[i]
+        second[1:-1] = np.linalg.solve(a, b)
+
+    interval = np.clip(np.searchsorted(x, t, side="right") - 1, 0, count - 2)
+    width = h[interval]
+    upper = (x[interval + 1] - t) / width  # weight of the knot on the left
+    lower = 1 - upper
+
+    weights = np.zeros((len(t), count))
+    rows = np.arange(len(t))
+    weights[rows, interval] += upper
+    weights[rows, interval + 1] += lower
+    weights += ((upper ** 3 - upper) * width ** 2 / 6)[:, None] * second[interval]
+    weights += ((lower ** 3 - lower) * width ** 2 / 6)[:, None] * second[interval + 1]
+
+    # no extrapolation beyond the shortest and longest published maturity
+    weights[(t < x[0]) | (t > x[-1])] = np.nan
+    return weights
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import time
+import httpx
+from datetime import datetime
+from app.config import TREASURY_HISTORY_PATH, CACHE_TTL_SCRAPER
+from app.profiling import phase
+from app.executor import run_cpu
+from app.deadlines import detach
+
+TREASURY_CSV_URL = (
+    "https://home.treasury.gov/resource-center/data-chart-center/interest-rates/daily-treasury-rates.csv/"
+    "{year}/all?type=daily_treasury_yield_curve&field_tdr_date_value={year}&page&_format=csv"
+)
+
+class YieldCurveService:
+    """
+    Analytics over the full history of daily Treasury yield curves.
+
+    The history (every curve since 1990) is downloaded once and stored in
+    TREASURY_HISTORY_PATH; afterwards only the current year is re-downloaded
+    when the stored copy is older than CACHE_TTL_SCRAPER. Workers sharing the
+    file pick up each other's updates instead of downloading again.
+    """
+
+    def __init__(self, path=TREASURY_HISTORY_PATH, max_age=CACHE_TTL_SCRAPER):
+        self.path = path
+        self.max_age = max_age
+        self._history = None
+        self._updated_at = 0.0
+        self._lock = asyncio.Lock()
+        self._update_task = None
+
+    async def get_history(self):
+        """Return the stored yield curve history, updating it first if it's stale."""
+        from app.api.services.yield_curve import YieldHistory
+
+        async with self._lock:
+            # another worker may have updated the file since we last read it
+            if os.path.exists(self.path) and os.path.getmtime(self.path) > self._updated_at:
+                self._history = await asyncio.to_thread(YieldHistory.load, self.path)
+                self._updated_at = os.path.getmtime(self.path)
+
+            if self._history is None or time.time() - self._updated_at > self.max_age:
+                if self._update_task is None or self._update_task.done():
+                    # the download outlives the request that started it, so the first
+                    # (full history) fetch completes even if that request gives up
+                    self._update_task = detach(self._update())
+                try:
+                    await asyncio.shield(self._update_task)
+                except Exception as e:
+                    print(f"Error updating Treasury yield history: {str(e)}")
+                    if self._history is None:
+                        raise Exception(f"Error fetching Treasury yields: {str(e)}")
+            return self._history
+
+    async def _update(self):
+        """Download the years missing from the stored history (everything on the first run)."""
+        if self._history is None or not len(self._history):
+            years = ["all"]
+        else:
+            # the last stored year may still have been incomplete when it was downloaded
+            first_year = int(str(self._history.dates[-1])[:4])
+            years = list(range(first_year, datetime.now().year + 1))
+
+        parts = await asyncio.gather(*[self._fetch_year(year) for year in years])
+        history = self._history
+        for part in parts:
+            history = part if history is None or not len(history) else history.merge(part)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # write to a temporary file first so other workers never load a half-written one
+        temporary = f"{self.path}.{os.getpid()}.tmp.npz"
+        await asyncio.to_thread(history.save, temporary)
+        os.replace(temporary, self.path)
+
+        self._history = history
+        self._updated_at = os.path.getmtime(self.path)
+
+    async def _fetch_year(self, year):
+        from app.api.services.yield_curve import parse_treasury_csv
+
+        async with httpx.AsyncClient(timeout=60) as client:
+            with phase("upstream"):
+                response = await client.get(TREASURY_CSV_URL.format(year=year))
+            response.raise_for_status()
+        return await run_cpu(parse_treasury_csv, response.text)
+
+    async def get_curves(self, start_date, end_date, tenors=None):
+        """
+        Yield curves between two dates, optionally interpolated to constant maturities.
+
+        Args:
+            start_date (str): Start date in YYYY-MM-DD format
+            end_date (str): End date in YYYY-MM-DD format
+            tenors (list, optional): Maturities in years to interpolate to (default: the published ones)
+
+        Returns:
+            dict: The tenors and one curve per date
+        """
+        history = (await self.get_history()).slice(start_date, end_date)
+        with phase("analytics"):
+            data = await run_cpu(history.to_records, tenors)
+        return {
+            "tenors": [round(float(tenor), 4) for tenor in (history.tenors if tenors is None else tenors)],
+            "data": data
+        }
+
+    async def get_spreads(self, start_date, end_date):
+        """The standard spreads (2s10s, 3m10y) between two dates, in percentage points."""
+        from app.api.services.yield_curve import SPREADS
+
+        history = (await self.get_history()).slice(start_date, end_date)
+        with phase("analytics"):
+            return {name: history.spread(name).to_records() for name in SPREADS}
+
+    async def get_inversions(self, spread="2s10s", min_days=1):
+        """
+        Every episode of an inverted curve in the full history.
+
+        Args:
+            spread (str): Spread that defines an inversion (2s10s or 3m10y)
+            min_days (int): Ignore inversions lasting fewer observations than this
+
+        Returns:
+            dict: The episodes, oldest first
+        """
+        from app.api.services.yield_curve import inversion_episodes
+
+        history = await self.get_history()
+        with phase("analytics"):
+            episodes = inversion_episodes(history.spread(spread), min_days)
+        return {"spread": spread, "episodes": episodes}
+
+    async def get_factors(self, start_date, end_date):
+        """Level, slope and curvature of each curve between two dates."""
+        history = (await self.get_history()).slice(start_date, end_date)
+        with phase("analytics"):
+            return {name: factor.to_records() for name, factor in history.factors().items()}
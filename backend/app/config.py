@@ -4,12 +4,110 @@ from dotenv import load_dotenv
 # loading the environment variables from .env file
 load_dotenv()
 
-# FRED API configuration
+# FRED API configuration - FRED_API_KEYS is a comma-separated pool of keys that requests
+# are spread across (each key has its own rate budget); a single FRED_API_KEY works too
 FRED_API_KEY = os.getenv("FRED_API_KEY", "")
+FRED_API_KEYS = [key.strip() for key in os.getenv("FRED_API_KEYS", FRED_API_KEY).split(",") if key.strip()]
+if not FRED_API_KEY and FRED_API_KEYS:
+    FRED_API_KEY = FRED_API_KEYS[0]
 if not FRED_API_KEY:
     print("Warning: FRED_API_KEY not set in environment variables")
     
+FRED_BASE_URL = os.getenv("FRED_BASE_URL", "https://api.stlouisfed.org/fred")
+# requests per minute this process sends to FRED with each key (FRED allows 120); 0 disables the limit
+FRED_RATE_LIMIT = int(os.getenv("FRED_RATE_LIMIT", "120"))
+# a key answered with this many 429s in a row leaves the rotation for FRED_KEY_COOLDOWN seconds
+# (doubling each time it happens again, up to an hour)
+FRED_KEY_MAX_429S = int(os.getenv("FRED_KEY_MAX_429S", "3"))
+FRED_KEY_COOLDOWN = int(os.getenv("FRED_KEY_COOLDOWN", "60"))
+
 API_PREFIX = "/api"
 
 # app settings
-DEBUG = os.getenv("DEBUG", "False").lower() in ("true", "1", "t")
\ No newline at end of file
+DEBUG = os.getenv("DEBUG", "False").lower() in ("true", "1", "t")
+
+# profiling settings - the profiling middleware is only installed when this is on,
+# and even then a request has to opt in with ?profile=1 or an X-Profile header
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False").lower() in ("true", "1", "t")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.001"))  # seconds
+
+# cache settings - "memory" keeps a per-worker LRU, "sqlite" and "redis" are shared by
+# every worker (CACHE_PATH is the SQLite file, CACHE_URL a redis:// URL)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_PATH = os.getenv("CACHE_PATH", "cache/fred_cache.sqlite3")
+CACHE_URL = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# how long cached responses stay fresh, in seconds
+CACHE_TTL_SERIES = int(os.getenv("CACHE_TTL_SERIES", "3600"))
+CACHE_TTL_LATEST = int(os.getenv("CACHE_TTL_LATEST", "900"))
+CACHE_TTL_METADATA = int(os.getenv("CACHE_TTL_METADATA", "86400"))
+CACHE_TTL_SCRAPER = int(os.getenv("CACHE_TTL_SCRAPER", "3600"))
+
+# request deadlines: a request still running after REQUEST_DEADLINE seconds is cancelled (504),
+# just under the frontend's 15s timeout; ROUTE_DEADLINES overrides it per path prefix
+# ("prefix=seconds,...", 0 for no deadline) and clients can ask for less with X-Timeout-Ms
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "14"))
+ROUTE_DEADLINES = {
+    prefix.strip(): float(seconds)
+    for prefix, _, seconds in (
+        entry.partition("=") for entry in os.getenv("ROUTE_DEADLINES", "/api/stream=0,/api/search=2").split(",")
+    )
+    if prefix.strip()
+}
+
+# hedged latest-value requests: when FRED hasn't answered within the HEDGE_PERCENTILE latency
+# of recent calls, the same request is sent again and whichever answers first wins
+HEDGE_LATEST_REQUESTS = os.getenv("HEDGE_LATEST_REQUESTS", "False").lower() in ("true", "1", "t")
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+
+# CPU-bound parsing and number crunching runs in this pool instead of on the event loop:
+# "thread" (default), "process" or "inline"; 0 workers means the executor's default
+CPU_EXECUTOR = os.getenv("CPU_EXECUTOR", "thread").lower()
+CPU_EXECUTOR_WORKERS = int(os.getenv("CPU_EXECUTOR_WORKERS", "0"))
+
+# event loop lag monitor: logs and counts anything that blocks the loop longer than the threshold
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "True").lower() in ("true", "1", "t")
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.1"))  # seconds
+
+# where the full history of daily Treasury yield curves is stored (an .npz file, shared by workers)
+TREASURY_HISTORY_PATH = os.getenv("TREASURY_HISTORY_PATH", "cache/treasury_yields.npz")
+
+# point-in-time (as_of) queries are answered from a local store of each series' ALFRED vintages,
+# one file per series; only vintages newer than the stored ones are downloaded once the file is
+# older than VINTAGE_STORE_MAX_AGE seconds (and only when a query needs them)
+VINTAGE_STORE_DIR = os.getenv("VINTAGE_STORE_DIR", "cache/vintages")
+VINTAGE_STORE_MAX_AGE = int(os.getenv("VINTAGE_STORE_MAX_AGE", "86400"))
+
+# county and metro-area panels: one file per indicator and geography level, filled from GeoFRED
+# (which returns every region of a series group per call), REGIONAL_PANEL_YEARS of history,
+# re-fetched once older than REGIONAL_PANEL_MAX_AGE seconds; CBSA_DELINEATION_PATH is an
+# optional CSV of Census' CBSA delineation file that places counties in their metro areas
+GEOFRED_BASE_URL = os.getenv("GEOFRED_BASE_URL", FRED_BASE_URL.rsplit("/", 1)[0] + "/geofred")
+REGIONAL_PANEL_DIR = os.getenv("REGIONAL_PANEL_DIR", "cache/regional")
+REGIONAL_PANEL_YEARS = int(os.getenv("REGIONAL_PANEL_YEARS", "10"))
+REGIONAL_PANEL_MAX_AGE = int(os.getenv("REGIONAL_PANEL_MAX_AGE", "86400"))
+REGIONAL_FETCH_CONCURRENCY = int(os.getenv("REGIONAL_FETCH_CONCURRENCY", "4"))
+REGIONAL_BATCH_DATES = int(os.getenv("REGIONAL_BATCH_DATES", "12"))
+CBSA_DELINEATION_PATH = os.getenv("CBSA_DELINEATION_PATH", "")
+
+# series search index: a snapshot of FRED series metadata (the series of the SEARCH_INDEX_TAGS
+# most popular tags) rebuilt in the background once it's older than SEARCH_INDEX_MAX_AGE seconds
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", "cache/search_index.json.gz")
+SEARCH_INDEX_REFRESH_ENABLED = os.getenv("SEARCH_INDEX_REFRESH_ENABLED", "True").lower() in ("true", "1", "t")
+SEARCH_INDEX_MAX_AGE = int(os.getenv("SEARCH_INDEX_MAX_AGE", str(7 * 86400)))
+SEARCH_INDEX_TAGS = int(os.getenv("SEARCH_INDEX_TAGS", "50"))
+
+# server-sent events: how often subscribed series are polled for new observations
+# and how often an idle stream sends a heartbeat (both in seconds)
+STREAM_POLL_INTERVAL = int(os.getenv("STREAM_POLL_INTERVAL", "300"))
+STREAM_HEARTBEAT_INTERVAL = int(os.getenv("STREAM_HEARTBEAT_INTERVAL", "15"))
+
+# background refresh scheduler: polls FRED's series/updates feed and refreshes
+# only the cached series that actually changed (intervals in seconds)
+REFRESH_SCHEDULER_ENABLED = os.getenv("REFRESH_SCHEDULER_ENABLED", "True").lower() in ("true", "1", "t")
+UPDATES_POLL_INTERVAL = int(os.getenv("UPDATES_POLL_INTERVAL", "900"))
+# with the scheduler invalidating changed series, cached observations can live much longer
+CACHE_TTL_SERIES_SCHEDULED = int(os.getenv("CACHE_TTL_SERIES_SCHEDULED", str(7 * 86400)))
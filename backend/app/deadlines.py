@@ -0,0 +1,152 @@
+import asyncio
+import contextvars
+
+from fastapi.responses import JSONResponse
+
+from app.config import REQUEST_DEADLINE, ROUTE_DEADLINES
+
+# loop.time() by which the request currently being handled has to be answered (None: no deadline)
+_deadline = contextvars.ContextVar("deadline", default=None)
+
+# what the middleware gave up on, for /api/diagnostics/deadlines
+stats = {"deadline_exceeded": 0, "client_disconnected": 0}
+
+
+class DeadlineExceeded(TimeoutError):
+    """Work that can't start before the current request's deadline passes."""
+
+
+def remaining():
+    """Seconds left until the current request's deadline, or None outside a request with one."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - asyncio.get_running_loop().time()
+
+
+def cap(timeout):
+    """An upstream timeout shortened so it doesn't run past the current request's deadline."""
+    left = remaining()
+    if left is None:
+        return timeout
+    return max(min(timeout, left), 0.001)
+
+
+async def wait_or_expire(seconds):
+    """
+    Sleep before starting upstream work, unless that would run past the deadline.
+
+    Then it waits out the deadline instead (the middleware cancels the request
+    there) and raises DeadlineExceeded if it's still running, so no rate
+    budget is spent on a request that can't be answered in time.
+    """
+    left = remaining()
+    if left is not None and seconds > left:
+        await asyncio.sleep(max(left, 0))
+        raise DeadlineExceeded("Deadline passes before the upstream request could be sent")
+    if seconds > 0:
+        await asyncio.sleep(seconds)
+
+
+def detach(coroutine):
+    """
+    Run a coroutine as a task without the current request's deadline.
+
+    For shared work worth finishing even if the request that started it
+    gives up, like downloading a history other requests will read.
+    """
+    context = contextvars.copy_context()
+    context.run(_deadline.set, None)
+    return asyncio.create_task(coroutine, context=context)
+
+
+def route_deadline(path, headers):
+    """
+    The deadline for a request, in seconds (0: none).
+
+    The longest matching prefix in ROUTE_DEADLINES wins over REQUEST_DEADLINE,
+    and a client can ask for less with an X-Timeout-Ms header.
+    """
+    seconds = REQUEST_DEADLINE
+    matched = ""
+    for prefix, route_seconds in ROUTE_DEADLINES.items():
+        if path.startswith(prefix) and len(prefix) > len(matched):
+            seconds, matched = route_seconds, prefix
+
+    client_timeout = headers.get(b"x-timeout-ms")
+    if seconds and client_timeout:
+        try:
+            # leave a little room for the response to get back to the client
+            seconds = min(seconds, max(int(client_timeout) / 1000 - 0.5, 0.1))
+        except ValueError:
+            pass
+    return seconds
+
+
+class DeadlineMiddleware:
+    """
+    Stops working on requests nobody is waiting for anymore.
+
+    Each request runs with a deadline (see route_deadline) that upstream calls
+    read through remaining()/cap(); when it passes, the handler is cancelled
+    and a 504 is returned. When the client disconnects first, the handler is
+    cancelled too, which aborts its upstream calls.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        seconds = route_deadline(scope["path"], dict(scope.get("headers") or []))
+        if not seconds:
+            # long-lived responses (server-sent events) watch for disconnects themselves
+            return await self.app(scope, receive, send)
+
+        messages = asyncio.Queue()
+        started = False
+
+        async def listen():
+            # the server reports a closed connection as an http.disconnect message
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    return
+
+        async def send_wrapper(message):
+            nonlocal started
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        token = _deadline.set(asyncio.get_running_loop().time() + seconds)
+        try:
+            handler = asyncio.create_task(self.app(scope, messages.get, send_wrapper))
+            listener = asyncio.create_task(listen())
+        finally:
+            _deadline.reset(token)
+
+        try:
+            done, _ = await asyncio.wait({handler, listener}, timeout=seconds, return_when=asyncio.FIRST_COMPLETED)
+            if handler in done:
+                return handler.result()
+
+            handler.cancel()
+            try:
+                await handler
+            except (asyncio.CancelledError, Exception):
+                pass
+
+            if listener in done:
+                stats["client_disconnected"] += 1
+            else:
+                stats["deadline_exceeded"] += 1
+                if not started:
+                    response = JSONResponse(
+                        {"detail": f"Request took longer than its {seconds:g}s deadline"}, status_code=504
+                    )
+                    await response(scope, receive, send)
+        finally:
+            listener.cancel()
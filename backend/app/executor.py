@@ -0,0 +1,53 @@
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from app.config import CPU_EXECUTOR, CPU_EXECUTOR_WORKERS
+
+# pool for CPU-bound parsing and number crunching, created on first use
+_executor = None
+
+
+def get_executor():
+    """
+    The pool selected by CPU_EXECUTOR: "thread" (default), "process" or "inline".
+
+    Threads are cheap to hand work to and NumPy releases the GIL for most of
+    its work; processes also run pure-Python parsing (JSON, CSV, HTML) in
+    parallel, at the cost of pickling arguments and results. "inline" runs
+    everything on the event loop, as before.
+    """
+    global _executor
+    if _executor is None and CPU_EXECUTOR != "inline":
+        if CPU_EXECUTOR == "process":
+            # spawn rather than fork: the server already runs threads (profiler, loop monitor)
+            _executor = ProcessPoolExecutor(
+                max_workers=CPU_EXECUTOR_WORKERS or None, mp_context=multiprocessing.get_context("spawn")
+            )
+        elif CPU_EXECUTOR == "thread":
+            _executor = ThreadPoolExecutor(max_workers=CPU_EXECUTOR_WORKERS or None, thread_name_prefix="cpu")
+        else:
+            raise ValueError(f"Unknown CPU executor: {CPU_EXECUTOR}")
+    return _executor
+
+
+async def run_cpu(function, *args, **kwargs):
+    """
+    Run a CPU-bound function in the executor so it doesn't block the event loop.
+
+    With the process executor, the function has to be importable (defined at
+    module level) and its arguments and result picklable.
+    """
+    executor = get_executor()
+    if executor is None:
+        return function(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(function, *args, **kwargs))
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
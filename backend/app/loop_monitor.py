@@ -0,0 +1,98 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+
+from app.config import LOOP_LAG_THRESHOLD
+
+
+class LoopLagMonitor:
+    """
+    Detects callbacks that block the event loop.
+
+    A task on the loop records a heartbeat every interval; when it wakes up
+    later than it should have, everything else on the loop was stuck for that
+    long. A watchdog thread notices missing heartbeats while the loop is still
+    blocked and grabs the loop thread's stack, so the log names the code that
+    blocked it rather than whatever ran next.
+    """
+
+    def __init__(self, threshold=LOOP_LAG_THRESHOLD, interval=None):
+        self.threshold = threshold
+        self.interval = interval or max(threshold / 4, 0.005)
+        self.stalls = 0
+        self.max_lag = 0.0
+        self.total_blocked = 0.0
+        self.last_stall = None
+        self._beat = None
+        self._stack = None  # stack captured by the watchdog during the current stall
+        self._loop_thread = None
+        self._task = None
+        self._stop = threading.Event()
+        self._watchdog = None
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    def stats(self):
+        return {
+            "threshold_ms": round(self.threshold * 1000, 1),
+            "stalls": self.stalls,
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "total_blocked_ms": round(self.total_blocked * 1000, 1),
+            "last_stall": self.last_stall,
+        }
+
+    async def _heartbeat(self):
+        while True:
+            self._beat = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - self._beat - self.interval
+            if lag > self.threshold:
+                self._record(lag)
+            self._stack = None
+
+    def _record(self, lag):
+        self.stalls += 1
+        self.max_lag = max(self.max_lag, lag)
+        self.total_blocked += lag
+        self.last_stall = {
+            "at": datetime.now().isoformat(timespec="seconds"),
+            "lag_ms": round(lag * 1000, 1),
+            "stack": self._stack,
+        }
+        where = f" in {self._stack[-1]}" if self._stack else ""
+        print(f"Event loop blocked for {lag * 1000:.0f} ms{where}")
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            overdue = time.perf_counter() - self._beat - self.interval
+            if overdue > self.threshold and self._stack is None:
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is not None:
+                    self._stack = [
+                        f"{entry.filename}:{entry.lineno} in {entry.name}"
+                        for entry in traceback.extract_stack(frame)[-8:]
+                    ]
@@ -1,14 +1,81 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
-from app.api.routes import router
+from app.api.routes import router, AVAILABLE_INDICATORS
+from app.api.services.cache import create_cache
+from app.api.services.fred_service import FREDService
+from app.api.services.expression_service import ExpressionService
+from app.api.services.analytics_service import AnalyticsService
+from app.api.services.impact_service import ImpactService
+from app.api.services.regional_service import RegionalService
+from app.api.services.scraper_service import ScraperService
+from app.api.services.yield_curve_service import YieldCurveService
+from app.api.services.search_service import SearchService
+from app.api.services.stream_service import LatestValueStream
+from app.api.services.refresh_scheduler import RefreshScheduler
+from app.config import PROFILING_ENABLED, LOOP_MONITOR_ENABLED, REFRESH_SCHEDULER_ENABLED, CACHE_TTL_SERIES, CACHE_TTL_SERIES_SCHEDULED
+from app.profiling import ProfilingMiddleware, TimedJSONResponse
+from app.executor import shutdown_executor
+from app.loop_monitor import LoopLagMonitor
+from app.deadlines import DeadlineMiddleware
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # logs anything that blocks the event loop (see /api/diagnostics/event-loop)
+    app.state.loop_monitor = LoopLagMonitor()
+    if LOOP_MONITOR_ENABLED:
+        app.state.loop_monitor.start()
+
+    # services are built when the server starts rather than at import time,
+    # so importing the app stays cheap and nothing is constructed twice under reload
+    # all services share one cache, so with a shared backend every worker sees the same data
+    cache = create_cache()
+    app.state.cache = cache
+    # when the scheduler invalidates series as FRED updates them, they can stay cached much longer
+    series_ttl = CACHE_TTL_SERIES_SCHEDULED if REFRESH_SCHEDULER_ENABLED else CACHE_TTL_SERIES
+    app.state.fred_service = FREDService(cache, series_ttl=series_ttl)
+    app.state.expression_service = ExpressionService(app.state.fred_service, cache)
+    app.state.analytics_service = AnalyticsService(app.state.fred_service, cache)
+    app.state.impact_service = ImpactService(app.state.fred_service, cache)
+    app.state.regional_service = RegionalService(cache)
+    app.state.scraper_service = ScraperService(cache)
+    app.state.yield_curve_service = YieldCurveService()
+
+    # series search, loaded from a local snapshot and rebuilt in the background
+    app.state.search_service = SearchService(app.state.fred_service, catalog=AVAILABLE_INDICATORS)
+    app.state.search_service.start()
+
+    # background refresher behind the /stream endpoints
+    # with the scheduler on, it refreshes changed series in the shared cache, so the stream only reads that
+    app.state.latest_stream = LatestValueStream(app.state.fred_service, poll_upstream=not REFRESH_SCHEDULER_ENABLED)
+    app.state.latest_stream.start()
+
+    app.state.refresh_scheduler = RefreshScheduler(app.state.fred_service)
+    if REFRESH_SCHEDULER_ENABLED:
+        # series refreshed after a FRED update are pushed to stream subscribers right away
+        app.state.refresh_scheduler.add_listener(app.state.latest_stream.publish)
+        app.state.refresh_scheduler.start()
+    yield
+    await app.state.refresh_scheduler.stop()
+    await app.state.search_service.stop()
+    await app.state.latest_stream.stop()
+    await cache.close()
+    await app.state.loop_monitor.stop()
+    shutdown_executor()
 
 app = FastAPI(
     title="Federal Reserve & Economic Statistical Tracker API",
     description="API for fetching economic indicators from FRED and other sources",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=TimedJSONResponse,
+    lifespan=lifespan
 )
 
+# per-request deadlines, and cancellation of requests whose client went away
+# (added before CORS, so the 504 it sends still carries the CORS headers)
+app.add_middleware(DeadlineMiddleware)
+
 # this part is configuring CORS
 app.add_middleware(
     CORSMiddleware,
@@ -16,8 +83,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Profile-File"],
 )
 
+# request profiling (Server-Timing header + on-demand speedscope profiles)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 app.include_router(router, prefix="/api")
 
 # endpoint
@@ -0,0 +1,203 @@
+import contextvars
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.config import PROFILE_DIR, PROFILE_SAMPLE_INTERVAL
+
+# timings for the request currently being handled (None outside the middleware)
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """Accumulates time spent in named phases of a single request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def server_timing(self):
+        """Build the Server-Timing header value (durations in milliseconds)."""
+        total = time.perf_counter() - self.started
+        upstream = self.phases.get("upstream", 0.0)
+        serialize = self.phases.get("serialize", 0.0)
+        # whatever isn't waiting on upstream or encoding JSON is our own work
+        compute = max(total - upstream - serialize, 0.0)
+
+        parts = [
+            f"upstream;dur={upstream * 1000:.1f}",
+            f"compute;dur={compute * 1000:.1f}",
+            f"serialize;dur={serialize * 1000:.1f}",
+        ]
+        for name, seconds in self.phases.items():
+            if name not in ("upstream", "serialize"):
+                parts.append(f"{name};dur={seconds * 1000:.1f}")
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+@contextmanager
+def phase(name):
+    """
+    Time a block of code as part of the current request's Server-Timing breakdown.
+
+    Does nothing when profiling is disabled or outside of a request.
+    Concurrent blocks of the same phase are summed, so upstream time for
+    requests made in parallel can exceed the wall clock time.
+    """
+    timings = _request_timings.get()
+    if timings is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that records its encoding time as the 'serialize' phase."""
+
+    def render(self, content):
+        with phase("serialize"):
+            return super().render(content)
+
+
+class SamplingProfiler:
+    """
+    Samples the call stack of one thread at a fixed interval.
+
+    The sampling runs in a background thread so the profiled code (the event
+    loop) doesn't have to cooperate. Note that the event loop is shared, so
+    samples can include work done for other in-flight requests.
+    """
+
+    def __init__(self, thread_id, interval=PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.frames = []
+        self.frame_index = {}
+        self.samples = []
+        self.weights = []
+        self._stop = threading.Event()
+        self._thread = None
+        self.started = None
+        self.stopped = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.stopped = time.perf_counter()
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_id(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+
+            self.samples.append(stack)
+            self.weights.append(now - last)
+            last = now
+
+    def _frame_id(self, code):
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        if key not in self.frame_index:
+            self.frame_index[key] = len(self.frames)
+            self.frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+        return self.frame_index[key]
+
+    def to_speedscope(self, name):
+        """Export the samples in the speedscope file format (https://www.speedscope.app)."""
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": self.frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": (self.stopped or time.perf_counter()) - self.started,
+                "samples": self.samples,
+                "weights": self.weights,
+            }],
+            "name": name,
+            "exporter": "economic-tracker-api",
+        }
+
+
+def _profile_requested(request: Request):
+    flag = request.query_params.get("profile") or request.headers.get("x-profile")
+    return bool(flag) and flag.lower() not in ("0", "false", "no")
+
+
+def _save_profile(profile, request: Request):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", request.url.path).strip("_") or "root"
+    filename = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{slug}.speedscope.json"
+    path = os.path.join(PROFILE_DIR, filename)
+    with open(path, "w") as f:
+        json.dump(profile, f)
+    return path
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    """
+    Adds a Server-Timing header to every response, and when a request asks for it
+    (?profile=1 or 'X-Profile: 1') runs a sampling profiler for the duration of
+    the request and stores a speedscope profile in PROFILE_DIR.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        timings = RequestTimings()
+        token = _request_timings.set(timings)
+
+        profiler = None
+        if _profile_requested(request):
+            profiler = SamplingProfiler(threading.get_ident())
+            profiler.start()
+
+        try:
+            response = await call_next(request)
+        finally:
+            _request_timings.reset(token)
+            if profiler:
+                profiler.stop()
+
+        response.headers["Server-Timing"] = timings.server_timing()
+
+        if profiler:
+            try:
+                path = _save_profile(profiler.to_speedscope(f"{request.method} {request.url.path}"), request)
+                response.headers["X-Profile-File"] = path
+            except Exception as e:
+                print(f"Error saving request profile: {str(e)}")
+
+        return response
@@ -0,0 +1,221 @@
+"""
+Preload every series the API can serve into the cache.
+
+After a deploy or a cache wipe the first users would otherwise wait on every
+cold FRED download. This fetches the national indicators (full history,
+metadata and latest value), the regional map/state responses and the county
+and metro area panels, through the same services the API uses, so everything
+lands in the shared cache.
+
+Progress is checkpointed, so an interrupted run picks up where it stopped;
+tasks finished longer ago than the cache TTL of what they warmed run again.
+A run that finishes without failures removes its checkpoint.
+
+Usage (from the backend directory, with CACHE_BACKEND set to sqlite or redis):
+    python -m app.warmup [--concurrency 8] [--rate 120] [--reset] [--list]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+
+from app.config import (
+    CACHE_BACKEND, FRED_RATE_LIMIT, REFRESH_SCHEDULER_ENABLED, CACHE_TTL_SERIES, CACHE_TTL_SERIES_SCHEDULED,
+    CACHE_TTL_LATEST, CACHE_TTL_METADATA
+)
+from app.api.routes import AVAILABLE_INDICATORS
+from app.api.services.cache import create_cache
+from app.api.services.fred_service import FREDService
+from app.api.services.regional_service import RegionalService
+from app.api.services.rate_limit import fred_keys
+
+DEFAULT_CHECKPOINT = "cache/warmup_checkpoint.json"
+
+# how long a finished task stays done: the shortest TTL among the cache entries it writes
+# (series tasks also cache the latest value, regional/state responses are latest-value data)
+TASK_TTL = {
+    "series": CACHE_TTL_LATEST,
+    "regional": CACHE_TTL_LATEST,
+    "state": CACHE_TTL_LATEST,
+    "panel": CACHE_TTL_METADATA,
+}
+
+
+def catalog(regional_service):
+    """
+    Every warm-up task, as ids like "series:UNRATE", "regional:PCPI", "state:PCPI:CA" or "panel:UNRATE:county".
+
+    Only the national indicators are warmed as series: the regional and state
+    responses fetch the per-state series themselves, latest values only, so
+    their full histories would never be read.
+    """
+    tasks = [f"series:{series_id}" for series_id in dict.fromkeys(indicator["id"] for indicator in AVAILABLE_INDICATORS)]
+    for indicator in regional_service.regional_indicators:
+        tasks.append(f"regional:{indicator}")
+        tasks += [f"state:{indicator}:{state_code}" for state_code in regional_service.state_codes]
+    for indicator in regional_service.panel_indicators:
+        tasks += [f"panel:{indicator}:{level}" for level in ("state", "msa", "county")]
+    return tasks
+
+
+async def run_task(task, fred_service, regional_service):
+    kind, _, rest = task.partition(":")
+    if kind == "series":
+        # the full history fills the range cache, so any later window is a slice of it;
+        # the latest value also caches the series metadata
+        await fred_service.get_series(rest)
+        await fred_service.get_latest_value(rest)
+    elif kind == "regional":
+        await regional_service.get_regional_data(rest)
+    elif kind == "state":
+        indicator, state_code = rest.split(":")
+        await regional_service.get_state_data(indicator, state_code)
+    elif kind == "panel":
+        # stores the county/metro area panel and precomputes its latest map
+        indicator, level = rest.split(":")
+        await regional_service.get_choropleth(indicator, level)
+    else:
+        raise ValueError(f"Unknown warm-up task: {task}")
+
+
+class Checkpoint:
+    """Which tasks are done and when, saved to a JSON file so a later run can skip them."""
+
+    def __init__(self, path, resume=True):
+        self.path = path
+        self.done = {}
+        self.failed = {}
+        if resume and os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            self.done = data.get("done", {})
+            self.failed = data.get("failed", {})
+
+    def is_fresh(self, task, now=None):
+        """Whether the task finished recently enough that what it cached hasn't expired."""
+        finished = self.done.get(task)
+        if finished is None:
+            return False
+        return (now or time.time()) - finished < TASK_TTL[task.partition(":")[0]]
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump({"done": self.done, "failed": self.failed}, f)
+        os.replace(temporary, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+async def warm_up(tasks, checkpoint, concurrency, fred_service, regional_service, progress_interval=5.0):
+    """Run the tasks the checkpoint doesn't have as fresh; returns the number that succeeded and the errors."""
+    now = time.time()
+    pending = [task for task in tasks if not checkpoint.is_fresh(task, now)]
+    queue = asyncio.Queue()
+    for task in pending:
+        queue.put_nowait(task)
+
+    succeeded = 0
+    errors = Counter()
+    started = time.perf_counter()
+    requests_before = fred_keys.acquired
+
+    def report(final=False):
+        elapsed = time.perf_counter() - started
+        finished = succeeded + sum(errors.values())
+        requests = fred_keys.acquired - requests_before
+        print(
+            f"{'done' if final else 'progress'}: {finished}/{len(pending)} tasks "
+            f"({succeeded} ok, {sum(errors.values())} failed) in {elapsed:.0f}s - "
+            f"{finished / elapsed if elapsed else 0:.1f} tasks/s, {requests / elapsed * 60 if elapsed else 0:.0f} FRED requests/min"
+        )
+
+    async def worker():
+        nonlocal succeeded
+        while not queue.empty():
+            task = queue.get_nowait()
+            try:
+                await run_task(task, fred_service, regional_service)
+                checkpoint.done[task] = time.time()
+                checkpoint.failed.pop(task, None)
+                succeeded += 1
+            except Exception as e:
+                checkpoint.failed[task] = str(e)
+                errors[str(e)[:120]] += 1
+
+    async def reporter():
+        while True:
+            await asyncio.sleep(progress_interval)
+            checkpoint.save()
+            report()
+
+    reporting = asyncio.create_task(reporter())
+    try:
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+    finally:
+        reporting.cancel()
+        checkpoint.save()
+        report(final=True)
+    return succeeded, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preload every series the API serves into the cache")
+    parser.add_argument("--concurrency", type=int, default=8, help="tasks in flight at once")
+    parser.add_argument("--rate", type=int, default=FRED_RATE_LIMIT, help="FRED requests per minute per API key (0: no limit)")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="progress file used to resume")
+    parser.add_argument("--reset", action="store_true", help="ignore an existing checkpoint and start over")
+    parser.add_argument("--list", action="store_true", help="print the tasks and exit")
+    args = parser.parse_args()
+
+    if CACHE_BACKEND == "memory":
+        print("Warning: CACHE_BACKEND is 'memory', so the warmed cache disappears when this command exits. "
+              "Use the sqlite or redis backend the API runs with.")
+
+    async def run():
+        cache = create_cache()
+        series_ttl = CACHE_TTL_SERIES_SCHEDULED if REFRESH_SCHEDULER_ENABLED else CACHE_TTL_SERIES
+        fred_service = FREDService(cache, series_ttl=series_ttl)
+        regional_service = RegionalService(cache)
+
+        tasks = catalog(regional_service)
+        if args.list:
+            print("\n".join(tasks))
+            return 0
+
+        if not fred_service.api_key:
+            print("FRED API key not configured")
+            return 1
+
+        checkpoint = Checkpoint(args.checkpoint, resume=not args.reset)
+        fresh = sum(checkpoint.is_fresh(task) for task in tasks)
+        if fresh:
+            print(f"resuming: {fresh} of {len(tasks)} tasks already done")
+
+        fred_keys.set_rate(args.rate)
+        try:
+            _, errors = await warm_up(tasks, checkpoint, args.concurrency, fred_service, regional_service)
+        finally:
+            await cache.close()
+
+        if errors:
+            print(f"{sum(errors.values())} tasks failed (run again to retry them):")
+            for message, count in errors.most_common(5):
+                print(f"  {count:5d}x {message}")
+            return 1
+
+        checkpoint.remove()
+        return 0
+
+    raise SystemExit(asyncio.run(run()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Throughput benchmark for the /tools/impact Monte Carlo engine.
+
+Builds a synthetic 40-year monthly history of inflation and rate changes and
+times the vectorised simulation (plus percentile bands) for several numbers
+of paths and horizons, against a plain Python loop over paths and months.
+It also times a repeated request, answered from the memoized result of its
+input bucket.
+
+Usage (from the backend directory):
+    python -m benchmarks.impact [--loop-paths 200]
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from app.api.services import impact
+from app.api.services.cache import MemoryCache
+
+
+def synthetic_history(months=480, seed=0):
+    rng = np.random.default_rng(seed)
+    return impact.ImpactHistory(
+        rng.normal(0.0025, 0.003, months), rng.normal(-0.01, 0.2, months), rng.normal(-0.008, 0.15, months), 4.3, 6.8
+    )
+
+
+def python_loop(history, inputs, simulations, seed=0):
+    """The straightforward version: one path at a time, one month at a time."""
+    rng = np.random.default_rng(seed)
+    years, term = inputs["years"], inputs["mortgage_term"] * 12
+    margin = inputs["mortgage_rate"] - history.mortgage_rate
+    surplus = (inputs["income"] - inputs["expenses"]) / 12
+    inflation, fed_changes, mortgage_changes = (
+        history.inflation.tolist(), history.fed_changes.tolist(), history.mortgage_changes.tolist()
+    )
+    results = []
+    for _ in range(simulations):
+        starts = rng.integers(0, len(history) - impact.BLOCK_MONTHS + 1, size=years)
+        price, fed, market = 1.0, history.fed_funds, history.mortgage_rate
+        balance, principal, rate = float(inputs["savings"]), float(inputs["mortgage"]), float(inputs["mortgage_rate"])
+        monthly = float(impact.payment(principal, rate, term))
+        path = []
+        for year in range(years):
+            if inputs["variable_rate"] and 0 < year < inputs["mortgage_term"]:
+                rate = max(market + margin, impact.MIN_MORTGAGE_RATE)
+                monthly = float(impact.payment(principal, rate, term - year * 12))
+            for month in range(impact.BLOCK_MONTHS):
+                index = starts[year] + month
+                price *= np.exp(inflation[index])
+                fed = max(fed + fed_changes[index], 0.0)
+                market = market + mortgage_changes[index]
+                balance = balance * (1 + fed * impact.SAVINGS_RATE_SHARE / 1200) + surplus * price
+                if year < inputs["mortgage_term"]:
+                    principal = max(principal * (1 + rate / 1200) - monthly, 0.0)
+            path.append((price, balance, monthly if year < inputs["mortgage_term"] else 0.0))
+        results.append(path)
+    return np.array(results)
+
+
+def best_of(function, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return result, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo throughput of the personal impact calculator")
+    parser.add_argument("--loop-paths", type=int, default=200)
+    args = parser.parse_args()
+
+    history = synthetic_history()
+    print(f"history: {len(history)} months, chunks of {impact.CHUNK_PATHS} paths")
+    for years in (10, 30):
+        inputs = impact.bucket_inputs(60000, 48000, 25000, 300000, 30, 7.1, True, years)
+        for simulations in (1000, 5000, 20000):
+            _, elapsed = best_of(lambda: impact.run(history, inputs, simulations))
+            print(f"{years:2d} years x {simulations:5d} paths: {elapsed * 1000:7.1f} ms "
+                  f"({simulations / elapsed:9,.0f} paths/s, {simulations * years * 12 / elapsed / 1e6:5.1f}M path-months/s)")
+
+        _, loop_time = best_of(lambda: python_loop(history, inputs, args.loop_paths), repeat=1)
+        loop_rate = args.loop_paths / loop_time
+        _, vector_time = best_of(lambda: impact.run(history, inputs, 5000))
+        print(f"{years:2d} years, Python loop: {loop_rate:9,.0f} paths/s "
+              f"(vectorised is {5000 / vector_time / loop_rate:.0f}x faster)")
+
+    async def memoized():
+        cache = MemoryCache()
+        inputs = impact.bucket_inputs(61234, 48000, 25000, 300000, 30, 7.1, True, 10)
+        key = f"impact:{inputs}:5000"
+        await cache.get_or_set(key, lambda: asyncio.to_thread(impact.run, history, inputs, 5000), 3600)
+
+        started = time.perf_counter()
+        for income in range(61200, 61250):
+            # nearby inputs land in the same bucket
+            bucket = impact.bucket_inputs(income, 48000, 25000, 300000, 30, 7.1, True, 10)
+            await cache.get_or_set(f"impact:{bucket}:5000", None, 3600)
+        return (time.perf_counter() - started) / 50
+
+    print(f"memoized request (same input bucket): {asyncio.run(memoized()) * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Memory benchmark for holding the full indicator catalog in memory.
+
+Builds synthetic full-history observations for every series the API serves
+(the national indicators plus each regional indicator for every state) and
+compares the memory taken by the old list-of-dicts representation with the
+array-backed Series, then fills a byte-budgeted MemoryCache with the catalog.
+
+Usage (from the backend directory):
+    python -m benchmarks.series_memory [--budget-mb 64]
+"""
+import argparse
+import asyncio
+import datetime
+import time
+import tracemalloc
+
+from app.api.routes import get_available_indicators
+from app.api.services.cache import MemoryCache
+from app.api.services.regional_service import RegionalService
+from app.api.services.series import Series
+
+# approximate full-history lengths, since the benchmark runs without FRED access
+NATIONAL_LENGTHS = {
+    "FEDFUNDS": 850, "DFF": 25600, "UNRATE": 920, "CPIAUCSL": 930,
+    "GDPC1": 310, "PAYEMS": 1030, "T10Y2Y": 12400, "SP500": 2600,
+}
+REGIONAL_LENGTHS = {"UNRATE": 580, "MSPUS": 100, "PCPI": 95}
+
+
+def catalog():
+    """(series_id, number of observations) for every series the API can serve."""
+    indicators = asyncio.run(get_available_indicators())["indicators"]
+    series = [(indicator["id"], NATIONAL_LENGTHS.get(indicator["id"], 1000)) for indicator in indicators]
+
+    regional = RegionalService()
+    for indicator, info in regional.regional_indicators.items():
+        for state_code in regional.state_codes:
+            series.append((info["pattern"].format(state_code=state_code), REGIONAL_LENGTHS[indicator]))
+    return series
+
+
+def fake_observations(length):
+    start = datetime.date(1950, 1, 1)
+    return [
+        {"date": (start + datetime.timedelta(days=i)).isoformat(), "value": f"{(i % 1000) / 10:.2f}"}
+        for i in range(length)
+    ]
+
+
+def measure(build, observations):
+    """Peak memory (bytes) retained by the objects build() returns, plus build time."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = [build(obs) for obs in observations]
+    elapsed = time.perf_counter() - started
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, elapsed
+
+
+def as_records(observations):
+    # the representation the API used to keep: one dict per observation
+    return [{"date": obs["date"], "value": float(obs["value"])} for obs in observations]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory used by the full indicator catalog")
+    parser.add_argument("--budget-mb", type=float, default=64)
+    args = parser.parse_args()
+
+    series = catalog()
+    observations = [fake_observations(length) for _, length in series]
+    points = sum(length for _, length in series)
+    print(f"catalog: {len(series)} series, {points:,} observations")
+
+    _, dict_bytes, dict_time = measure(as_records, observations)
+    compact, series_bytes, series_time = measure(Series.from_observations, observations)
+    print(f"list of dicts: {dict_bytes / 1e6:8.2f} MB ({dict_bytes / points:6.1f} B/point), decoded in {dict_time * 1000:.0f} ms")
+    print(f"Series arrays: {series_bytes / 1e6:8.2f} MB ({series_bytes / points:6.1f} B/point), decoded in {series_time * 1000:.0f} ms")
+    print(f"reduction:     {dict_bytes / series_bytes:8.1f}x")
+
+    cache = MemoryCache(max_entries=len(series) + 1, max_bytes=int(args.budget_mb * 1024 * 1024))
+
+    async def fill():
+        for (series_id, _), values in zip(series, compact):
+            await cache.set(f"fred:obs:{series_id}", values, 3600)
+
+    asyncio.run(fill())
+    print(f"MemoryCache ({args.budget_mb:g} MB budget): {len(cache._entries)}/{len(series)} series kept, "
+          f"{cache.total_bytes / 1e6:.2f} MB accounted")
+
+
+if __name__ == "__main__":
+    main()
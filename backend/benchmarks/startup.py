@@ -0,0 +1,101 @@
+"""
+Startup (cold import) benchmark for the API.
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter, reports
+the heaviest imports and fails (exit code 1) if the time the app adds on top of
+its framework imports exceeds the budget, or if a module that should be loaded
+lazily was imported.
+
+Usage (from the backend directory):
+    python -m benchmarks.startup [--budget-ms 250] [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# what the app can't avoid importing; its cost is reported but not budgeted
+FRAMEWORK_IMPORTS = "import fastapi, uvicorn, httpx"
+
+# modules that must only be imported on first use, never at startup
+LAZY_MODULES = ["pandas", "numpy", "bs4", "fredapi"]
+
+DEFAULT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "250"))
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_imports(statement="import app.main"):
+    """Run a statement in a fresh interpreter and parse the -X importtime output."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Running {statement!r} failed:\n{result.stderr}")
+
+    # lines look like "import time:       412 |       9512 |   fastapi"
+    # where nesting is shown by extra indentation of the module name
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), depth, int(cumulative_us)))
+    return entries
+
+
+def measure_app_imports(statement="import app.main"):
+    """Imports triggered by a statement, leaving out interpreter startup."""
+    baseline = {name for name, _, _ in measure_imports("pass")}
+    return [entry for entry in measure_imports(statement) if entry[0] not in baseline]
+
+
+def total_ms(entries):
+    return sum(us for _, depth, us in entries if depth == 0) / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the API's cold import time")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    totals, frameworks = [], []
+    entries = []
+    for _ in range(args.runs):
+        entries = measure_app_imports()
+        totals.append(total_ms(entries))
+        frameworks.append(total_ms(measure_app_imports(FRAMEWORK_IMPORTS)))
+
+    # the framework's own import time varies a lot between hosts, so the budget
+    # applies to what the app adds on top of it
+    median_ms = statistics.median(totals)
+    overhead_ms = statistics.median(total - framework for total, framework in zip(totals, frameworks))
+    print(f"import app.main: median {median_ms:.1f} ms over {args.runs} runs "
+          f"(min {min(totals):.1f} ms, max {max(totals):.1f} ms)")
+    print(f"framework ({FRAMEWORK_IMPORTS}): median {statistics.median(frameworks):.1f} ms")
+    print(f"app overhead: median {overhead_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print("heaviest imports below app.main (last run, cumulative):")
+    direct = [entry for entry in entries if entry[1] in (1, 2)]
+    for module, depth, us in sorted(direct, key=lambda entry: entry[2], reverse=True)[:10]:
+        print(f"  {us / 1000:8.1f} ms  {module}")
+
+    failures = []
+    modules = {name.split(".")[0] for name, _, _ in entries}
+    eager = [module for module in LAZY_MODULES if module in modules]
+    if eager:
+        failures.append(f"modules imported eagerly at startup: {', '.join(eager)}")
+    if overhead_ms > args.budget_ms:
+        failures.append(f"app import overhead {overhead_ms:.1f} ms exceeds budget of {args.budget_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark for point-in-time (as_of) queries served from the ALFRED vintage store.
+
+Simulates the revision history of two kinds of series with hundreds of vintages:
+a monthly one like UNRATE (a new observation every month, the last five years
+revised every January) and a quarterly one like GDPC1 (advance, second and
+third estimates, annual revisions, and a comprehensive revision of the whole
+history every five years). Each is encoded the way ALFRED returns it, parsed
+into a VintageStore, checked against full copies of every vintage, and timed.
+
+Usage (from the backend directory):
+    python -m benchmarks.vintages [--lookups 2000]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.api.services.vintages import parse_vintages, OPEN_ENDED
+
+
+def simulate(kind, seed=0):
+    """
+    A series' vintages as ALFRED rows, plus every vintage in full for checking.
+
+    Returns:
+        tuple: (list of {date, value, realtime_start, realtime_end}, {vintage date: {date: value}})
+    """
+    rng = np.random.default_rng(seed)
+    current, rows, open_rows, snapshots = {}, [], {}, {}
+
+    def publish(day, changes):
+        for date, value in changes.items():
+            if date in open_rows:
+                # realtime_end is the last day a value was current
+                rows[open_rows[date]]["realtime_end"] = str(np.datetime64(day) - 1)
+            open_rows[date] = len(rows)
+            rows.append({"date": date, "value": f"{value:.4f}", "realtime_start": day, "realtime_end": str(OPEN_ENDED)})
+            current[date] = round(value, 4)
+        snapshots[day] = dict(current)
+
+    if kind == "monthly":
+        months = np.arange(np.datetime64("1948-01"), np.datetime64("2025-01"))
+        level = 5 + rng.standard_normal(len(months)).cumsum() * 0.1
+        # first vintage in 1960 with the history so far, then one release a month
+        first = int(np.flatnonzero(months == np.datetime64("1960-01"))[0])
+        publish("1960-01-08", {str(month.astype("datetime64[D]")): level[i] for i, month in enumerate(months[:first])})
+        for i in range(first, len(months)):
+            release = str((months[i] + 1).astype("datetime64[D]") + 4)
+            changes = {str(months[i].astype("datetime64[D]")): level[i] + rng.normal(0, 0.1)}
+            if str(months[i]).endswith("-12"):
+                # seasonal factors: the last five years are revised with the December release
+                for j in range(max(i - 59, 0), i):
+                    changes[str(months[j].astype("datetime64[D]"))] = level[j] + rng.normal(0, 0.05)
+            publish(release, changes)
+    else:
+        quarters = np.arange(np.datetime64("1947-01"), np.datetime64("2025-01"), 3)
+        level = 2000 * np.exp(np.cumsum(rng.normal(0.008, 0.01, len(quarters))))
+        first = int(np.flatnonzero(quarters == np.datetime64("1991-10"))[0])
+        publish("1991-11-20", {str(q.astype("datetime64[D]")): level[i] for i, q in enumerate(quarters[:first])})
+        for i in range(first, len(quarters)):
+            date = str(quarters[i].astype("datetime64[D]"))
+            release = quarters[i] + 4
+            for estimate in range(3):
+                day = str((release + estimate).astype("datetime64[D]") + 27)
+                changes = {date: level[i] * (1 + rng.normal(0, 0.003))}
+                if estimate == 2 and str(quarters[i]).endswith("-04"):
+                    # annual revision of the last three years
+                    for j in range(max(i - 12, 0), i):
+                        changes[str(quarters[j].astype("datetime64[D]"))] = level[j] * (1 + rng.normal(0, 0.002))
+                if estimate == 2 and str(quarters[i]).endswith("-07") and int(str(quarters[i])[:4]) % 5 == 0:
+                    # comprehensive revision: a new base year rescales the whole history
+                    scale = rng.uniform(1.05, 1.3)
+                    level[:i] *= scale
+                    changes.update({str(q.astype("datetime64[D]")): level[j] for j, q in enumerate(quarters[:i])})
+                publish(day, changes)
+    return rows, snapshots
+
+
+def median_time(function, arguments):
+    timings = []
+    for argument in arguments:
+        started = time.perf_counter()
+        function(argument)
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings)), float(np.percentile(timings, 99))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Point-in-time queries from the vintage store")
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(1)
+
+    for name, kind in (("UNRATE-like", "monthly"), ("GDPC1-like", "quarterly")):
+        rows, snapshots = simulate(kind)
+        content = json.dumps({"observations": rows}).encode()
+        started = time.perf_counter()
+        store = parse_vintages(content)
+        parse_time = time.perf_counter() - started
+
+        full_bytes = sum(len(snapshot) for snapshot in snapshots.values()) * 16  # datetime64 + float64 per value
+        print(f"{name}: {len(snapshots)} vintages, {len(store)} stored rows")
+        print(f"  ALFRED response {len(content) / 1e6:6.1f} MB, parsed in {parse_time * 1000:.0f} ms")
+        print(f"  store {store.nbytes / 1e6:6.2f} MB vs {full_bytes / 1e6:.2f} MB for every vintage in full "
+              f"({full_bytes / store.nbytes:.0f}x smaller)")
+
+        # every vintage, read back, must match its full copy
+        vintage_days = sorted(snapshots)
+        for day in vintage_days:
+            vintage, series = store.as_of(day)
+            expected = snapshots[day]
+            assert vintage == day and len(series) == len(expected), (day, vintage)
+            assert np.allclose(series.values, [expected[date] for date in sorted(expected)])
+
+        # random as-of dates between the first vintage and today
+        first, last = np.datetime64(vintage_days[0]), np.datetime64("2025-06-30")
+        dates = [str(first + int(offset)) for offset in rng.integers(0, (last - first).astype(int), args.lookups)]
+
+        def uncached(date):
+            store._cache.clear()
+            store.as_of(date)
+
+        for label, function in (("lookup", uncached), ("cached lookup", store.as_of)):
+            median, p99 = median_time(function, dates)
+            print(f"  {label + ':':22}{median * 1e6:8.0f} us median, {p99 * 1e6:8.0f} us p99")
+
+        # an incremental update (the rows fetched with realtime_start = a later vintage)
+        # merged into the store as of an earlier one must give the same store
+        since = vintage_days[len(vintage_days) * 3 // 4]
+        known = [
+            {**row, "realtime_end": row["realtime_end"] if row["realtime_end"] < since else str(OPEN_ENDED)}
+            for row in rows if row["realtime_start"] <= since
+        ]
+        update = [{**row, "realtime_start": max(row["realtime_start"], since)} for row in rows if row["realtime_end"] >= since]
+        old = parse_vintages(json.dumps({"observations": known}).encode())
+        fresh = parse_vintages(json.dumps({"observations": update}).encode())
+        started = time.perf_counter()
+        merged = old.merge(fresh, since)
+        merge_time = time.perf_counter() - started
+        same = all(np.array_equal(getattr(merged, field), getattr(store, field), equal_nan=field == "values")
+                   for field in ("dates", "values", "valid_from", "valid_to", "vintages"))
+        print(f"  incremental update from {since}: {len(update)} rows fetched instead of {len(rows)}, "
+              f"merged in {merge_time * 1000:.1f} ms, {'identical' if same else 'DIFFERENT'} to a full download")
+        assert same
+
+
+if __name__ == "__main__":
+    main()
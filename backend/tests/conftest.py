@@ -0,0 +1,22 @@
+import pytest
+
+from app.api.services import fred_service as fred_service_module
+from app.api.services.cache import MemoryCache
+from app.api.services.fred_service import FREDService
+from app.api.services.rate_limit import KeyPool
+
+
+@pytest.fixture(autouse=True)
+def fred_keys(monkeypatch):
+    """A key pool with one unlimited test key, so nothing needs a real FRED API key."""
+    keys = KeyPool(["test-key"], 0)
+    monkeypatch.setattr(fred_service_module, "fred_keys", keys)
+    return keys
+
+
+def make_fred_service(fake, cache=None):
+    """A FREDService talking to a FakeFRED."""
+    service = FREDService(cache or MemoryCache())
+    service.api_key = "test-key"
+    service.base_url = fake.url
+    return service
@@ -0,0 +1,102 @@
+"""A minimal FRED stand-in served on a local port, for testing FREDService without an API key."""
+import asyncio
+import json
+from urllib.parse import urlsplit, parse_qsl
+
+
+class FakeFRED:
+    """
+    Serves series, series/observations and series/updates from in-memory data.
+
+    series maps a series ID to {"info": {...series metadata...}, "observations":
+    [{"date", "value"}, ...], "aggregated": {"m:avg": [...], ...}}; observation
+    requests with a frequency are answered from "aggregated". updates is the
+    series/updates feed. Every request is recorded in requests as (path, params).
+    """
+
+    def __init__(self, series=None, updates=None):
+        self.series = series or {}
+        self.updates = updates or []
+        self.requests = []
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/fred"
+
+    def calls(self, path, series_id=None):
+        """Requests made to path (optionally for one series)."""
+        return [
+            params for request_path, params in self.requests
+            if request_path == path and (series_id is None or params.get("series_id") == series_id)
+        ]
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b""):
+                pass
+            target = urlsplit(request_line.split()[1].decode())
+            path = target.path.removeprefix("/fred/")
+            params = dict(parse_qsl(target.query))
+            self.requests.append((path, params))
+
+            status, body = self._respond(path, params)
+            data = json.dumps(body).encode()
+            writer.write(
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode()
+                + data
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    def _respond(self, path, params):
+        if path == "series/updates":
+            offset, limit = int(params.get("offset", 0)), int(params.get("limit", 1000))
+            return 200, {"count": len(self.updates), "seriess": self.updates[offset:offset + limit]}
+
+        series = self.series.get(params.get("series_id"))
+        if series is None:
+            return 400, {"error_code": 400, "error_message": "Bad Request. The series does not exist."}
+        if path == "series":
+            return 200, {"seriess": [series["info"]]}
+        if path != "series/observations":
+            return 404, {"error_code": 404, "error_message": "Not Found"}
+
+        observations = series["observations"]
+        if params.get("frequency"):
+            key = f"{params['frequency']}:{params.get('aggregation_method', 'avg')}"
+            if key not in series.get("aggregated", {}):
+                return 400, {"error_code": 400, "error_message": f"Bad Request. No fixture for {key}."}
+            observations = series["aggregated"][key]
+
+        start = params.get("observation_start", "0000-01-01")
+        end = params.get("observation_end", "9999-12-31")
+        observations = [obs for obs in observations if start <= obs["date"] <= end]
+        if params.get("sort_order") == "desc":
+            observations = observations[::-1]
+        if params.get("limit"):
+            observations = observations[:int(params["limit"])]
+        return 200, {"count": len(observations), "observations": observations}
+
+
+def monthly_series(series_id, start_year, end_year):
+    """Fixture data for a monthly series with an observation every month of the years given."""
+    observations = [
+        {"date": f"{year}-{month:02d}-01", "value": f"{year + month / 100:.2f}"}
+        for year in range(start_year, end_year + 1) for month in range(1, 13)
+    ]
+    info = {"id": series_id, "title": series_id, "units": "Index", "frequency_short": "M",
+            "last_updated": "2024-01-12 07:44:02-06"}
+    return {"info": info, "observations": observations}
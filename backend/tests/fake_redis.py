@@ -0,0 +1,70 @@
+"""A minimal Redis stand-in speaking RESP, for testing RedisCache without a server."""
+import asyncio
+
+
+class FakeRedis:
+    """
+    Serves GET, SET (with NX), DEL, AUTH, SELECT and PING from a dict on a local port.
+
+    Replies to keys listed in slow_keys are delayed by delay seconds, so a
+    test can cancel a command after it was sent but before its reply is read.
+    """
+
+    def __init__(self, slow_keys=(), delay=0.2):
+        self.data = {}
+        self.slow_keys = {key.encode() for key in slow_keys}
+        self.delay = delay
+        self.received = asyncio.Event()
+        self.connections = 0
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"redis://{host}:{port}/0"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                args = []
+                for _ in range(int(line[1:-2])):
+                    length = int((await reader.readline())[1:-2])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                self.received.set()
+                command = args[0].upper()
+                if command == b"GET" and args[1] in self.slow_keys:
+                    await asyncio.sleep(self.delay)
+                writer.write(self._reply(command, args[1:]))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _reply(self, command, args):
+        if command == b"GET":
+            value = self.data.get(args[0])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        if command == b"SET":
+            # expiry (PX) isn't simulated; NX only sets a key that isn't there
+            if b"NX" in (arg.upper() for arg in args[2:]) and args[0] in self.data:
+                return b"$-1\r\n"
+            self.data[args[0]] = args[1]
+            return b"+OK\r\n"
+        if command == b"DEL":
+            return b":%d\r\n" % sum(self.data.pop(key, None) is not None for key in args)
+        if command in (b"AUTH", b"SELECT", b"PING"):
+            return b"+OK\r\n"
+        return b"-ERR unknown command\r\n"
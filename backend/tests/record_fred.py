@@ -0,0 +1,130 @@
+"""
+Record the FRED fixtures the aggregation tests compare against.
+
+For each series in FIXTURE_SERIES, saves its metadata, its native observations
+over WINDOW and FRED's own aggregation of them to every lower frequency with
+avg, sum and eop, to tests/fixtures/fred/<series>.json.
+
+With --synthetic (no API key or network needed) the native observations are
+generated instead and aggregated with pandas following FRED's rules: weeks
+labelled by the Friday they end on, longer periods by their first day, missing
+values skipped, eop the last value in the period, averages rounded like FRED
+rounds them. That is only an independent reference implementation, not FRED's
+own output; the "source" field of each fixture says which kind it is.
+
+Usage (from the backend directory):
+    FRED_API_KEY=... python -m tests.record_fred
+    python -m tests.record_fred --synthetic
+"""
+import argparse
+import json
+import os
+
+import httpx
+import numpy as np
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "fred")
+WINDOW = ("2019-01-01", "2021-12-31")
+METHODS = ("avg", "sum", "eop")
+
+# series ID -> (native frequency, lower frequencies to record)
+FIXTURE_SERIES = {
+    "DGS10": ("D", ("w", "m", "q", "sa", "a")),
+    "ICSA": ("W", ("m", "q", "sa", "a")),
+    "PAYEMS": ("M", ("q", "sa", "a")),
+}
+
+
+def record(series_id, frequencies, api_key):
+    url = "https://api.stlouisfed.org/fred"
+    params = {"series_id": series_id, "api_key": api_key, "file_type": "json",
+              "observation_start": WINDOW[0], "observation_end": WINDOW[1]}
+    with httpx.Client(timeout=30) as client:
+        def get(path, **extra):
+            response = client.get(f"{url}/{path}", params={**params, **extra})
+            response.raise_for_status()
+            return response.json()
+
+        info = get("series")["seriess"][0]
+        aggregated = {
+            f"{frequency}:{method}": _rows(get("series/observations", frequency=frequency, aggregation_method=method))
+            for frequency in frequencies for method in METHODS
+        }
+        return {"source": "recorded from FRED", "window": WINDOW, "info": info,
+                "observations": _rows(get("series/observations")), "aggregated": aggregated}
+
+
+def synthesize(series_id, native, frequencies, seed):
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    if native == "D":
+        dates = pd.bdate_range(*WINDOW)
+        values = np.round(2 + rng.standard_normal(len(dates)).cumsum() * 0.03, 2)
+        # market holidays come through as "."
+        missing = rng.random(len(dates)) < 0.04
+        native_rows = [{"date": str(d.date()), "value": "." if gap else f"{v:.2f}"}
+                       for d, v, gap in zip(dates, values, missing)]
+        decimals = {"avg": 2, "sum": 2, "eop": 2}
+    else:
+        dates = pd.date_range(*WINDOW, freq="W-SAT" if native == "W" else "MS")
+        values = np.round(200000 + rng.standard_normal(len(dates)).cumsum() * 5000)
+        native_rows = [{"date": str(d.date()), "value": f"{v:.0f}"} for d, v in zip(dates, values)]
+        decimals = {"avg": 3, "sum": 0, "eop": 0}
+
+    frame = pd.DataFrame({"date": pd.to_datetime([row["date"] for row in native_rows]),
+                          "value": pd.to_numeric([row["value"] for row in native_rows], errors="coerce")})
+    frame = frame.dropna()
+    aggregated = {}
+    for frequency in frequencies:
+        groups = frame.groupby(_period_label(frame["date"], frequency))["value"]
+        for method in METHODS:
+            result = {"avg": groups.mean, "sum": groups.sum, "eop": groups.last}[method]()
+            aggregated[f"{frequency}:{method}"] = [
+                {"date": label, "value": f"{value:.{decimals[method]}f}"} for label, value in result.items()
+            ]
+
+    info = {"id": series_id, "title": series_id, "units": "", "frequency_short": native,
+            "last_updated": "2022-01-03 15:16:02-06"}
+    return {"source": "synthetic, aggregated with pandas (see tests/record_fred.py)", "window": WINDOW,
+            "info": info, "observations": native_rows, "aggregated": aggregated}
+
+
+def _period_label(dates, frequency):
+    """FRED's date for the period of each date: the Friday ending its week, or the first day of longer periods."""
+    import pandas as pd
+
+    if frequency == "w":
+        return (dates + pd.to_timedelta((4 - dates.dt.weekday) % 7, unit="D")).dt.strftime("%Y-%m-%d")
+    if frequency == "sa":
+        return dates.dt.year.astype(str) + (dates.dt.month <= 6).map({True: "-01-01", False: "-07-01"})
+    period = dates.dt.to_period({"m": "M", "q": "Q", "a": "Y"}[frequency])
+    return period.dt.start_time.dt.strftime("%Y-%m-%d")
+
+
+def _rows(data):
+    return [{"date": obs["date"], "value": obs["value"]} for obs in data["observations"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record FRED aggregation fixtures")
+    parser.add_argument("--synthetic", action="store_true", help="generate the fixtures instead of calling FRED")
+    args = parser.parse_args()
+
+    api_key = os.getenv("FRED_API_KEY")
+    if not args.synthetic and not api_key:
+        parser.error("FRED_API_KEY is needed to record from FRED (or pass --synthetic)")
+
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for seed, (series_id, (native, frequencies)) in enumerate(FIXTURE_SERIES.items()):
+        if args.synthetic:
+            fixture = synthesize(series_id, native, frequencies, seed)
+        else:
+            fixture = record(series_id, frequencies, api_key)
+        with open(os.path.join(FIXTURE_DIR, f"{series_id}.json"), "w") as f:
+            json.dump(fixture, f, indent=1)
+        print(f"{series_id}: {len(fixture['observations'])} observations, {fixture['source']}")
+
+
+if __name__ == "__main__":
+    main()
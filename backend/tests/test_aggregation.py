@@ -0,0 +1,116 @@
+import asyncio
+import glob
+import json
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from app.api import routes
+from app.api.services.analytics_service import AnalyticsService
+from app.api.services.cache import MemoryCache
+from app.api.services.expression_service import ExpressionService
+from tests.conftest import make_fred_service
+from tests.fake_fred import FakeFRED
+from tests.record_fred import FIXTURE_DIR, METHODS
+
+
+def load_fixtures():
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.json"))):
+        with open(path) as f:
+            fixture = json.load(f)
+        fixtures[fixture["info"]["id"]] = fixture
+    return fixtures
+
+
+FIXTURES = load_fixtures()
+CASES = [
+    (series_id, *key.split(":"))
+    for series_id, fixture in FIXTURES.items() for key in fixture["aggregated"]
+]
+
+
+def test_fixtures_cover_every_method():
+    assert CASES
+    for fixture in FIXTURES.values():
+        frequencies = {key.split(":")[0] for key in fixture["aggregated"]}
+        assert {f"{frequency}:{method}" for frequency in frequencies for method in METHODS} == set(fixture["aggregated"])
+
+
+@pytest.mark.parametrize("series_id,frequency,method", CASES)
+def test_local_aggregation_matches_reference(series_id, frequency, method):
+    # the reference is each fixture's "aggregated" data: FRED's own output once recorded with
+    # tests/record_fred.py, or until then an independent aggregation with pandas (see its "source")
+    fixture = FIXTURES[series_id]
+    start, end = fixture["window"]
+
+    async def scenario():
+        fake = await FakeFRED({series_id: fixture}).start()
+        try:
+            service = make_fred_service(fake)
+            series = await service.get_series(series_id, start, end, frequency, method)
+            # aggregated from the native data, not downloaded at the lower frequency
+            assert not [call for call in fake.calls("series/observations") if "frequency" in call]
+            return series
+        finally:
+            await fake.stop()
+
+    series = asyncio.run(scenario())
+    expected = fixture["aggregated"][f"{frequency}:{method}"]
+    assert [record["date"] for record in series.to_records()] == [obs["date"] for obs in expected]
+    for record, obs in zip(series.to_records(), expected):
+        # aggregates are rounded to the digits sent
+        decimals = len(obs["value"].partition(".")[2])
+        assert abs(record["value"] - float(obs["value"])) <= 0.5 * 10 ** -decimals + 1e-9, (record, obs)
+
+
+def test_native_frequency_shares_the_native_download():
+    fixture = FIXTURES["PAYEMS"]
+    start, end = fixture["window"]
+
+    async def scenario():
+        fake = await FakeFRED({"PAYEMS": fixture}).start()
+        try:
+            service = make_fred_service(fake)
+            native = await service.get_series("PAYEMS", start, end)
+            monthly = await service.get_series("PAYEMS", start, end, "m", "avg")
+            assert monthly.to_records() == native.to_records()
+            assert len(fake.calls("series/observations")) == 1
+            assert not [call for call in fake.calls("series/observations") if "frequency" in call]
+        finally:
+            await fake.stop()
+
+    asyncio.run(scenario())
+
+
+def quarterly_series(series_id):
+    observations = [{"date": f"{year}-{month:02d}-01", "value": f"{year}.{month}"}
+                    for year in range(2015, 2024) for month in (1, 4, 7, 10)]
+    return {"info": {"id": series_id, "title": series_id, "units": "", "frequency_short": "Q",
+                     "last_updated": "2024-01-25 07:53:02-06"}, "observations": observations}
+
+
+def test_higher_frequency_than_native_is_a_client_error():
+    async def scenario():
+        fake = await FakeFRED({"GDPQ": quarterly_series("GDPQ"), "PAYEMS": FIXTURES["PAYEMS"]}).start()
+        try:
+            cache = MemoryCache()
+            service = make_fred_service(fake, cache)
+            requests = [
+                routes.get_indicator("GDPQ", "2016-01-01", "2020-12-31", "m", None, None, fred_service=service),
+                routes.get_correlation("GDPQ,PAYEMS", 4, None, "2016-01-01", "2020-12-31", "m", None,
+                                       analytics_service=AnalyticsService(service, cache)),
+                routes.get_computed_indicator("lag(GDPQ,1)", "2016-01-01", "2020-12-31", "m", None,
+                                              expression_service=ExpressionService(service, cache)),
+            ]
+            for request in requests:
+                with pytest.raises(HTTPException) as error:
+                    await request
+                assert error.value.status_code == 400 and "GDPQ" in error.value.detail
+            # never sent to FRED
+            assert not [call for call in fake.calls("series/observations") if "frequency" in call]
+        finally:
+            await fake.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,77 @@
+import asyncio
+
+from app.api.services.cache import RedisCache
+from tests.fake_redis import FakeRedis
+
+
+def test_redis_round_trip():
+    async def scenario():
+        server = await FakeRedis().start()
+        cache = RedisCache(server.url)
+        try:
+            await cache.set("key", {"v": 1}, 60)
+            assert await cache.get("key") == {"v": 1}
+            await cache.delete("key")
+            assert await cache.get("key") is None
+        finally:
+            await cache.close()
+            await server.stop()
+
+    asyncio.run(scenario())
+
+
+def test_redis_command_cancelled_mid_reply_does_not_leak_into_next_command():
+    async def scenario():
+        server = await FakeRedis(slow_keys=["slow"]).start()
+        cache = RedisCache(server.url)
+        try:
+            await cache.set("slow", {"v": "slow-value"}, 60)
+            await cache.set("fast", {"v": "fast-value"}, 60)
+
+            # cancel the GET once the server has it, before the reply arrives
+            server.received.clear()
+            pending = asyncio.create_task(cache.get("slow"))
+            await server.received.wait()
+            pending.cancel()
+            try:
+                await pending
+            except asyncio.CancelledError:
+                pass
+
+            assert await cache.get("fast") == {"v": "fast-value"}
+            assert await cache.get("slow") == {"v": "slow-value"}
+            # the interrupted connection was dropped rather than reused
+            assert server.connections == 2
+        finally:
+            await cache.close()
+            await server.stop()
+
+    asyncio.run(scenario())
+
+
+def test_get_or_set_cancelled_caller_does_not_poison_redis():
+    async def scenario():
+        server = await FakeRedis(slow_keys=["slow"]).start()
+        cache = RedisCache(server.url)
+        try:
+            await cache.set("slow", {"v": "slow-value"}, 60)
+            await cache.set("fast", {"v": "fast-value"}, 60)
+
+            server.received.clear()
+            pending = asyncio.create_task(cache.get_or_set("slow", None, 60))
+            await server.received.wait()
+            pending.cancel()
+            try:
+                await pending
+            except asyncio.CancelledError:
+                pass
+
+            async def loader():
+                raise AssertionError("fast is cached, the loader shouldn't run")
+
+            assert await cache.get_or_set("fast", loader, 60) == {"v": "fast-value"}
+        finally:
+            await cache.close()
+            await server.stop()
+
+    asyncio.run(scenario())
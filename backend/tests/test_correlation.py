@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from app.api.services import correlation
+from app.api.services.correlation import lagged_correlations
+
+
+def matrix_with_gaps(rows=120, columns=3, seed=1):
+    rng = np.random.default_rng(seed)
+    matrix = np.cumsum(rng.normal(size=(rows, columns)), axis=0)
+    # the second column follows the target three periods later
+    matrix[3:, 1] = matrix[:-3, 0] + rng.normal(scale=0.1, size=rows - 3)
+    matrix[rng.random((rows, columns)) < 0.1] = np.nan
+    matrix[:20, 2] = np.nan
+    return matrix
+
+
+def reference(matrix, target, max_lag):
+    """Pearson correlation lag by lag, over the rows both series have values for."""
+    rows, columns = matrix.shape
+    result = np.full((columns, 2 * max_lag + 1), np.nan)
+    for column in range(columns):
+        for index, lag in enumerate(range(-max_lag, max_lag + 1)):
+            # the target at t against the column at t - lag
+            a = matrix[max(lag, 0):rows + min(lag, 0), target]
+            b = matrix[max(-lag, 0):rows - max(lag, 0), column]
+            both = ~(np.isnan(a) | np.isnan(b))
+            if both.sum() >= correlation.MIN_OVERLAP:
+                result[column, index] = np.corrcoef(a[both], b[both])[0, 1]
+    return result
+
+
+@pytest.mark.parametrize("per_log_size", [0, 10 ** 6], ids=["fft", "direct"])
+def test_lagged_correlations_match_pairwise_pearson(monkeypatch, per_log_size):
+    monkeypatch.setattr(correlation, "FFT_LAGS_PER_LOG_SIZE", per_log_size)
+    matrix = matrix_with_gaps()
+    lagged = lagged_correlations(matrix, 0, 30)
+    expected = reference(matrix, 0, 30)
+
+    assert np.array_equal(np.isnan(lagged), np.isnan(expected))
+    assert np.allclose(lagged, expected, equal_nan=True, atol=1e-9)
+    # column 1 trails the target by three periods, which is a lag of -3
+    assert lagged[1].argmax() == 30 - 3
+
+
+def test_fft_and_direct_sums_agree():
+    mask, values = correlation._centre(matrix_with_gaps(rows=200, columns=4))
+    args = (mask[:, [0]], values[:, [0]], mask, values, 150)
+    assert np.allclose(correlation._lagged_sums_fft(*args), correlation._lagged_sums_direct(*args), atol=1e-8)
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.api import routes
+from tests.conftest import make_fred_service
+from tests.fake_fred import FakeFRED, monthly_series
+
+
+def test_widening_the_cache_backwards_is_not_reported_as_revisions():
+    async def scenario():
+        fake = await FakeFRED({"TEST": monthly_series("TEST", 2015, 2023)}).start()
+        try:
+            service = make_fred_service(fake)
+            # a client loads 2020 onwards and syncs
+            held = await service.get_series("TEST", "2020-01-01", "2023-12-31")
+            first = await service.get_series_since("TEST", "2023-12-01")
+
+            # another request extends the cached range back to 2019, then FRED revises a 2021 value
+            await service.get_series("TEST", "2019-01-01", "2023-12-31")
+            fake.series["TEST"]["observations"][6 * 12 + 2]["value"] = "42.00"
+            await service.refresh_series("TEST")
+
+            delta = await service.get_series_since("TEST", "2023-12-01", first["version"])
+            assert not delta["reset"] and delta["data"] == []
+            assert delta["revised"] == [{"date": "2021-03-01", "value": 42.0}]
+            assert len(held) == 48
+        finally:
+            await fake.stop()
+
+    asyncio.run(scenario())
+
+
+def test_reset_returns_everything_the_client_holds():
+    async def scenario():
+        fake = await FakeFRED({"TEST": monthly_series("TEST", 2015, 2023)}).start()
+        try:
+            service = make_fred_service(fake)
+            # the client's token is from a copy that was since evicted
+            delta = await service.get_series_since("TEST", "2023-06-01", "deadbeef.3", "2020-01-01")
+            assert delta["reset"]
+            dates = [record["date"] for record in delta["data"]]
+            assert dates[0] == "2020-01-01" and dates[-1] == "2023-12-01" and len(dates) == 48
+
+            # without a start, the whole series
+            delta = await service.get_series_since("TEST", "2023-06-01", "deadbeef.3")
+            assert delta["reset"] and len(delta["data"]) == 9 * 12
+
+            # the new token works for the next sync
+            assert not (await service.get_series_since("TEST", "2023-12-01", delta["version"]))["reset"]
+        finally:
+            await fake.stop()
+
+    asyncio.run(scenario())
+
+
+def test_malformed_sync_parameters_are_a_client_error():
+    async def scenario():
+        fake = await FakeFRED({"TEST": monthly_series("TEST", 2015, 2023)}).start()
+        try:
+            service = make_fred_service(fake)
+            for date, version, start in (("2023-13-01", None, None), ("2023-06-01", "garbage", None),
+                                         ("2023-06-01", None, "June 2020")):
+                with pytest.raises(HTTPException) as error:
+                    await routes.get_indicator_since("TEST", date, version, start, fred_service=service)
+                assert error.value.status_code == 400
+            assert fake.calls("series/observations") == []
+        finally:
+            await fake.stop()
+
+    asyncio.run(scenario())
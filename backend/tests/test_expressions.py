@@ -0,0 +1,46 @@
+import asyncio
+
+from app.api.services.cache import MemoryCache
+from app.api.services.expression_service import ExpressionService
+from app.api.services.expressions import compile_expression
+from tests.conftest import make_fred_service
+from tests.fake_fred import FakeFRED, monthly_series
+
+
+def annual_series(series_id, start_year, end_year):
+    observations = [{"date": f"{year}-01-01", "value": f"{1000 + year}"} for year in range(start_year, end_year + 1)]
+    info = {"id": series_id, "title": series_id, "units": "Billions of Dollars", "frequency_short": "A",
+            "last_updated": "2024-03-28 07:56:02-05"}
+    return {"info": info, "observations": observations}
+
+
+def test_lookback_scales_with_the_operands_frequency():
+    expression = compile_expression("lag(GDPA,2)+rolling(PAYEMS,3)")
+    monthly = expression.lookback_days({"GDPA": "M", "PAYEMS": "M"})
+    annual = expression.lookback_days({"GDPA": "A", "PAYEMS": "M"})
+    assert monthly < 100 and annual >= 2 * 365
+    # an operand over several series is as sparse as its sparsest one
+    assert compile_expression("diff(GDPA/PAYEMS,1)").lookback_days({"GDPA": "A", "PAYEMS": "M"}) >= 365
+
+
+def test_lag_and_rolling_of_an_annual_series_cover_the_whole_window():
+    async def scenario():
+        fake = await FakeFRED({"GDPA": annual_series("GDPA", 2000, 2023),
+                               "PAYEMS": monthly_series("PAYEMS", 2000, 2023)}).start()
+        try:
+            cache = MemoryCache()
+            expressions = ExpressionService(make_fred_service(fake, cache), cache)
+            for text, first_value in (("lag(GDPA, 2)", 3013.0), ("rolling(GDPA, 3)", 3014.0), ("diff(GDPA, 2)", 2.0)):
+                result = await expressions.evaluate(text, "2015-01-01", "2020-12-31")
+                assert result["data"][0] == {"date": "2015-01-01", "value": first_value}, text
+                assert len(result["data"]) == 6
+
+            # a monthly series still only fetches a few months before the window
+            result = await expressions.evaluate("lag(PAYEMS, 2)", "2015-01-01", "2015-12-31")
+            assert result["data"][0]["date"] == "2015-01-01"
+            starts = [call["observation_start"] for call in fake.calls("series/observations", "PAYEMS")]
+            assert starts == ["2014-10-31"]
+        finally:
+            await fake.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,57 @@
+import asyncio
+from datetime import datetime
+
+from tests.conftest import make_fred_service
+from tests.fake_fred import FakeFRED, monthly_series
+
+
+def test_window_inside_cached_range_is_sliced_without_a_download():
+    async def scenario():
+        fake = await FakeFRED({"TEST": monthly_series("TEST", 2000, 2010)}).start()
+        try:
+            service = make_fred_service(fake)
+            five_years = await service.get_series("TEST", "2005-01-01", "2010-12-31")
+            one_year = await service.get_series("TEST", "2010-01-01", "2010-12-31")
+            assert len(five_years) == 72 and len(one_year) == 12
+            assert len(fake.calls("series/observations")) == 1
+        finally:
+            await fake.stop()
+
+    asyncio.run(scenario())
+
+
+def test_window_without_observations_keeps_its_coverage():
+    async def scenario():
+        fake = await FakeFRED({"TEST": monthly_series("TEST", 2000, 2010)}).start()
+        try:
+            service = make_fred_service(fake)
+            assert len(await service.get_series("TEST", "1990-01-01", "1995-12-31")) == 0
+            assert len(await service.get_series("TEST", "1990-01-01", "1995-12-31")) == 0
+            # widening the empty window only fetches the part that isn't covered yet
+            assert len(await service.get_series("TEST", "1990-01-01", "2000-12-31")) == 12
+            requests = fake.calls("series/observations")
+            assert [(r["observation_start"], r["observation_end"]) for r in requests] == [
+                ("1990-01-01", "1995-12-31"), ("1996-01-01", "2000-12-31")
+            ]
+        finally:
+            await fake.stop()
+
+    asyncio.run(scenario())
+
+
+def test_future_end_date_is_not_recorded_as_covered():
+    async def scenario():
+        fake = await FakeFRED({"TEST": monthly_series("TEST", 2000, 2010)}).start()
+        try:
+            service = make_fred_service(fake)
+            today = datetime.now().strftime("%Y-%m-%d")
+            assert len(await service.get_series("TEST", "2010-01-01", "2099-12-31")) == 12
+            assert fake.calls("series/observations")[0]["observation_end"] == today
+            cached = await service.cache.get("fred:range:TEST::")
+            assert str(cached.covered[1]) == today
+            assert len(await service.get_series("TEST", "2098-01-01", "2099-12-31")) == 0
+            assert len(fake.calls("series/observations")) == 1
+        finally:
+            await fake.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,46 @@
+import asyncio
+
+from app.api.services.hedging import Hedger
+
+
+def test_first_call_is_timed_even_when_its_hedge_wins():
+    async def scenario():
+        hedger = Hedger(initial_delay=0.02)
+        calls = []
+
+        async def call():
+            calls.append(len(calls))
+            # the first call is slow, its hedge answers at once
+            await asyncio.sleep(0.2 if len(calls) == 1 else 0)
+            return len(calls)
+
+        assert await hedger.run(call) == 2
+        assert hedger.stats["hedge_won"] == 1
+        assert list(hedger.latencies) == []
+
+        await asyncio.sleep(0.3)
+        assert len(hedger.latencies) == 1
+        assert hedger.latencies[0] >= 0.2
+        assert not hedger.stragglers
+
+    asyncio.run(scenario())
+
+
+def test_cancelling_the_caller_cancels_both_calls():
+    async def scenario():
+        hedger = Hedger(initial_delay=0.01)
+        tasks = []
+
+        async def call():
+            tasks.append(asyncio.current_task())
+            await asyncio.sleep(10)
+
+        run = asyncio.create_task(hedger.run(call))
+        await asyncio.sleep(0.05)
+        run.cancel()
+        await asyncio.gather(run, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert len(tasks) == 2 and all(task.cancelled() for task in tasks)
+        assert not hedger.stragglers
+
+    asyncio.run(scenario())
@@ -0,0 +1,39 @@
+import numpy as np
+
+from app.api.services.impact import ImpactHistory, bucket_inputs, payment, percentile_bands, run
+
+INPUTS = bucket_inputs(
+    income=85000, expenses=60000, savings=20000, mortgage=300000, mortgage_term=30, mortgage_rate=6.5,
+    variable_rate=True, years=5,
+)
+
+
+def history(seed=7, months=240):
+    rng = np.random.default_rng(seed)
+    return ImpactHistory(
+        rng.normal(0.002, 0.003, months), rng.normal(0, 0.2, months), rng.normal(0, 0.15, months), 5.3, 6.8
+    )
+
+
+def test_seeded_run_is_reproducible():
+    # more paths than one chunk, so the chunks share the generator in a fixed order
+    first = run(history(), INPUTS, 2500, seed=42)
+    assert run(history(), INPUTS, 2500, seed=42) == first
+    assert run(history(), INPUTS, 2500, seed=43)["bands"] != first["bands"]
+    assert len(first["bands"]["savings"]["p50"]) == INPUTS["years"]
+
+
+def test_percentile_bands_match_numpy():
+    paths = {"savings": np.random.default_rng(0).normal(1000, 300, size=(999, 4))}
+    bands = percentile_bands(paths, percentiles=(5, 50, 95))
+    expected = np.percentile(paths["savings"], [5, 50, 95], axis=0)
+    for row, p in zip(expected, (5, 50, 95)):
+        assert bands["savings"][f"p{p}"] == [round(float(value), 2) for value in row]
+
+
+def test_inputs_and_payment():
+    assert INPUTS["mortgage_rate"] == 6.5
+    assert bucket_inputs(123456, 0, 0, 0, 30, 6.53, False, 5)["income"] == 123000
+    assert bucket_inputs(123456, 0, 0, 0, 30, 6.53, False, 5)["mortgage_rate"] == 6.55
+    assert round(float(payment(100000, 6.0, 360)), 2) == 599.55
+    assert float(payment(1200, 0.0, 12)) == 100.0
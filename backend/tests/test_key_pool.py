@@ -0,0 +1,92 @@
+import asyncio
+
+import httpx
+
+from app.api.services.rate_limit import KeyPool
+
+
+class StubClient:
+    """Answers 429 for the keys in rate_limited and 200 otherwise, recording the key each request used."""
+
+    timeout = httpx.Timeout(5)
+
+    def __init__(self, rate_limited=(), retry_after=None):
+        self.rate_limited = set(rate_limited)
+        self.retry_after = retry_after
+        self.keys = []
+
+    async def get(self, url, params=None, **kwargs):
+        self.keys.append(params["api_key"])
+        if params["api_key"] in self.rate_limited:
+            headers = {"Retry-After": self.retry_after} if self.retry_after else {}
+            return httpx.Response(429, headers=headers)
+        return httpx.Response(200)
+
+
+def health(pool):
+    return {stats["key"]: stats["healthy"] for stats in pool.stats()}
+
+
+def test_rate_limited_key_is_ejected_and_comes_back_after_its_cooldown():
+    async def scenario():
+        pool = KeyPool(["key-aaaa", "key-bbbb"], 0, max_429s=2, cooldown=0.2)
+        client = StubClient(rate_limited={"key-aaaa"})
+
+        # each 429 is retried on the other key; the second in a row ejects the first key
+        for _ in range(2):
+            response = await pool.get(client, "https://fred.test/series")
+            assert response.status_code == 200
+        assert client.keys == ["key-aaaa", "key-bbbb", "key-aaaa", "key-bbbb"]
+        assert health(pool) == {"...aaaa": False, "...bbbb": True}
+
+        client.keys.clear()
+        await pool.get(client, "https://fred.test/series")
+        assert client.keys == ["key-bbbb"]
+
+        # back in rotation once the cooldown is over
+        await asyncio.sleep(0.25)
+        client.rate_limited.clear()
+        client.keys.clear()
+        assert (await pool.get(client, "https://fred.test/series")).status_code == 200
+        assert client.keys == ["key-aaaa"]
+        assert health(pool) == {"...aaaa": True, "...bbbb": True}
+
+    asyncio.run(scenario())
+
+
+def test_cooldown_doubles_while_a_key_keeps_failing():
+    async def scenario():
+        pool = KeyPool(["key-aaaa", "key-bbbb"], 0, max_429s=1, cooldown=0.2)
+        client = StubClient(rate_limited={"key-aaaa"})
+        await pool.get(client, "https://fred.test/series")
+        assert 0.1 < pool.stats()[0]["cooldown_s"] <= 0.2
+
+        await asyncio.sleep(0.25)
+        await pool.get(client, "https://fred.test/series")
+        assert 0.3 < pool.stats()[0]["cooldown_s"] <= 0.4
+        assert pool.stats()[0]["rate_limited"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_sets_the_cooldown():
+    async def scenario():
+        pool = KeyPool(["key-aaaa", "key-bbbb"], 0, max_429s=3, cooldown=0.2)
+        client = StubClient(rate_limited={"key-aaaa"}, retry_after="30")
+        assert (await pool.get(client, "https://fred.test/series")).status_code == 200
+        assert client.keys == ["key-aaaa", "key-bbbb"]
+        assert 29 < pool.stats()[0]["cooldown_s"] <= 30
+
+    asyncio.run(scenario())
+
+
+def test_pool_returns_the_429_once_every_key_is_rate_limited():
+    async def scenario():
+        pool = KeyPool(["key-aaaa", "key-bbbb"], 0, max_429s=3, cooldown=0.2)
+        client = StubClient(rate_limited={"key-aaaa", "key-bbbb"})
+        response = await pool.get(client, "https://fred.test/series")
+        assert response.status_code == 429
+        assert len(client.keys) == 3 and set(client.keys) == {"key-aaaa", "key-bbbb"}
+        assert all(stats["healthy"] for stats in pool.stats())
+
+    asyncio.run(scenario())
@@ -0,0 +1,121 @@
+import asyncio
+
+from app.api.services.cache import MemoryCache
+from app.api.services.refresh_scheduler import RefreshScheduler
+from app.api.services.stream_service import LatestValueStream
+from tests.conftest import make_fred_service
+from tests.fake_fred import FakeFRED, monthly_series
+
+UPDATED = "2024-02-09 07:45:01-06"
+
+
+def publish_revision(fake, series_id):
+    """FRED updates a series: a revised last observation and a new last_updated in its metadata and the feed."""
+    series = fake.series[series_id]
+    series["observations"][-1] = {**series["observations"][-1], "value": "99.99"}
+    series["info"] = {**series["info"], "last_updated": UPDATED}
+
+
+def downloads(fake, series_id):
+    """Range downloads of a series (not latest-value requests)."""
+    return [call for call in fake.calls("series/observations", series_id) if "observation_start" in call]
+
+
+def latest_requests(fake):
+    return [call for call in fake.calls("series/observations") if call.get("sort_order") == "desc"]
+
+
+def test_changed_series_is_refreshed_once_and_unchanged_series_never():
+    async def scenario():
+        fake = await FakeFRED({"CHANGED": monthly_series("CHANGED", 2020, 2023),
+                               "UNCHANGED": monthly_series("UNCHANGED", 2020, 2023)}).start()
+        try:
+            service = make_fred_service(fake)
+            for series_id in ("CHANGED", "UNCHANGED"):
+                await service.get_series_data(series_id, "2020-01-01", "2023-12-31")
+
+            publish_revision(fake, "CHANGED")
+            fake.updates = [fake.series["CHANGED"]["info"], fake.series["UNCHANGED"]["info"]]
+            scheduler = RefreshScheduler(service, poll_interval=0)
+            pushed = []
+            scheduler.add_listener(pushed.append)
+
+            assert await scheduler.run_once() == ["CHANGED"]
+            # the feed still lists the series, but it's already up to date
+            assert await scheduler.run_once() == []
+
+            assert len(fake.calls("series/updates")) == 2
+            assert len(downloads(fake, "CHANGED")) == 2 and len(downloads(fake, "UNCHANGED")) == 1
+            assert [latest["series_id"] for latest in pushed] == ["CHANGED"]
+            series = await service.get_series("CHANGED", "2023-12-01", "2023-12-31")
+            assert series.values.tolist() == [99.99]
+        finally:
+            await fake.stop()
+
+    asyncio.run(scenario())
+
+
+def test_only_the_lease_holder_polls_and_it_refreshes_every_workers_series():
+    async def scenario():
+        fake = await FakeFRED({"FIRST": monthly_series("FIRST", 2020, 2023),
+                               "SECOND": monthly_series("SECOND", 2020, 2023)}).start()
+        try:
+            # two workers sharing a cache backend
+            cache = MemoryCache()
+            workers = [make_fred_service(fake, cache), make_fred_service(fake, cache)]
+            schedulers = [RefreshScheduler(service, poll_interval=0) for service in workers]
+            await workers[0].get_series_data("FIRST", "2020-01-01", "2023-12-31")
+            await workers[1].get_series_data("SECOND", "2020-01-01", "2023-12-31")
+
+            await schedulers[0].run_once()
+            await schedulers[1].run_once()
+            assert schedulers[0].stats["lease_held"] and not schedulers[1].stats["lease_held"]
+            assert len(fake.calls("series/updates")) == 1
+
+            # a series only the other worker cached is refreshed by the lease holder
+            publish_revision(fake, "SECOND")
+            fake.updates = [fake.series["SECOND"]["info"]]
+            assert await schedulers[1].run_once() == []
+            assert await schedulers[0].run_once() == ["SECOND"]
+            assert len(fake.calls("series/updates")) == 2
+            assert len(downloads(fake, "SECOND")) == 2
+            series = await workers[1].get_series("SECOND", "2023-12-01", "2023-12-31")
+            assert series.values.tolist() == [99.99]
+
+            # when the holder stops, the next worker takes over
+            await schedulers[0].stop()
+            await schedulers[1].run_once()
+            assert schedulers[1].stats["lease_held"]
+            assert len(fake.calls("series/updates")) == 3
+        finally:
+            await fake.stop()
+
+    asyncio.run(scenario())
+
+
+def test_stream_reads_the_cache_the_scheduler_refreshes():
+    async def scenario():
+        fake = await FakeFRED({"CHANGED": monthly_series("CHANGED", 2020, 2023)}).start()
+        try:
+            service = make_fred_service(fake)
+            stream = LatestValueStream(service, poll_upstream=False)
+            queue = stream.subscribe(["CHANGED"])
+            scheduler = RefreshScheduler(service, poll_interval=0)
+            scheduler.add_listener(stream.publish)
+
+            for _ in range(3):
+                await stream.refresh()
+            # only the first read missed the cache
+            assert len(latest_requests(fake)) == 1
+            assert queue.get_nowait()["value"] == 2023.12 and queue.empty()
+
+            publish_revision(fake, "CHANGED")
+            fake.updates = [fake.series["CHANGED"]["info"]]
+            await scheduler.run_once()
+            await stream.refresh()
+            assert queue.get_nowait()["value"] == 99.99 and queue.empty()
+            assert len(latest_requests(fake)) == 2
+        finally:
+            await fake.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+
+from app.api.services.regional_service import RegionalService
+
+
+def test_failed_batch_cancels_the_other_workers():
+    async def scenario():
+        service = RegionalService()
+        fetches = []
+
+        async def fetch_batch(client, group, level, dates):
+            fetches.append(asyncio.current_task())
+            if len(fetches) == 1:
+                await asyncio.sleep(0.01)
+                raise Exception("FRED API error: 500")
+            await asyncio.sleep(10)
+
+        service._fetch_regional_data_batch = fetch_batch
+        dates = [f"{year}-01-01" for year in range(1980, 2024)]
+        with pytest.raises(Exception, match="FRED API error: 500"):
+            await asyncio.wait_for(service._fetch_panel({"series_group": "1"}, "state", dates), timeout=2)
+
+        assert len(fetches) > 1
+        assert all(task.done() for task in fetches)
+
+    asyncio.run(scenario())
@@ -0,0 +1,48 @@
+from app.api.services.search_index import SearchIndex, load_snapshot, save_snapshot, series_entry
+
+SERIES = [
+    {"id": "CPIAUCSL", "title": "Consumer Price Index for All Urban Consumers", "units": "Index", "popularity": 95,
+     "tags": ["inflation", "prices"]},
+    {"id": "CPILFESL", "title": "Consumer Price Index Less Food and Energy", "units": "Index", "popularity": 80,
+     "tags": ["inflation", "core"]},
+    {"id": "PCE", "title": "Personal Consumption Expenditures", "units": "Billions of Dollars", "popularity": 85},
+    {"id": "PRICE", "title": "Producer Prices", "units": "Index", "popularity": 10},
+    {"id": "UNRATE", "title": "Unemployment Rate", "units": "Percent", "popularity": 99,
+     "notes": "The unemployment rate represents the number of unemployed as a percentage of the labor force."},
+]
+
+
+def ids(results):
+    return [result["id"] for result in results]
+
+
+def test_last_word_is_a_prefix_until_followed_by_a_space():
+    index = SearchIndex(SERIES)
+    assert ids(index.search("consumer pri")) == ["CPIAUCSL", "CPILFESL"]
+    assert ids(index.search("consumer pri ")) == []
+    assert ids(index.search("unemp")) == ["UNRATE"]
+    assert index.search("xyz") == [] and index.search("") == []
+
+
+def test_whole_words_rank_above_longer_words_with_the_prefix():
+    index = SearchIndex(SERIES)
+    # "price" is a whole word in the CPI titles and in PRICE's id, only a prefix of "prices"
+    results = index.search("price")
+    assert ids(results) == ["PRICE", "CPIAUCSL", "CPILFESL"]
+    # CPIAUCSL's "prices" tag doesn't add to its whole-word title match
+    assert results[1]["score"] == results[2]["score"] == 4.0
+    # "consumer", "consumers" and "consumption" score the same, so popularity decides
+    assert ids(index.search("consum")) == ["CPIAUCSL", "PCE", "CPILFESL"]
+
+
+def test_id_matches_outrank_title_matches():
+    index = SearchIndex(SERIES)
+    assert ids(index.search("pce"))[0] == "PCE"
+    assert ids(index.search("unrate", limit=1)) == ["UNRATE"]
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "search.json.gz")
+    entries = [series_entry(info, info.get("tags", ())) for info in SERIES]
+    save_snapshot(path, {"series": entries})
+    assert ids(SearchIndex(load_snapshot(path)["series"]).search("core")) == ["CPILFESL"]
@@ -0,0 +1,27 @@
+import statistics
+import subprocess
+import sys
+
+from benchmarks.startup import (
+    BACKEND_DIR, DEFAULT_BUDGET_MS, FRAMEWORK_IMPORTS, LAZY_MODULES, measure_app_imports, total_ms
+)
+
+
+def test_app_import_overhead_within_budget():
+    # median of a few runs, since a single cold import is noisy
+    overheads = [
+        total_ms(measure_app_imports()) - total_ms(measure_app_imports(FRAMEWORK_IMPORTS))
+        for _ in range(3)
+    ]
+    assert statistics.median(overheads) <= DEFAULT_BUDGET_MS, overheads
+
+
+def test_heavy_modules_are_not_imported_at_startup():
+    # a fresh interpreter, since the test process has imported plenty already
+    check = (
+        "import sys, app.main; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", check], cwd=BACKEND_DIR, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
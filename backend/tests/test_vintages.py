@@ -0,0 +1,61 @@
+import json
+
+import numpy as np
+
+from app.api.services.vintages import VintageStore, parse_vintages
+
+
+def alfred(*rows):
+    """An ALFRED observations response from (date, value, realtime_start, realtime_end) rows."""
+    return json.dumps({"observations": [
+        {"date": date, "value": value, "realtime_start": start, "realtime_end": end}
+        for date, value, start, end in rows
+    ]})
+
+
+STORE = parse_vintages(alfred(
+    ("2020-01-01", "100", "2020-02-05", "2020-03-04"),
+    ("2020-01-01", "101", "2020-03-05", "9999-12-31"),
+    ("2020-02-01", "102", "2020-03-05", "2020-04-02"),
+    # withdrawn by the 2020-04-03 vintage
+    ("2020-02-01", ".", "2020-04-03", "9999-12-31"),
+))
+
+
+def observations(store, as_of):
+    vintage, series = store.as_of(as_of)
+    if series is None:
+        return vintage, None
+    return vintage, dict(zip(np.datetime_as_string(series.dates).tolist(), series.values.tolist()))
+
+
+def test_as_of_boundaries():
+    assert observations(STORE, "2020-02-04") == (None, None)
+    # valid_from is the first day a value is in effect...
+    assert observations(STORE, "2020-02-05") == ("2020-02-05", {"2020-01-01": 100.0})
+    # ...and valid_to the last one
+    assert observations(STORE, "2020-03-04") == ("2020-02-05", {"2020-01-01": 100.0})
+    assert observations(STORE, "2020-03-05") == ("2020-03-05", {"2020-01-01": 101.0, "2020-02-01": 102.0})
+    assert observations(STORE, "2020-04-02") == ("2020-03-05", {"2020-01-01": 101.0, "2020-02-01": 102.0})
+    assert observations(STORE, "2020-04-03") == ("2020-04-03", {"2020-01-01": 101.0})
+    assert observations(STORE, "2031-01-01") == ("2020-04-03", {"2020-01-01": 101.0})
+    assert (STORE.first_vintage, STORE.last_vintage) == ("2020-02-05", "2020-04-03")
+
+
+def test_merge_closes_the_rows_an_update_revises(tmp_path):
+    # ALFRED clamps realtime_start to the one requested, so rows still in effect start on it
+    update = parse_vintages(alfred(
+        ("2020-01-01", "101", "2020-05-01", "2020-05-09"),
+        ("2020-01-01", "103", "2020-05-10", "9999-12-31"),
+        ("2020-02-01", ".", "2020-05-01", "9999-12-31"),
+        ("2020-03-01", "104", "2020-05-10", "9999-12-31"),
+    ))
+    merged = STORE.merge(update, "2020-05-01")
+    assert len(merged) == len(STORE) + 2
+    assert observations(merged, "2020-05-09") == ("2020-04-03", {"2020-01-01": 101.0})
+    assert observations(merged, "2020-05-10") == ("2020-05-10", {"2020-01-01": 103.0, "2020-03-01": 104.0})
+    assert observations(merged, "2020-03-04") == observations(STORE, "2020-03-04")
+
+    path = str(tmp_path / "vintages.npz")
+    merged.save(path)
+    assert observations(VintageStore.load(path), "2020-05-10") == observations(merged, "2020-05-10")
@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+import pytest
+
+from app.api.services.regional_service import RegionalService
+from app.config import CACHE_TTL_LATEST
+from app.warmup import Checkpoint, warm_up
+from tests.conftest import make_fred_service
+from tests.fake_fred import FakeFRED, monthly_series
+
+SERIES = ["AAA", "BBB", "CCC", "DDD"]
+TASKS = [f"series:{series_id}" for series_id in SERIES]
+
+
+def fetched(fake):
+    return [series_id for series_id in SERIES if fake.calls("series/observations", series_id)]
+
+
+def test_resumed_warm_up_runs_only_pending_tasks(tmp_path):
+    async def scenario():
+        fake = await FakeFRED({series_id: monthly_series(series_id, 2015, 2023) for series_id in SERIES}).start()
+        path = str(tmp_path / "checkpoint.json")
+        try:
+            checkpoint = Checkpoint(path)
+            run = asyncio.create_task(warm_up(TASKS, checkpoint, 1, make_fred_service(fake), RegionalService()))
+            while len(checkpoint.done) < 2:
+                await asyncio.sleep(0)
+            run.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await run
+
+            # a fresh cache, so anything the resumed run skips shows up as missing requests
+            fake.requests.clear()
+            resumed = Checkpoint(path)
+            assert set(resumed.done) == {"series:AAA", "series:BBB"}
+            succeeded, errors = await warm_up(TASKS, resumed, 2, make_fred_service(fake), RegionalService())
+            assert (succeeded, errors) == (2, {})
+            assert fetched(fake) == ["CCC", "DDD"]
+        finally:
+            await fake.stop()
+
+    asyncio.run(scenario())
+
+
+def test_tasks_older_than_their_ttl_run_again(tmp_path):
+    async def scenario():
+        fake = await FakeFRED({series_id: monthly_series(series_id, 2015, 2023) for series_id in SERIES}).start()
+        try:
+            checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"))
+            now = time.time()
+            checkpoint.done = {
+                "series:AAA": now - 60,
+                "series:BBB": now - CACHE_TTL_LATEST - 60,
+                "series:CCC": now,
+                "series:DDD": now - CACHE_TTL_LATEST - 60,
+            }
+            succeeded, _ = await warm_up(TASKS, checkpoint, 2, make_fred_service(fake), RegionalService())
+            assert succeeded == 2
+            assert fetched(fake) == ["BBB", "DDD"]
+            assert all(checkpoint.is_fresh(task) for task in TASKS)
+        finally:
+            await fake.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,56 @@
+import numpy as np
+
+from app.api.services.series import Series
+from app.api.services.yield_curve import YieldHistory, inversion_episodes, parse_treasury_csv
+
+CSV = """Date,1 Mo,2 Mo,3 Mo,6 Mo,1 Yr,2 Yr,5 Yr,10 Yr,30 Yr,Extra
+01/04/2024,5.50,5.48,5.45,5.20,4.90,4.40,4.00,4.00,4.10,1
+01/03/2024,,5.47,5.44,5.19,4.88,4.35,3.95,3.90,,1
+"""
+
+
+def test_treasury_csv_is_sorted_by_date_and_tenor():
+    history = parse_treasury_csv(CSV)
+    assert np.datetime_as_string(history.dates).tolist() == ["2024-01-03", "2024-01-04"]
+    assert history.tenors.tolist() == [1 / 12, 2 / 12, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0]
+    assert np.isnan(history.yields[0, 0]) and np.isnan(history.yields[0, -1])
+    assert history.yields[1, -1] == 4.10
+
+
+def test_interpolation_goes_through_published_yields_without_extrapolating():
+    tenors = [0.25, 1.0, 2.0, 5.0, 10.0, 30.0]
+    linear = [1.0 + 0.1 * tenor for tenor in tenors]
+    # the second curve has no 30-year yield, the third only one tenor
+    history = YieldHistory(
+        ["2024-01-02", "2024-01-03", "2024-01-04"],
+        tenors,
+        [linear, linear[:-1] + [np.nan], [np.nan, np.nan, 4.0, np.nan, np.nan, np.nan]],
+    )
+    result = history.interpolate([0.25, 3.0, 7.0, 20.0, 0.1])
+
+    # a natural cubic spline through points on a line is that line
+    assert np.allclose(result[0, :4], [1.025, 1.3, 1.7, 3.0])
+    assert np.allclose(result[1, :3], [1.025, 1.3, 1.7])
+    # no extrapolation: below the shortest or above the longest tenor published that day
+    assert np.isnan(result[0, 4]) and np.isnan(result[1, 3])
+    assert np.isnan(result[2]).all()
+    assert np.allclose(history.interpolate(tenors)[0], linear)
+
+
+def test_spread_and_inversion_episodes():
+    history = YieldHistory(
+        ["2024-01-01", "2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"],
+        [0.25, 2.0, 10.0],
+        [[4.0, 4.5, 5.0], [4.0, 5.2, 5.0], [4.0, 5.5, 5.1], [4.0, 4.9, 5.0], [4.0, 5.3, 5.0]],
+    )
+    spread = history.spread("2s10s")
+    assert np.allclose(spread.values, [0.5, -0.2, -0.4, 0.1, -0.3])
+
+    episodes = inversion_episodes(spread)
+    assert [(episode["start"], episode["end"], episode["ongoing"]) for episode in episodes] == [
+        ("2024-01-02", "2024-01-03", False),
+        ("2024-01-05", "2024-01-05", True),
+    ]
+    assert episodes[0]["deepest_date"] == "2024-01-03" and episodes[0]["deepest"] == -0.4
+    assert inversion_episodes(spread, min_days=2) == episodes[:1]
+    assert inversion_episodes(Series(spread.dates, -spread.values))[0]["calendar_days"] == 1
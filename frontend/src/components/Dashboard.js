@@ -53,6 +53,14 @@ const Dashboard = () => {
     fetchDashboardData();
   }, [timeRange]);
 
+  // keep the key indicator cards current with values pushed by the server
+  useEffect(() => {
+    const unsubscribe = api.subscribeToLatest(['FEDFUNDS', 'UNRATE', 'CPIAUCSL', 'GDPC1'], (latest) => {
+      setDashboardData(prev => ({ ...prev, [latest.series_id]: latest }));
+    });
+    return unsubscribe;
+  }, []);
+
   const handleTimeRangeChange = (range) => {
     setTimeRange(range);
   };
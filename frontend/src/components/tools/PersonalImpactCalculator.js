@@ -30,6 +30,10 @@ const PersonalImpactCalculator = () => {
     currentMortgagePayment: 0,
     newMortgagePayment: 0,
   });
+
+  // Simulated range of outcomes from the server (percentile bands per year)
+  const [projection, setProjection] = useState(null);
+  const projectionYears = 10;
   
   // Fetch current economic data
   useEffect(() => {
@@ -107,6 +111,38 @@ const PersonalImpactCalculator = () => {
     });
   }, [economicData, income, expenses, savings, mortgage, mortgageTerm, mortgageRate, hasVariableRateLoan]);
   
+  // Fetch the simulated range of outcomes when inputs change (debounced, since
+  // every keystroke in a field would otherwise start a request)
+  useEffect(() => {
+    const timer = setTimeout(async () => {
+      try {
+        const response = await axios.get('/api/tools/impact', {
+          params: {
+            income,
+            expenses,
+            savings,
+            mortgage,
+            mortgage_term: Math.min(Math.max(mortgageTerm, 1), 30),
+            mortgage_rate: mortgageRate,
+            variable_rate: hasVariableRateLoan,
+            years: projectionYears,
+          },
+        });
+        setProjection(response.data);
+      } catch (err) {
+        console.error('Error fetching simulated impact:', err);
+        setProjection(null);
+      }
+    }, 400);
+    return () => clearTimeout(timer);
+  }, [income, expenses, savings, mortgage, mortgageTerm, mortgageRate, hasVariableRateLoan]);
+
+  // "median (5th to 95th percentile)" for one year of a simulated quantity
+  const formatBand = (quantity, yearIndex) => {
+    const band = projection.bands[quantity];
+    return `${formatValue(band.p50[yearIndex])} (${formatValue(band.p5[yearIndex])} to ${formatValue(band.p95[yearIndex])})`;
+  };
+  
   // Format currency values for display
   const formatValue = (value) => {
     return formatCurrency(value, 'USD', 0);
@@ -307,6 +343,35 @@ const PersonalImpactCalculator = () => {
               )}
             </div>
           </div>
+          
+          {projection && (
+            <div className="mortgage-payment-section">
+              <h4>Range of Outcomes ({projection.simulations.toLocaleString()} simulations)</h4>
+              <div className="payment-comparison">
+                <div className="payment-item">
+                  <div className="payment-label">Net Impact, Next Year:</div>
+                  <div className="payment-value">{formatBand('net_impact', 0)}</div>
+                </div>
+                <div className="payment-item">
+                  <div className="payment-label">Net Impact in Year {projectionYears}:</div>
+                  <div className="payment-value">{formatBand('net_impact', projectionYears - 1)}</div>
+                </div>
+                <div className="payment-item">
+                  <div className="payment-label">Savings in {projectionYears} Years (Today's Dollars):</div>
+                  <div className="payment-value">{formatBand('savings_real', projectionYears - 1)}</div>
+                </div>
+                {hasVariableRateLoan && (
+                  <div className="payment-item">
+                    <div className="payment-label">Mortgage Payment in Year {projectionYears}:</div>
+                    <div className="payment-value">{formatBand('mortgage_payment', projectionYears - 1)}/month</div>
+                  </div>
+                )}
+              </div>
+              <div className="impact-explanation">
+                Median with the 5th to 95th percentile range, from inflation and interest rate paths resampled from their history since {projection.history.start.slice(0, 4)}.
+              </div>
+            </div>
+          )}
         </div>
       </div>
       
@@ -6,6 +6,8 @@ const api = axios.create({
   timeout: 15000,
   headers: {
     'Content-Type': 'application/json',
+    // lets the backend stop working on a request once this client has given up on it
+    'X-Timeout-Ms': '15000',
   },
 });
 
@@ -29,6 +31,14 @@ const endpoints = {
   getLatestValue: (seriesId) => api.get(`/latest/${seriesId}`),
   
   getDashboardData: () => api.get('/dashboard'),
+
+  // subscribes to pushed latest values (server-sent events) instead of polling /dashboard
+  // returns a function that closes the stream
+  subscribeToLatest: (seriesIds, onUpdate) => {
+    const source = new EventSource(`${api.defaults.baseURL}/stream/latest?ids=${seriesIds.join(',')}`);
+    source.addEventListener('latest', (event) => onUpdate(JSON.parse(event.data)));
+    return () => source.close();
+  },
 };
 
 export default endpoints;
\ No newline at end of file